@@ -29,6 +29,8 @@ echo "  Building classify_anomaly..."
   mkdir -p packages
   pip install -q --target packages/ -r requirements.txt 2>/dev/null || pip install --target packages/ -r requirements.txt
   zip -q lambda.zip handler.py
+  (cd .. && zip -qr classify_anomaly/lambda.zip shared -x "*/__pycache__/*")
+  (cd ../.. && zip -qr lambdas/classify_anomaly/lambda.zip common -x "*/__pycache__/*")
   if [ -d "packages" ] && [ "$(ls -A packages)" ]; then
     cd packages && zip -qr ../lambda.zip . 2>/dev/null || true && cd ..
   fi
@@ -42,17 +44,50 @@ echo "  Building classify_level..."
   mkdir -p packages
   pip install -q --target packages/ -r requirements.txt 2>/dev/null || pip install --target packages/ -r requirements.txt
   zip -q lambda.zip handler.py
+  (cd .. && zip -qr classify_level/lambda.zip shared -x "*/__pycache__/*")
+  (cd ../.. && zip -qr lambdas/classify_level/lambda.zip common -x "*/__pycache__/*")
   if [ -d "packages" ] && [ "$(ls -A packages)" ]; then
     cd packages && zip -qr ../lambda.zip . 2>/dev/null || true && cd ..
   fi
 )
 echo "  classify_level built"
 
+echo "  Building query_predictions..."
+(
+  cd $LAMBDAS_PATH/query_predictions
+  rm -rf packages lambda.zip
+  mkdir -p packages
+  pip install -q --target packages/ -r requirements.txt 2>/dev/null || pip install --target packages/ -r requirements.txt
+  zip -q lambda.zip handler.py
+  (cd .. && zip -qr query_predictions/lambda.zip shared -x "*/__pycache__/*")
+  if [ -d "packages" ] && [ "$(ls -A packages)" ]; then
+    cd packages && zip -qr ../lambda.zip . 2>/dev/null || true && cd ..
+  fi
+)
+echo "  query_predictions built"
+
+echo "  Building score..."
+(
+  cd $LAMBDAS_PATH/score
+  rm -rf packages lambda.zip
+  mkdir -p packages
+  pip install -q --target packages/ -r requirements.txt 2>/dev/null || pip install --target packages/ -r requirements.txt
+  zip -q lambda.zip handler.py
+  (cd .. && zip -qr score/lambda.zip shared -x "*/__pycache__/*")
+  (cd ../.. && zip -qr lambdas/score/lambda.zip common -x "*/__pycache__/*")
+  if [ -d "packages" ] && [ "$(ls -A packages)" ]; then
+    cd packages && zip -qr ../lambda.zip . 2>/dev/null || true && cd ..
+  fi
+)
+echo "  score built"
+
 # Step 3: Upload to S3
 echo ""
 echo "Step 3: Uploading Lambda functions to S3"
 awslocal s3 cp $LAMBDAS_PATH/classify_anomaly/lambda.zip s3://$S3_BUCKET/classify_anomaly.zip
 awslocal s3 cp $LAMBDAS_PATH/classify_level/lambda.zip s3://$S3_BUCKET/classify_level.zip
+awslocal s3 cp $LAMBDAS_PATH/query_predictions/lambda.zip s3://$S3_BUCKET/query_predictions.zip
+awslocal s3 cp $LAMBDAS_PATH/score/lambda.zip s3://$S3_BUCKET/score.zip
 echo "  Lambda functions uploaded"
 
 # Step 4: Deploy with Terraform
@@ -84,8 +119,12 @@ echo ""
 echo "API Endpoints:"
 ANOMALY=$(tflocal output -raw rest_api_anomaly_endpoint 2>/dev/null || echo "Not available")
 LEVEL=$(tflocal output -raw rest_api_level_endpoint 2>/dev/null || echo "Not available")
-echo "  Anomaly: $ANOMALY"
-echo "  Level:   $LEVEL"
+SCORE=$(tflocal output -raw rest_api_score_endpoint 2>/dev/null || echo "Not available")
+PREDICTIONS=$(tflocal output -raw rest_api_predictions_endpoint 2>/dev/null || echo "Not available")
+echo "  Anomaly:     $ANOMALY"
+echo "  Level:       $LEVEL"
+echo "  Score:       $SCORE"
+echo "  Predictions: $PREDICTIONS"
 
 # Step 7: Train models
 echo ""
@@ -0,0 +1,6 @@
+"""Code used both by training and by the Lambda handlers.
+
+Modules here depend on nothing but the standard library and numpy. Training code imports
+them as `src.common`; every Lambda package ships this directory as the top-level `common`
+package, next to `shared`.
+"""
@@ -0,0 +1,167 @@
+"""Binary bundle of many per-entity model parameter sets in one file.
+
+Layout (little-endian):
+
+    [0:8]    magic b"MLBUNDL1"
+    [8:12]   uint32 length H of the JSON header
+    [12:12+H] JSON header: model_type, fields, count, slots, id_width,
+              records_offset, index_offset
+    records  `count` fixed-width records: entity_id (bytes, NUL padded) + one float64
+             per field, starting at records_offset (64-byte aligned)
+    index    `slots` int64 record numbers (-1 = empty) of an open-addressing hash table
+             keyed by FNV-1a(entity_id) with linear probing, starting at index_offset
+
+Readers memory-map the file, so opening a bundle costs one header parse and a lookup
+touches one index slot and one record, regardless of how many entities are stored.
+"""
+
+import json
+import mmap
+import os
+import struct
+from collections.abc import Iterable, Mapping
+
+import numpy as np
+
+MAGIC = b"MLBUNDL1"
+ALIGNMENT = 64
+EMPTY_SLOT = -1
+
+BUNDLE_FIELDS = {
+    "ToyAnomalyClassifier": ("mean", "std", "threshold"),
+    "ToyLevelClassifier": ("baseline_avg", "std_dev", "high_cutoff", "low_cutoff"),
+}
+
+
+def fnv1a_64(data: bytes) -> int:
+    """64-bit FNV-1a hash, stable across processes unlike `hash`."""
+    h = 0xCBF29CE484222325
+    for byte in data:
+        h = ((h ^ byte) * 0x100000001B3) & 0xFFFFFFFFFFFFFFFF
+    return h
+
+
+def _record_dtype(fields: Iterable[str], id_width: int) -> np.dtype:
+    return np.dtype([("entity_id", f"S{id_width}"), *[(name, "<f8") for name in fields]])
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_bundle(path: str, model_type: str, models: Mapping[str, Mapping[str, float]]) -> int:
+    """Writes the parameters of many models of one type to a bundle file.
+
+    Args:
+        path (str): Destination file.
+        model_type (str): A key of `BUNDLE_FIELDS`.
+        models (Mapping[str, Mapping[str, float]]): Entity id to model parameters.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    fields = BUNDLE_FIELDS[model_type]
+    ids = [entity_id.encode() for entity_id in models]
+    id_width = max((len(i) for i in ids), default=1)
+
+    records = np.zeros(len(ids), dtype=_record_dtype(fields, id_width))
+    records["entity_id"] = ids
+    for name in fields:
+        records[name] = [float(params[name]) for params in models.values()]
+
+    slots = 1 << max(1, (2 * len(ids) - 1).bit_length())
+    index = np.full(slots, EMPTY_SLOT, dtype="<i8")
+    for row, entity_id in enumerate(ids):
+        slot = fnv1a_64(entity_id) & (slots - 1)
+        while index[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & (slots - 1)
+        index[slot] = row
+
+    header = {
+        "model_type": model_type,
+        "fields": list(fields),
+        "count": len(ids),
+        "slots": slots,
+        "id_width": id_width,
+    }
+    # Offsets depend on the header length, which depends on the offsets; reserve room
+    header_size = len(json.dumps({**header, "records_offset": 0, "index_offset": 0})) + 32
+    header["records_offset"] = _align(12 + header_size)
+    header["index_offset"] = _align(header["records_offset"] + records.nbytes)
+    encoded = json.dumps(header).encode().ljust(header_size)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(encoded)) + encoded)
+        f.write(b"\0" * (header["records_offset"] - f.tell()))
+        f.write(records.tobytes())
+        f.write(b"\0" * (header["index_offset"] - f.tell()))
+        f.write(index.tobytes())
+        return f.tell()
+
+
+class ModelBundle:
+    """Read-only, memory-mapped view of a bundle file with O(1) lookups by entity id."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:8] != MAGIC:
+            raise ValueError(f"Not a model bundle: {path}")
+        (header_length,) = struct.unpack("<I", self._mmap[8:12])
+        header = json.loads(self._mmap[12 : 12 + header_length])
+
+        self.path = path
+        self.model_type: str = header["model_type"]
+        self.fields: tuple[str, ...] = tuple(header["fields"])
+        self.records = np.frombuffer(
+            self._mmap,
+            dtype=_record_dtype(self.fields, header["id_width"]),
+            count=header["count"],
+            offset=header["records_offset"],
+        )
+        self.index = np.frombuffer(
+            self._mmap, dtype="<i8", count=header["slots"], offset=header["index_offset"]
+        )
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return self._find(entity_id) != EMPTY_SLOT
+
+    def _find(self, entity_id: str) -> int:
+        key = entity_id.encode()
+        mask = len(self.index) - 1
+        slot = fnv1a_64(key) & mask
+        while (row := int(self.index[slot])) != EMPTY_SLOT:
+            if self.records[row]["entity_id"] == key:
+                return row
+            slot = (slot + 1) & mask
+        return EMPTY_SLOT
+
+    def lookup(self, entity_id: str) -> dict | None:
+        """Returns the parameters stored for `entity_id`, or None if it is not bundled.
+
+        Args:
+            entity_id (str): The entity to look up.
+
+        Returns:
+            dict | None: Field name to value.
+        """
+        row = self._find(entity_id)
+        if row == EMPTY_SLOT:
+            return None
+        record = self.records[row]
+        return {name: float(record[name]) for name in self.fields}
+
+    def entity_ids(self) -> list[str]:
+        """Returns every bundled entity id."""
+        return [entity_id.decode() for entity_id in self.records["entity_id"]]
+
+
+def open_bundle(path: str) -> ModelBundle:
+    """Memory-maps the bundle at `path`."""
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    return ModelBundle(path)
@@ -0,0 +1,121 @@
+"""Exponentially weighted rolling statistics for streaming anomaly detection.
+
+The state of one series is three numbers, updated in O(1) per value and packed into a
+fixed 24-byte record, so it can be stored next to the series and restored cheaply by
+whichever invocation sees the series next.
+"""
+
+import struct
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+# count (uint64), mean (float64), variance (float64), little-endian
+STATE_FORMAT = struct.Struct("<Qdd")
+
+
+@dataclass
+class RollingState:
+    """Exponentially weighted mean and variance of one series."""
+
+    count: int = 0
+    mean: float = 0.0
+    variance: float = 0.0
+
+    @property
+    def std(self) -> float:
+        """Exponentially weighted standard deviation."""
+        return self.variance**0.5
+
+    def update(self, value: float, alpha: float) -> None:
+        """Folds one value into the state.
+
+        Until `1 / alpha` values have been seen the weight is `1 / count`, which makes the
+        state the plain mean and population variance of the values so far, instead of
+        being dominated by the first value.
+
+        Args:
+            value (float): The new value.
+            alpha (float): Weight of the new value, in (0, 1].
+        """
+        self.count += 1
+        weight = max(alpha, 1.0 / self.count)
+        delta = value - self.mean
+        increment = weight * delta
+        self.mean += increment
+        self.variance = (1.0 - weight) * (self.variance + delta * increment)
+
+    def pack(self) -> bytes:
+        """Serializes the state into `STATE_FORMAT.size` bytes."""
+        return STATE_FORMAT.pack(self.count, self.mean, self.variance)
+
+    @classmethod
+    def unpack(cls, data: bytes | None) -> "RollingState":
+        """Restores a state serialized with `pack`; empty data gives a fresh state.
+
+        Args:
+            data (bytes | None): The packed state.
+
+        Returns:
+            RollingState: The restored state.
+        """
+        if not data:
+            return cls()
+        return cls(*STATE_FORMAT.unpack(bytes(data)))
+
+
+@dataclass(frozen=True)
+class RollingDetector:
+    """Flags values more than `threshold_sigmas` rolling deviations above the rolling mean.
+
+    The detector only holds parameters; the state of each series is a `RollingState`.
+    Every value is scored against the state before it is folded in, and no value is
+    flagged while the series has fewer than `warmup` values.
+    """
+
+    alpha: float = 0.05
+    threshold_sigmas: float = 3.0
+    warmup: int = 30
+
+    def __post_init__(self) -> None:
+        if not 0 < self.alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+
+    def is_anomaly(self, state: RollingState, value: float) -> bool:
+        """Scores a value against a state without updating it.
+
+        Args:
+            state (RollingState): The state of the series.
+            value (float): The value to score.
+
+        Returns:
+            bool: True if the value is an anomaly.
+        """
+        if state.count < self.warmup:
+            return False
+        return value > state.mean + self.threshold_sigmas * state.std
+
+    def update(self, state: RollingState, value: float) -> bool:
+        """Scores a value, then folds it into the state.
+
+        Args:
+            state (RollingState): The state of the series, updated in place.
+            value (float): The new value.
+
+        Returns:
+            bool: True if the value is an anomaly.
+        """
+        flagged = self.is_anomaly(state, value)
+        state.update(value, self.alpha)
+        return flagged
+
+    def update_batch(self, state: RollingState, values: Iterable[float]) -> list[bool]:
+        """Scores and folds in consecutive values of one series, in order.
+
+        Args:
+            state (RollingState): The state of the series, updated in place.
+            values (Iterable[float]): The new values, oldest first.
+
+        Returns:
+            list[bool]: True where the value is an anomaly.
+        """
+        return [self.update(state, value) for value in values]
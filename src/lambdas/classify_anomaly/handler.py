@@ -1,37 +1,56 @@
-import json
 import os
-from dataclasses import dataclass
+import time
 from datetime import datetime
 from decimal import Decimal
-from functools import lru_cache
 
-import boto3
 from aws_lambda_powertools import Logger
-from aws_lambda_powertools.event_handler import APIGatewayRestResolver
+from aws_lambda_powertools.event_handler import APIGatewayRestResolver, Response
+from shared.aliases import AliasResolver
+from shared.artifacts import ArtifactLoader
+from shared.clients import lazy_client, lazy_resource, warm_clients
+from shared.decoding import (
+    RequestValidationError,
+    UnsupportedMediaType,
+    decode_batch,
+    decode_point,
+    decode_points,
+)
+from shared.drift import DriftMonitor
+from shared.io_pool import IOPool
+from shared.metrics import MetricsBuffer
+from shared.model_cache import ModelCache
+from shared.models import DataPoint, RollingAnomalyDetector, ToyAnomalyClassifier, build_model
+from shared.persistence import PredictionWriter
+from shared.series_state import SeriesStateStore, StateConflict
+from shared.tracing import Tracer
+
+from common.model_bundle import ModelBundle, open_bundle
 
 logger = Logger(service="ClassifyAnomaly")
 app = APIGatewayRestResolver()
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
-cloudwatch = boto3.client("cloudwatch")
+s3 = lazy_client("s3")
+dynamodb = lazy_resource("dynamodb")
+cloudwatch = lazy_client("cloudwatch")
+metrics = MetricsBuffer(
+    namespace="ClassifyAnomaly", service="ClassifyAnomalyService", cloudwatch=cloudwatch
+)
+tracer = Tracer(metrics)
+model_cache = ModelCache(metrics=metrics)
+drift = DriftMonitor(metrics)
+io_pool = IOPool()
+prediction_writer = PredictionWriter(
+    dynamodb, table_name="model-predictions", metrics=metrics, pool=io_pool
+)
 
 MODEL_REGISTRY_TABLE = os.environ.get("MODEL_REGISTRY_TABLE", "model-registry")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))
+BUNDLE_DIR = os.environ.get("BUNDLE_DIR", "/tmp/bundles")
+PREFETCH_MODELS = os.environ.get("PREFETCH_MODELS", "")
+PREFETCH_CLIENTS = os.environ.get("PREFETCH_CLIENTS", "false").lower() == "true"
+SERIES_STATE_TABLE = os.environ.get("SERIES_STATE_TABLE", "series-state")
 
-
-@dataclass
-class DataPoint:
-    value: float
-    timestamp: str
-
-
-class ToyAnomalyClassifier:
-    def __init__(self, mean: float, std: float, threshold: float):
-        self.mean = mean
-        self.std = std
-        self.threshold = threshold
-
-    def predict(self, data_point: DataPoint) -> bool:
-        return data_point.value > self.threshold
+aliases = AliasResolver(dynamodb, table_name=MODEL_REGISTRY_TABLE, metrics=metrics)
+series_state = SeriesStateStore(dynamodb, table_name=SERIES_STATE_TABLE)
 
 
 def get_model_metadata(model_name: str, model_version: str) -> dict:
@@ -47,9 +66,10 @@ def get_model_metadata(model_name: str, model_version: str) -> dict:
     """
     table = dynamodb.Table(MODEL_REGISTRY_TABLE)
 
-    response = table.get_item(
-        Key={"model_name": model_name, "version": model_version}, ConsistentRead=True
-    )
+    with tracer.stage("metadata"):
+        response = table.get_item(
+            Key={"model_name": model_name, "version": model_version}, ConsistentRead=True
+        )
 
     if "Item" not in response:
         raise ValueError(
@@ -60,76 +80,123 @@ def get_model_metadata(model_name: str, model_version: str) -> dict:
     return response["Item"]
 
 
-@lru_cache(maxsize=1)
-def load_model(model_name: str, model_version: str) -> ToyAnomalyClassifier:
-    """Load the anomaly classifier model from S3 based on metadata from DynamoDB.
+artifact_loader = ArtifactLoader(
+    s3, fetch_metadata=get_model_metadata, metrics=metrics, tracer=tracer
+)
+model_cache.on_evict = artifact_loader.forget
+
+
+def load_model(
+    model_name: str, model_version: str, entity_id: str | None = None
+) -> ToyAnomalyClassifier | RollingAnomalyDetector:
+    """Load the anomaly classifier model, served from the model cache when possible.
 
     Args:
         model_name (str): The name of the model to load.
         model_version (str): The version of the model to load.
+        entity_id (str | None): The entity whose parameters to use when the version is
+            a multi-model bundle.
+    Returns:
+        ToyAnomalyClassifier | RollingAnomalyDetector: The loaded anomaly classifier model.
+    """
+    model = model_cache.get_or_load(
+        model_name, model_version, lambda: fetch_model(model_name, model_version)
+    )
+    if not isinstance(model, ModelBundle):
+        return model
+
+    if entity_id is None:
+        raise ValueError(f"{model_name}@{model_version} is a bundle; entity_id is required")
+    params = model.lookup(entity_id)
+    if params is None:
+        raise ValueError(f"Entity {entity_id} not found in bundle {model_name}@{model_version}")
+    return build_model(model.model_type, params)
+
+
+def resolve_model(
+    model_name: str, model_version: str, entity_id: str | None = None
+) -> tuple[ToyAnomalyClassifier | RollingAnomalyDetector, str]:
+    """Resolves a version alias and loads the model, timing both stages.
+
+    Args:
+        model_name (str): The name of the model to load.
+        model_version (str): The version or alias requested by the caller.
+        entity_id (str | None): The entity whose parameters to use when the version is
+            a multi-model bundle.
     Returns:
-        ToyAnomalyClassifier: The loaded anomaly classifier model.
+        tuple[ToyAnomalyClassifier | RollingAnomalyDetector, str]: The model and the
+            resolved version.
     """
-    metadata = get_model_metadata(model_name, model_version)
-    s3.download_file(metadata["s3_bucket"], metadata["s3_key"], "/tmp/model.json")
+    with tracer.stage("resolve_alias"):
+        model_version = aliases.resolve(model_name, model_version)
+    tracer.tag(model_version=model_version)
+    with tracer.stage("load_model"):
+        model = load_model(model_name=model_name, model_version=model_version, entity_id=entity_id)
+    return model, model_version
+
+
+def fetch_model(
+    model_name: str, model_version: str
+) -> ToyAnomalyClassifier | RollingAnomalyDetector | ModelBundle:
+    """Fetch the anomaly classifier model from S3, revalidating a previously seen artifact.
 
-    with open("/tmp/model.json") as f:
-        classifier_params = json.load(f)
+    Args:
+        model_name (str): The name of the model to fetch.
+        model_version (str): The version of the model to fetch.
+    Returns:
+        ToyAnomalyClassifier | RollingAnomalyDetector | ModelBundle: The fetched model, or a
+            memory-mapped bundle of per-entity models.
+    """
+    if artifact_loader.metadata(model_name, model_version).get("artifact_format") == "bundle":
+        return open_bundle(artifact_loader.load_file(model_name, model_version, BUNDLE_DIR))
 
-    return ToyAnomalyClassifier(
-        mean=classifier_params["mean"],
-        std=classifier_params["std"],
-        threshold=classifier_params["threshold"],
+    classifier_params = artifact_loader.load(model_name, model_version).params
+    return build_model(
+        classifier_params.get("model_type", ToyAnomalyClassifier.__name__), classifier_params
     )
 
 
 def add_metric(metric_name: str, value: int) -> None:
-    """Helper function to add custom CloudWatch metrics."""
-    cloudwatch.put_metric_data(
-        Namespace="ClassifyAnomaly",
-        MetricData=[
-            {
-                "MetricName": metric_name,
-                "Value": value,
-                "Unit": "Count",
-                "Dimensions": [{"Name": "service", "Value": "ClassifyAnomalyService"}],
-            }
-        ],
-    )
+    """Helper function to record custom CloudWatch metrics, emitted once per invocation."""
+    metrics.add_count(metric_name, value)
+
+
+@app.exception_handler(RequestValidationError)
+def handle_invalid_request(e: RequestValidationError):
+    add_metric("InvalidRequest", 1)
+    return Response(status_code=400, content_type="application/json", body={"error": str(e)})
+
+
+@app.exception_handler(UnsupportedMediaType)
+def handle_unsupported_media_type(e: UnsupportedMediaType):
+    add_metric("InvalidRequest", 1)
+    return Response(status_code=415, content_type="application/json", body={"error": str(e)})
 
 
 @app.post("/anomaly")
 def classify_anomaly():
-    payload = app.current_event.json_body
-    try:
-        model_name = payload.get("model_name")
-        model_version = payload.get("model_version")
-        value = payload.get("value")
-        timestamp = payload.get("timestamp")
-    except KeyError as e:
-        add_metric("MissingFieldError", 1)
-        logger.exception(f"Missing required field in payload: {e}")
-        return {"error": f"Missing required field: {str(e)}"}, 400
+    request = decode_point(app.current_event)
+    model_name = request.model_name
 
     try:
-        model = load_model(model_name=model_name, model_version=model_version)
-        data_point = DataPoint(value=value, timestamp=timestamp)
-        is_anomaly = model.predict(data_point)
+        model, model_version = resolve_model(model_name, request.model_version, request.entity_id)
+        data_point = DataPoint(value=request.value, timestamp=request.timestamp)
+        with tracer.stage("predict"):
+            is_anomaly = model.predict(data_point)
+        drift.observe(model_name, model_version, model, request.value)
         add_metric("AnomalyDetected", int(is_anomaly))
         add_metric("TotalPredictions", 1)
 
-        predictions_table = dynamodb.Table("model-predictions")
-        predictions_table.put_item(
-            Item={
+        prediction_writer.add(
+            {
                 "model_name": model_name,
                 "timestamp": datetime.now().isoformat(),
                 "version": model_version,
-                "input": {"value": Decimal(str(value)), "timestamp": timestamp},
+                "entity_id": request.entity_id,
+                "input": {"value": Decimal(str(request.value)), "timestamp": request.timestamp},
                 "output": {"is_anomaly": is_anomaly},
             }
         )
-        add_metric("PredictionPersisted", 1)
-        logger.debug("Prediction persisted to DynamoDB")
         return {
             "is_anomaly": is_anomaly,
             "model_name": model_name,
@@ -141,7 +208,132 @@ def classify_anomaly():
         return {"error": "Internal server error"}, 500
 
 
+@app.post("/anomaly/batch")
+def classify_anomaly_batch():
+    request = decode_batch(app.current_event, MAX_BATCH_SIZE)
+    model_name = request.model_name
+
+    try:
+        model, model_version = resolve_model(model_name, request.model_version, request.entity_id)
+        with tracer.stage("predict"):
+            is_anomaly = model.predict_batch(request.values)
+        drift.observe(model_name, model_version, model, request.values)
+        anomaly_count = int(is_anomaly.sum())
+        add_metric("AnomalyDetected", anomaly_count)
+        add_metric("TotalPredictions", len(request))
+
+        # The writer's sort keys keep points with the same timestamp apart
+        recorded_at = datetime.now().isoformat()
+        for value, timestamp, flag in zip(
+            request.values.tolist(), request.timestamps, is_anomaly.tolist(), strict=True
+        ):
+            prediction_writer.add(
+                {
+                    "model_name": model_name,
+                    "timestamp": recorded_at,
+                    "version": model_version,
+                    "entity_id": request.entity_id,
+                    "input": {"value": Decimal(str(value)), "timestamp": timestamp},
+                    "output": {"is_anomaly": flag},
+                }
+            )
+        return {
+            "predictions": is_anomaly.tolist(),
+            "anomaly_count": anomaly_count,
+            "model_name": model_name,
+            "model_version": model_version,
+        }, 201
+    except Exception as e:
+        logger.exception(f"Error during batch prediction: {str(e)}")
+        add_metric("PredictionError", 1)
+        return {"error": "Internal server error"}, 500
+
+
+@app.post("/anomaly/rolling")
+def classify_anomaly_rolling():
+    """Scores points of one series against its rolling state and folds them in.
+
+    Accepts either `value` (and `timestamp`) or `data_points`, oldest first. The state of
+    `series_id` is restored from, and saved back to, the series state table.
+    """
+    request, single = decode_points(app.current_event, MAX_BATCH_SIZE)
+    model_name = request.model_name
+    series_id = request.series_id
+    if series_id is None:
+        raise RequestValidationError("series_id is required")
+
+    try:
+        model, model_version = resolve_model(model_name, request.model_version)
+        if not isinstance(model, RollingAnomalyDetector):
+            add_metric("InvalidModelType", 1)
+            return {"error": f"{model_name}@{model_version} is not a rolling model"}, 400
+
+        values = request.values.tolist()
+        # Includes the series state read and the conditional write
+        with tracer.stage("predict"):
+            flags, state = series_state.apply(
+                f"{model_name}#{model_version}#{series_id}",
+                lambda state: model.detector.update_batch(state, values),
+                initial=model.initial,
+            )
+        drift.observe(model_name, model_version, model, request.values)
+        anomaly_count = sum(flags)
+        add_metric("AnomalyDetected", anomaly_count)
+        add_metric("TotalPredictions", len(flags))
+
+        recorded_at = datetime.now().isoformat()
+        for value, timestamp, flag in zip(values, request.timestamps, flags, strict=True):
+            prediction_writer.add(
+                {
+                    "model_name": model_name,
+                    "timestamp": recorded_at,
+                    "version": model_version,
+                    "entity_id": series_id,
+                    "input": {"value": Decimal(str(value)), "timestamp": timestamp},
+                    "output": {"is_anomaly": flag},
+                }
+            )
+
+        result = {"is_anomaly": flags[0]} if single else {"predictions": flags}
+        return {
+            **result,
+            "anomaly_count": anomaly_count,
+            "series_id": series_id,
+            "rolling_mean": state.mean,
+            "rolling_std": state.std,
+            "model_name": model_name,
+            "model_version": model_version,
+        }, 201
+    except StateConflict as e:
+        logger.warning(str(e))
+        add_metric("SeriesStateConflict", 1)
+        return {"error": "Series is being updated concurrently, retry"}, 409
+    except Exception as e:
+        logger.exception(f"Error during rolling prediction: {str(e)}")
+        add_metric("PredictionError", 1)
+        return {"error": "Internal server error"}, 500
+
+
+# Opt-in work done during the init phase instead of on the first request
+if PREFETCH_CLIENTS:
+    warm_clients(s3, dynamodb, cloudwatch)
+if failed := model_cache.prefetch(PREFETCH_MODELS, fetch_model):
+    logger.warning(f"Could not prefetch models: {failed}")
+
+
 @logger.inject_lambda_context
 def handler(event, context):
     """AWS Lambda handler for classifying anomalies in time series data."""
-    return app.resolve(event, context)
+    start = time.perf_counter()
+    tracer.begin()
+    try:
+        return app.resolve(event, context)
+    finally:
+        metrics.add_timing("RequestLatency", (time.perf_counter() - start) * 1000)
+        with tracer.stage("persist"):
+            prediction_writer.flush_if_due()
+        tracer.end()
+        # Recorded with the next invocation's metrics
+        with tracer.stage("metrics_flush"):
+            drift.emit_if_due()
+            metrics.flush()
@@ -1,40 +1,45 @@
-import json
 import os
-from dataclasses import dataclass
+import time
 from datetime import datetime
 from decimal import Decimal
 
-import boto3
-from aws_lambda_powertools.event_handler import APIGatewayRestResolver
+from aws_lambda_powertools.event_handler import APIGatewayRestResolver, Response
+from shared.aliases import AliasResolver
+from shared.artifacts import ArtifactLoader
+from shared.clients import lazy_client, lazy_resource, warm_clients
+from shared.decoding import RequestValidationError, UnsupportedMediaType, decode_batch, decode_point
+from shared.drift import DriftMonitor
+from shared.io_pool import IOPool
+from shared.metrics import MetricsBuffer
+from shared.model_cache import ModelCache
+from shared.models import DataPoint, ToyLevelClassifier
+from shared.persistence import PredictionWriter
+from shared.tracing import Tracer
+
+from common.model_bundle import ModelBundle, open_bundle
 
 app = APIGatewayRestResolver()
-classifier_params = None
-s3 = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
+s3 = lazy_client("s3")
+dynamodb = lazy_resource("dynamodb")
+cloudwatch = lazy_client("cloudwatch")
+metrics = MetricsBuffer(
+    namespace="ClassifyLevel", service="ClassifyLevelService", cloudwatch=cloudwatch
+)
+tracer = Tracer(metrics)
+model_cache = ModelCache(metrics=metrics)
+drift = DriftMonitor(metrics)
+io_pool = IOPool()
+prediction_writer = PredictionWriter(
+    dynamodb, table_name="model-predictions", metrics=metrics, pool=io_pool
+)
 
 MODEL_REGISTRY_TABLE = os.environ.get("MODEL_REGISTRY_TABLE", "model-registry")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))
+BUNDLE_DIR = os.environ.get("BUNDLE_DIR", "/tmp/bundles")
+PREFETCH_MODELS = os.environ.get("PREFETCH_MODELS", "")
+PREFETCH_CLIENTS = os.environ.get("PREFETCH_CLIENTS", "false").lower() == "true"
 
-
-@dataclass
-class DataPoint:
-    value: float
-    timestamp: str
-
-
-class ToyLevelClassifier:
-    def __init__(self, baseline_avg: float, std_dev: float):
-        self.baseline_avg = baseline_avg
-        self.std_dev = std_dev
-
-    def predict(self, data_point: DataPoint) -> str:
-        deviation = (data_point.value - self.baseline_avg) / self.std_dev
-
-        if deviation > 1.5:
-            return "high"
-        elif deviation < -1.5:
-            return "low"
-        else:
-            return "normal"
+aliases = AliasResolver(dynamodb, table_name=MODEL_REGISTRY_TABLE, metrics=metrics)
 
 
 def get_model_metadata(model_name: str, model_version: str) -> dict:
@@ -49,9 +54,10 @@ def get_model_metadata(model_name: str, model_version: str) -> dict:
     """
     table = dynamodb.Table(MODEL_REGISTRY_TABLE)
 
-    response = table.get_item(
-        Key={"model_name": model_name, "version": model_version}, ConsistentRead=True
-    )
+    with tracer.stage("metadata"):
+        response = table.get_item(
+            Key={"model_name": model_name, "version": model_version}, ConsistentRead=True
+        )
 
     if "Item" not in response:
         raise ValueError(
@@ -62,61 +68,158 @@ def get_model_metadata(model_name: str, model_version: str) -> dict:
     return response["Item"]
 
 
-def load_model(model_name: str, model_version: str) -> ToyLevelClassifier:
-    """Load the level classifier model from S3 based on metadata from DynamoDB.
+artifact_loader = ArtifactLoader(
+    s3, fetch_metadata=get_model_metadata, metrics=metrics, tracer=tracer
+)
+model_cache.on_evict = artifact_loader.forget
+
+
+def load_model(
+    model_name: str, model_version: str, entity_id: str | None = None
+) -> ToyLevelClassifier:
+    """Load the level classifier model, served from the model cache when possible.
 
     Args:
         model_name (str): The name of the model to load.
         model_version (str): The version of the model to load.
+        entity_id (str | None): The entity whose parameters to use when the version is
+            a multi-model bundle.
 
     Returns:
         ToyLevelClassifier: The loaded level classifier model.
     """
-    global classifier_params
+    model = model_cache.get_or_load(
+        model_name, model_version, lambda: fetch_model(model_name, model_version)
+    )
+    if not isinstance(model, ModelBundle):
+        return model
 
-    if classifier_params is None:
-        metadata = get_model_metadata(model_name, model_version)
-        s3.download_file(metadata["s3_bucket"], metadata["s3_key"], "/tmp/model.json")
+    if entity_id is None:
+        raise ValueError(f"{model_name}@{model_version} is a bundle; entity_id is required")
+    params = model.lookup(entity_id)
+    if params is None:
+        raise ValueError(f"Entity {entity_id} not found in bundle {model_name}@{model_version}")
+    return ToyLevelClassifier.from_params(params)
 
-        with open("/tmp/model.json") as f:
-            classifier_params = json.load(f)
 
-        print(f"Loaded model {model_name}@{model_version} from {metadata['s3_key']}")
+def resolve_model(
+    model_name: str, model_version: str, entity_id: str | None = None
+) -> tuple[ToyLevelClassifier, str]:
+    """Resolves a version alias and loads the model, timing both stages.
 
-    return ToyLevelClassifier(
-        baseline_avg=classifier_params["baseline_avg"], std_dev=classifier_params["std_dev"]
-    )
+    Args:
+        model_name (str): The name of the model to load.
+        model_version (str): The version or alias requested by the caller.
+        entity_id (str | None): The entity whose parameters to use when the version is
+            a multi-model bundle.
+    Returns:
+        tuple[ToyLevelClassifier, str]: The model and the resolved version.
+    """
+    with tracer.stage("resolve_alias"):
+        model_version = aliases.resolve(model_name, model_version)
+    tracer.tag(model_version=model_version)
+    with tracer.stage("load_model"):
+        model = load_model(model_name=model_name, model_version=model_version, entity_id=entity_id)
+    return model, model_version
+
+
+def fetch_model(model_name: str, model_version: str) -> ToyLevelClassifier | ModelBundle:
+    """Fetch the level classifier model from S3, revalidating a previously seen artifact.
+
+    Args:
+        model_name (str): The name of the model to fetch.
+        model_version (str): The version of the model to fetch.
+
+    Returns:
+        ToyLevelClassifier | ModelBundle: The fetched model, or a memory-mapped bundle of
+            per-entity models.
+    """
+    if artifact_loader.metadata(model_name, model_version).get("artifact_format") == "bundle":
+        return open_bundle(artifact_loader.load_file(model_name, model_version, BUNDLE_DIR))
+
+    artifact = artifact_loader.load(model_name, model_version)
+    classifier_params = artifact.params
+
+    print(f"Loaded model {model_name}@{model_version} from {artifact.metadata['s3_key']}")
+
+    return ToyLevelClassifier.from_params(classifier_params)
+
+
+@app.exception_handler(RequestValidationError)
+def handle_invalid_request(e: RequestValidationError):
+    metrics.add_count("InvalidRequest", 1)
+    return Response(status_code=400, content_type="application/json", body={"error": str(e)})
+
+
+@app.exception_handler(UnsupportedMediaType)
+def handle_unsupported_media_type(e: UnsupportedMediaType):
+    metrics.add_count("InvalidRequest", 1)
+    return Response(status_code=415, content_type="application/json", body={"error": str(e)})
 
 
 @app.post("/level")
 def classify_level():
-    payload = app.current_event.json_body
-    try:
-        model_name = payload.get("model_name")
-        model_version = payload.get("model_version")
-        value = payload.get("value")
-        timestamp = payload.get("timestamp")
-    except KeyError as e:
-        KeyError(f"Missing required field in payload: {e}")
-
-    model = load_model(model_name=model_name, model_version=model_version)
-    data_point = DataPoint(value=value, timestamp=timestamp)
-    level = model.predict(data_point)
-
-    predictions_table = dynamodb.Table("model-predictions")
-    predictions_table.put_item(
-        Item={
+    request = decode_point(app.current_event)
+    model_name = request.model_name
+
+    model, model_version = resolve_model(model_name, request.model_version, request.entity_id)
+    data_point = DataPoint(value=request.value, timestamp=request.timestamp)
+    with tracer.stage("predict"):
+        level = model.predict(data_point)
+    drift.observe(model_name, model_version, model, request.value)
+
+    prediction_writer.add(
+        {
             "model_name": model_name,
             "timestamp": datetime.now().isoformat(),
             "version": model_version,
-            "input": {"value": Decimal(str(value)), "timestamp": timestamp},
+            "entity_id": request.entity_id,
+            "input": {"value": Decimal(str(request.value)), "timestamp": request.timestamp},
             "output": {"level": level},
         }
     )
+    metrics.add_count("TotalPredictions", 1)
 
     return {"level": level}
 
 
+@app.post("/level/batch")
+def classify_level_batch():
+    request = decode_batch(app.current_event, MAX_BATCH_SIZE)
+    model_name = request.model_name
+
+    model, model_version = resolve_model(model_name, request.model_version, request.entity_id)
+    with tracer.stage("predict"):
+        levels = model.predict_batch(request.values).tolist()
+    drift.observe(model_name, model_version, model, request.values)
+
+    # The writer's sort keys keep points with the same timestamp apart
+    recorded_at = datetime.now().isoformat()
+    for value, timestamp, level in zip(
+        request.values.tolist(), request.timestamps, levels, strict=True
+    ):
+        prediction_writer.add(
+            {
+                "model_name": model_name,
+                "timestamp": recorded_at,
+                "version": model_version,
+                "entity_id": request.entity_id,
+                "input": {"value": Decimal(str(value)), "timestamp": timestamp},
+                "output": {"level": level},
+            }
+        )
+    metrics.add_count("TotalPredictions", len(levels))
+
+    return {"levels": levels}
+
+
+# Opt-in work done during the init phase instead of on the first request
+if PREFETCH_CLIENTS:
+    warm_clients(s3, dynamodb, cloudwatch)
+if failed := model_cache.prefetch(PREFETCH_MODELS, fetch_model):
+    print(f"Could not prefetch models: {failed}")
+
+
 def handler(event, context):
     """AWS Lambda handler for classifying data point levels.
 
@@ -127,4 +230,16 @@ def handler(event, context):
     Returns:
         dict: The classification result (high/normal/low).
     """
-    return app.resolve(event, context)
+    start = time.perf_counter()
+    tracer.begin()
+    try:
+        return app.resolve(event, context)
+    finally:
+        metrics.add_timing("RequestLatency", (time.perf_counter() - start) * 1000)
+        with tracer.stage("persist"):
+            prediction_writer.flush_if_due()
+        tracer.end()
+        # Recorded with the next invocation's metrics
+        with tracer.stage("metrics_flush"):
+            drift.emit_if_due()
+            metrics.flush()
@@ -0,0 +1,181 @@
+import os
+import time
+from datetime import datetime, timedelta
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.event_handler import APIGatewayRestResolver, Response
+from shared.clients import lazy_client, lazy_resource
+from shared.metrics import MetricsBuffer
+from shared.prediction_query import (
+    BUCKET_PREFIXES,
+    DEFAULT_PAGE_SIZE,
+    MAX_PAGE_SIZE,
+    MAX_SCAN_SEGMENTS,
+    aggregate_shards,
+    query_predictions,
+    scan_predictions,
+    to_plain,
+)
+
+logger = Logger(service="QueryPredictions")
+app = APIGatewayRestResolver()
+dynamodb = lazy_resource("dynamodb")
+cloudwatch = lazy_client("cloudwatch")
+metrics = MetricsBuffer(
+    namespace="QueryPredictions", service="QueryPredictionsService", cloudwatch=cloudwatch
+)
+
+PREDICTIONS_TABLE = os.environ.get("PREDICTIONS_TABLE", "model-predictions")
+DEFAULT_RANGE_MINUTES = int(os.environ.get("DEFAULT_RANGE_MINUTES", "60"))
+# Bounds on one aggregation, so it fits in the function's memory and API Gateway's timeout
+MAX_AGGREGATE_RANGE_MINUTES = int(os.environ.get("MAX_AGGREGATE_RANGE_MINUTES", "1440"))
+MAX_AGGREGATE_ITEMS = int(os.environ.get("MAX_AGGREGATE_ITEMS", "2000000"))
+
+
+class BadRequest(ValueError):
+    """A query parameter is missing or invalid."""
+
+
+def _param(name: str, default: str | None = None) -> str | None:
+    return app.current_event.get_query_string_value(name=name, default_value=default)
+
+
+def _int_param(name: str, default: int, maximum: int) -> int:
+    raw = _param(name)
+    try:
+        value = int(raw) if raw is not None else default
+    except ValueError as e:
+        raise BadRequest(f"{name} must be an integer") from e
+    if not 1 <= value <= maximum:
+        raise BadRequest(f"{name} must be between 1 and {maximum}")
+    return value
+
+
+def _time_range() -> tuple[str, str]:
+    """Reads `start` and `end` (ISO-8601); defaults to the last DEFAULT_RANGE_MINUTES."""
+    end = _param("end") or datetime.now().isoformat()
+    start = _param("start")
+    if start is None:
+        try:
+            start = (
+                datetime.fromisoformat(end) - timedelta(minutes=DEFAULT_RANGE_MINUTES)
+            ).isoformat()
+        except ValueError as e:
+            raise BadRequest("end must be an ISO-8601 timestamp") from e
+    if start > end:
+        raise BadRequest("start must not be after end")
+    return start, end
+
+
+def _model() -> tuple[str, str]:
+    model_name, model_version = _param("model_name"), _param("model_version")
+    if not model_name or not model_version:
+        raise BadRequest("model_name and model_version are required")
+    return model_name, model_version
+
+
+@app.exception_handler(BadRequest)
+def handle_bad_request(e: BadRequest):
+    metrics.add_count("InvalidQuery", 1)
+    return Response(status_code=400, content_type="application/json", body={"error": str(e)})
+
+
+@app.get("/predictions")
+def get_predictions():
+    """Returns one page of a model version's predictions in a time range."""
+    model_name, model_version = _model()
+    start, end = _time_range()
+    limit = _int_param("limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    try:
+        items, next_token = query_predictions(
+            dynamodb,
+            PREDICTIONS_TABLE,
+            model_name=model_name,
+            version=model_version,
+            start=start,
+            end=end,
+            limit=limit,
+            next_token=_param("next_token"),
+            newest_first=_param("order", "asc") == "desc",
+        )
+    except ValueError as e:
+        raise BadRequest(str(e)) from e
+
+    metrics.add_count("PredictionsReturned", len(items))
+    return {"items": items, "count": len(items), "next_token": next_token}
+
+
+@app.get("/predictions/export")
+def export_predictions():
+    """Returns one page of a parallel-segment Scan, for exporting whole tables."""
+    segments = _int_param("segments", 4, MAX_SCAN_SEGMENTS)
+    page_size = _int_param("limit", DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
+    try:
+        items, next_token = scan_predictions(
+            dynamodb,
+            PREDICTIONS_TABLE,
+            segments=segments,
+            model_name=_param("model_name"),
+            version=_param("model_version"),
+            start=_param("start"),
+            end=_param("end"),
+            page_size=page_size,
+            next_token=_param("next_token"),
+        )
+    except ValueError as e:
+        raise BadRequest(str(e)) from e
+
+    metrics.add_count("PredictionsExported", len(items))
+    return {"items": items, "count": len(items), "next_token": next_token}
+
+
+@app.get("/predictions/aggregate")
+def aggregate():
+    """Returns per-bucket prediction counts, anomaly rates and level counts."""
+    model_name, model_version = _model()
+    start, end = _time_range()
+    bucket = _param("bucket", "minute")
+    if bucket not in BUCKET_PREFIXES:
+        raise BadRequest(f"bucket must be one of {sorted(BUCKET_PREFIXES)}")
+    try:
+        span = datetime.fromisoformat(end) - datetime.fromisoformat(start)
+    except (TypeError, ValueError) as e:
+        raise BadRequest("start and end must be comparable ISO-8601 timestamps") from e
+    if span > timedelta(minutes=MAX_AGGREGATE_RANGE_MINUTES):
+        raise BadRequest(f"The range must not exceed {MAX_AGGREGATE_RANGE_MINUTES} minutes")
+
+    try:
+        buckets, scanned = aggregate_shards(
+            dynamodb,
+            PREDICTIONS_TABLE,
+            model_name=model_name,
+            version=model_version,
+            start=start,
+            end=end,
+            bucket=bucket,
+            max_items=MAX_AGGREGATE_ITEMS,
+        )
+    except ValueError as e:
+        raise BadRequest(str(e)) from e
+    buckets = to_plain(buckets)
+    metrics.add_count("PredictionsAggregated", scanned)
+    return {
+        "model_name": model_name,
+        "model_version": model_version,
+        "start": start,
+        "end": end,
+        "bucket": bucket,
+        "count": scanned,
+        "buckets": buckets,
+    }
+
+
+@logger.inject_lambda_context
+def handler(event, context):
+    """AWS Lambda handler for querying, exporting and aggregating stored predictions."""
+    start = time.perf_counter()
+    try:
+        return app.resolve(event, context)
+    finally:
+        metrics.add_timing("RequestLatency", (time.perf_counter() - start) * 1000)
+        metrics.flush()
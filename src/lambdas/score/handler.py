@@ -0,0 +1,274 @@
+import os
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from aws_lambda_powertools import Logger
+from aws_lambda_powertools.event_handler import APIGatewayRestResolver, Response
+from shared.aliases import AliasResolver
+from shared.artifacts import ArtifactLoader
+from shared.clients import lazy_client, lazy_resource, warm_clients
+from shared.decoding import (
+    ModelRef,
+    RequestValidationError,
+    UnsupportedMediaType,
+    decode_score,
+)
+from shared.drift import DriftMonitor
+from shared.io_pool import IOPool
+from shared.metrics import MetricsBuffer
+from shared.model_cache import ModelCache
+from shared.models import Model, build_model
+from shared.persistence import PredictionWriter
+from shared.tracing import Tracer
+
+from common.model_bundle import ModelBundle, open_bundle
+
+logger = Logger(service="Score")
+app = APIGatewayRestResolver()
+s3 = lazy_client("s3")
+dynamodb = lazy_resource("dynamodb")
+cloudwatch = lazy_client("cloudwatch")
+metrics = MetricsBuffer(namespace="Score", service="ScoreService", cloudwatch=cloudwatch)
+tracer = Tracer(metrics)
+model_cache = ModelCache(metrics=metrics)
+drift = DriftMonitor(metrics)
+io_pool = IOPool()
+prediction_writer = PredictionWriter(
+    dynamodb, table_name="model-predictions", metrics=metrics, pool=io_pool
+)
+
+MODEL_REGISTRY_TABLE = os.environ.get("MODEL_REGISTRY_TABLE", "model-registry")
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "1000"))
+MAX_MODELS = int(os.environ.get("MAX_MODELS", "8"))
+BUNDLE_DIR = os.environ.get("BUNDLE_DIR", "/tmp/bundles")
+PREFETCH_MODELS = os.environ.get("PREFETCH_MODELS", "")
+PREFETCH_CLIENTS = os.environ.get("PREFETCH_CLIENTS", "false").lower() == "true"
+# Joins the names and versions of the models scored together into one record key
+GROUP_SEPARATOR = "+"
+
+aliases = AliasResolver(dynamodb, table_name=MODEL_REGISTRY_TABLE, metrics=metrics)
+
+
+def get_model_metadata(model_name: str, model_version: str) -> dict:
+    """Fetch model metadata from DynamoDB registry.
+
+    Models are loaded on pooled threads, so this reads through the resource's
+    thread-safe client.
+
+    Args:
+        model_name (str): The name of the model.
+        model_version (str): The version of the model.
+
+    Returns:
+        dict: The model metadata.
+    """
+    with tracer.stage("metadata"):
+        response = dynamodb.meta.client.get_item(
+            TableName=MODEL_REGISTRY_TABLE,
+            Key={"model_name": model_name, "version": model_version},
+            ConsistentRead=True,
+        )
+
+    if "Item" not in response:
+        raise ValueError(
+            f"Model version not found: {model_name}@{model_version}. "
+            f"Available versions can be queried in DynamoDB table: {MODEL_REGISTRY_TABLE}"
+        )
+
+    return response["Item"]
+
+
+artifact_loader = ArtifactLoader(
+    s3, fetch_metadata=get_model_metadata, metrics=metrics, tracer=tracer
+)
+model_cache.on_evict = artifact_loader.forget
+
+
+def fetch_model(model_name: str, model_version: str) -> Model | ModelBundle:
+    """Fetch any registered model from S3, built by the type recorded for it.
+
+    The type is the artifact's `model_type`, falling back to the registry's.
+
+    Args:
+        model_name (str): The name of the model to fetch.
+        model_version (str): The version of the model to fetch.
+
+    Returns:
+        Model | ModelBundle: The fetched model, or a memory-mapped bundle of per-entity
+            models.
+    """
+    metadata = artifact_loader.metadata(model_name, model_version)
+    if metadata.get("artifact_format") == "bundle":
+        return open_bundle(artifact_loader.load_file(model_name, model_version, BUNDLE_DIR))
+
+    params = artifact_loader.load(model_name, model_version).params
+    return build_model(params.get("model_type") or metadata.get("model_type"), params)
+
+
+def load_model(model_name: str, model_version: str, entity_id: str | None = None) -> Model:
+    """Load a model, served from the model cache when possible.
+
+    Args:
+        model_name (str): The name of the model to load.
+        model_version (str): The version of the model to load.
+        entity_id (str | None): The entity whose parameters to use when the version is
+            a multi-model bundle.
+
+    Returns:
+        Model: The loaded model.
+    """
+    model = model_cache.get_or_load(
+        model_name, model_version, lambda: fetch_model(model_name, model_version)
+    )
+    if not isinstance(model, ModelBundle):
+        return model
+
+    if entity_id is None:
+        raise ValueError(f"{model_name}@{model_version} is a bundle; entity_id is required")
+    params = model.lookup(entity_id)
+    if params is None:
+        raise ValueError(f"Entity {entity_id} not found in bundle {model_name}@{model_version}")
+    return build_model(model.model_type, params)
+
+
+def resolve_models(refs: list[ModelRef], entity_id: str | None = None) -> list[tuple[Model, str]]:
+    """Resolves the version aliases of every requested model and loads them, timing both.
+
+    When a model has to be fetched, each model is resolved and loaded on a pooled thread,
+    so registry reads and artifact downloads of different models overlap. Models that are
+    all cached are resolved inline.
+
+    Args:
+        refs (list[ModelRef]): The requested models.
+        entity_id (str | None): The entity whose parameters to use for bundles.
+
+    Returns:
+        list[tuple[Model, str]]: Each model with its resolved version, in request order.
+    """
+
+    def resolve(ref: ModelRef) -> tuple[Model, str]:
+        with tracer.stage("resolve_alias"):
+            version = aliases.resolve(ref.model_name, ref.model_version)
+        with tracer.stage("load_model"):
+            return load_model(ref.model_name, version, entity_id), version
+
+    versions = [aliases.cached(ref.model_name, ref.model_version) for ref in refs]
+    if all(
+        version is not None and model_cache.cached(ref.model_name, version)
+        for ref, version in zip(refs, versions, strict=True)
+    ):
+        return [resolve(ref) for ref in refs]
+    return io_pool.map(resolve, refs)
+
+
+def scoring_group(names: list[str], versions: list[str]) -> tuple[str, str]:
+    """Returns the `model_name` and `version` under which combined records are stored.
+
+    Models are ordered by name, so the same set of models always shares one key; for
+    example `anomaly_classifier+level_classifier` and `v3+v1`. Those are the values to
+    pass to `/predictions` to read the records back.
+    """
+    order = sorted(range(len(names)), key=names.__getitem__)
+    return (
+        GROUP_SEPARATOR.join(names[i] for i in order),
+        GROUP_SEPARATOR.join(versions[i] for i in order),
+    )
+
+
+@app.exception_handler(RequestValidationError)
+def handle_invalid_request(e: RequestValidationError):
+    metrics.add_count("InvalidRequest", 1)
+    return Response(status_code=400, content_type="application/json", body={"error": str(e)})
+
+
+@app.exception_handler(UnsupportedMediaType)
+def handle_unsupported_media_type(e: UnsupportedMediaType):
+    metrics.add_count("InvalidRequest", 1)
+    return Response(status_code=415, content_type="application/json", body={"error": str(e)})
+
+
+@app.post("/score")
+def score():
+    """Scores one point, or a batch, with every requested model.
+
+    The input is decoded once and each model scores the whole batch in one vectorized
+    call. Each point is stored as one record holding the output of every model.
+    """
+    request = decode_score(app.current_event, MAX_BATCH_SIZE, MAX_MODELS)
+    names = [ref.model_name for ref in request.models]
+
+    try:
+        resolved = resolve_models(request.models, request.entity_id)
+        versions = [version for _, version in resolved]
+        group_name, group_version = scoring_group(names, versions)
+        tracer.tag(model_version=group_version)
+
+        outputs = {}
+        with tracer.stage("predict"):
+            for name, (model, _) in zip(names, resolved, strict=True):
+                outputs[name] = (model.output_name, model.predict_batch(request.values).tolist())
+        for name, (model, version) in zip(names, resolved, strict=True):
+            drift.observe(name, version, model, request.values)
+        metrics.add_count("TotalPredictions", len(request))
+        metrics.add_count("ModelScores", len(request) * len(resolved))
+        anomalies = sum(sum(v) for key, v in outputs.values() if key == "is_anomaly")
+        metrics.add_count("AnomalyDetected", anomalies)
+
+        # The writer's sort keys keep points with the same timestamp apart
+        recorded_at = datetime.now().isoformat()
+        for i, (value, timestamp) in enumerate(
+            zip(request.values.tolist(), request.timestamps, strict=True)
+        ):
+            prediction_writer.add(
+                {
+                    "model_name": group_name,
+                    "timestamp": recorded_at,
+                    "version": group_version,
+                    "entity_id": request.entity_id,
+                    "models": dict(zip(names, versions, strict=True)),
+                    "input": {"value": Decimal(str(value)), "timestamp": timestamp},
+                    "output": {name: {key: v[i]} for name, (key, v) in outputs.items()},
+                }
+            )
+
+        if request.single:
+            results = {
+                name: {"model_version": version, key: v[0]}
+                for (name, (key, v)), version in zip(outputs.items(), versions, strict=True)
+            }
+            return {"results": results}, 201
+        results = {
+            name: {"model_version": version, "predictions": v}
+            for (name, (_, v)), version in zip(outputs.items(), versions, strict=True)
+        }
+        return {"results": results, "count": len(request)}, 201
+    except Exception as e:
+        logger.exception(f"Error during scoring: {str(e)}")
+        metrics.add_count("PredictionError", 1)
+        return {"error": "Internal server error"}, 500
+
+
+# Opt-in work done during the init phase instead of on the first request
+if PREFETCH_CLIENTS:
+    warm_clients(s3, dynamodb, cloudwatch)
+if failed := model_cache.prefetch(PREFETCH_MODELS, fetch_model):
+    logger.warning(f"Could not prefetch models: {failed}")
+
+
+@logger.inject_lambda_context
+def handler(event, context):
+    """AWS Lambda handler scoring data points with several models at once."""
+    start = time.perf_counter()
+    tracer.begin()
+    try:
+        return app.resolve(event, context)
+    finally:
+        metrics.add_timing("RequestLatency", (time.perf_counter() - start) * 1000)
+        with tracer.stage("persist"):
+            prediction_writer.flush_if_due()
+        tracer.end()
+        # Recorded with the next invocation's metrics
+        with tracer.stage("metrics_flush"):
+            drift.emit_if_due()
+            metrics.flush()
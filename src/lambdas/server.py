@@ -0,0 +1,457 @@
+"""Long-lived asyncio HTTP server for the Lambda handlers, for container deployment.
+
+Requests are turned into API Gateway REST proxy events and resolved by the same handler
+modules, routes, model cache, alias resolver and registry logic as on Lambda. What changes
+is the work around each invocation:
+
+- One process serves many connections on one event loop and keeps its model cache warm
+  for all of them.
+- Handlers keep per-invocation state in module globals (the resolver's current event, the
+  tracer), so a handler module resolves one request at a time, either in the loop thread
+  or on a thread of its own. A request runs in the loop thread only when it cannot wait on
+  AWS: every model it names, and the alias naming it, is cached. Requests that miss a
+  cache, routes in `OFFLOADED_PATHS` and handlers in `OFFLOADED`, which call AWS on every
+  request, run on the handler's thread, so they never stall the loop. Handlers in
+  `REPLICAS` have no cache to share and are imported several times instead, so that many
+  of their requests run at once, each on its own thread and copy of the module.
+- Predictions are not written at the end of each request. The writers buffer them and a
+  background task hands every due batch, and every metrics flush, to an I/O thread pool,
+  so persistence never blocks a request.
+- `--workers N` starts N processes. Each one binds the port with SO_REUSEPORT, so the
+  kernel spreads connections across them.
+
+Usage:
+    python src/lambdas/server.py [--host 0.0.0.0] [--port 8080] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import base64
+import importlib.util
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from urllib.parse import parse_qsl, urlsplit
+
+from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
+from shared.decoding import requested_models
+
+logger = logging.getLogger(__name__)
+
+LAMBDAS_DIR = Path(__file__).resolve().parent
+# Holds the `common` package, which the Lambda packages ship at their root
+SRC_DIR = LAMBDAS_DIR.parent
+
+# First path segment -> handler directory under src/lambdas
+ROUTES = {
+    "anomaly": "classify_anomaly",
+    "level": "classify_level",
+    "score": "score",
+    "predictions": "query_predictions",
+}
+# Handlers and routes that call AWS on every request; they are always resolved on the
+# handler's thread
+OFFLOADED = {"query_predictions"}
+OFFLOADED_PATHS = {"/anomaly/rolling"}
+# Handlers imported this many times, each copy resolving requests on a thread of its own
+REPLICAS = {"query_predictions": 4}
+
+# Server-mode defaults, applied before the handlers read them during import. The background
+# flusher writes a writer's buffer once a full batch is pending or its oldest record is this
+# old.
+SERVER_DEFAULTS = {
+    "PREDICTION_BUFFER_MAX_AGE_SECONDS": "0.2",
+}
+
+MAX_HEADER_BYTES = 64 * 1024
+# API Gateway's payload limit
+MAX_BODY_BYTES = 10 * 1024 * 1024
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class Route:
+    """A handler module and the work done around its invocations in server mode.
+
+    Args:
+        name (str): The handler directory under src/lambdas.
+        modules (list[ModuleType]): Independently imported copies of the handler; each
+            resolves one request at a time, so the route resolves up to one per copy.
+    """
+
+    def __init__(self, name: str, modules: list[ModuleType]):
+        self.name = name
+        self.module = module = modules[0]
+        self.modules = modules
+        # Copies not resolving a request right now
+        self._idle: queue.SimpleQueue = queue.SimpleQueue()
+        for copy in modules:
+            self._idle.put(copy)
+        self.context = SimpleNamespace(
+            function_name=name,
+            memory_limit_in_mb=0,
+            invoked_function_arn=f"arn:aws:lambda:local:000000000000:function:{name}",
+            aws_request_id="server",
+            function_version="$LATEST",
+            get_remaining_time_in_millis=lambda: 30_000,
+        )
+        self.executor = ThreadPoolExecutor(max_workers=len(modules), thread_name_prefix=name)
+        # Events submitted to the executor and not yet resolved; only the loop touches it
+        self.offloaded = 0
+        self.aliases = getattr(module, "aliases", None)
+        self.model_cache = getattr(module, "model_cache", None)
+        self.writer = getattr(module, "prediction_writer", None)
+        self.tracer = getattr(module, "tracer", None)
+        self.drift = getattr(module, "drift", None)
+        self.pending_flush: Future | None = None
+        self.pending_metrics: Future | None = None
+
+    def runs_inline(self, event: dict) -> bool:
+        """Whether an event can be resolved in the loop thread without waiting on AWS.
+
+        Besides warm caches, that needs the handler's thread to be idle: a later event
+        must not overtake, or run alongside, one that is still being resolved there.
+        """
+        if (
+            self.offloaded
+            or self.name in OFFLOADED
+            or event["path"] in OFFLOADED_PATHS
+            or self.model_cache is None
+        ):
+            return False
+        try:
+            refs = requested_models(APIGatewayProxyEvent(event))
+        except ValueError:
+            # The handler rejects the request before calling AWS
+            return True
+        for ref in refs:
+            version = self.aliases.cached(ref.model_name, ref.model_version)
+            if version is None or not self.model_cache.cached(ref.model_name, version):
+                return False
+        return True
+
+    def invoke(self, event: dict) -> dict:
+        """Resolves one event, recording what the Lambda handler records except flushes."""
+        start = time.perf_counter()
+        # Never waits: the loop and the executor's threads together run at most one
+        # event per copy
+        module = self._idle.get()
+        tracer = getattr(module, "tracer", None)
+        if tracer is not None:
+            tracer.begin()
+        try:
+            return module.app.resolve(event, self.context)
+        finally:
+            module.metrics.add_timing("RequestLatency", (time.perf_counter() - start) * 1000)
+            if tracer is not None:
+                tracer.end()
+            self._idle.put(module)
+
+    def flush_metrics(self) -> None:
+        if self.drift is not None:
+            self.drift.emit_if_due()
+        for module in self.modules:
+            module.metrics.flush()
+
+
+def load_routes() -> dict[str, Route]:
+    """Imports every routed handler, as the Lambda runtime would, once per process."""
+    for key, value in SERVER_DEFAULTS.items():
+        os.environ.setdefault(key, value)
+    for directory in (SRC_DIR, LAMBDAS_DIR):
+        if str(directory) not in sys.path:
+            sys.path.insert(0, str(directory))
+
+    routes = {}
+    for name in sorted(set(ROUTES.values())):
+        modules = []
+        for _ in range(REPLICAS.get(name, 1)):
+            spec = importlib.util.spec_from_file_location(
+                f"{name}_handler", LAMBDAS_DIR / name / "handler.py"
+            )
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            modules.append(module)
+        routes[name] = Route(name, modules)
+    return {segment: routes[name] for segment, name in ROUTES.items()}
+
+
+class ModelServer:
+    """Serves HTTP/1.1 with keep-alive on one event loop.
+
+    Args:
+        routes (dict[str, Route]): First path segment -> route.
+        flush_interval (float): Seconds between checks for due prediction batches.
+        metrics_interval (float): Seconds between metrics flushes.
+        io_workers (int): Threads for persistence and metrics calls.
+    """
+
+    def __init__(
+        self,
+        routes: dict[str, Route],
+        flush_interval: float = 0.05,
+        metrics_interval: float | None = None,
+        io_workers: int = 4,
+    ):
+        self.routes = routes
+        self.flush_interval = flush_interval
+        self.metrics_interval = (
+            metrics_interval
+            if metrics_interval is not None
+            else float(os.environ.get("METRICS_FLUSH_SECONDS", "10"))
+        )
+        self.io = ThreadPoolExecutor(max_workers=io_workers, thread_name_prefix="io")
+        self._unique_routes = list({id(r): r for r in routes.values()}.values())
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HttpError as e:
+                    self._write(writer, e.status, {"Content-Type": "text/plain"}, str(e).encode())
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                method, target, version, headers, body = request
+
+                url = urlsplit(target)
+                route = self.routes.get(url.path.strip("/").split("/")[0])
+                if route is None:
+                    status, response_headers, data = (
+                        404,
+                        {"Content-Type": "application/json"},
+                        b'{"message":"Not found"}',
+                    )
+                else:
+                    event = _api_event(method, url.path, url.query, headers, body)
+                    try:
+                        if route.runs_inline(event):
+                            response = route.invoke(event)
+                        else:
+                            route.offloaded += 1
+                            try:
+                                response = await loop.run_in_executor(
+                                    route.executor, route.invoke, event
+                                )
+                            finally:
+                                route.offloaded -= 1
+                        status, response_headers, data = _unpack(response)
+                    except Exception:
+                        # Where Lambda would answer 502 for an unhandled error
+                        logger.exception(f"Unhandled error in {route.name}")
+                        status, response_headers, data = (
+                            500,
+                            {"Content-Type": "application/json"},
+                            b'{"message":"Internal server error"}',
+                        )
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection") != "close"
+                if not keep_alive:
+                    response_headers["Connection"] = "close"
+                self._write(writer, status, response_headers, data)
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception:
+            logger.exception("Unexpected error while serving a connection")
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> tuple | None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise HttpError(400, "Incomplete request") from e
+            return None
+        except asyncio.LimitOverrunError as e:
+            raise HttpError(431, "Request headers too large") from e
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ", 2)
+        except ValueError as e:
+            raise HttpError(400, "Malformed request line") from e
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+        if "chunked" in headers.get("transfer-encoding", ""):
+            raise HttpError(411, "Chunked bodies are not supported; send Content-Length")
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise HttpError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, target, version, headers, body
+
+    @staticmethod
+    def _write(writer: asyncio.StreamWriter, status: int, headers: dict, data: bytes) -> None:
+        lines = [f"HTTP/1.1 {status} {_reason(status)}"]
+        lines += [f"{key}: {value}" for key, value in headers.items()]
+        lines.append(f"Content-Length: {len(data)}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + data)
+
+    async def flush_forever(self) -> None:
+        """Hands due prediction batches and periodic metrics flushes to the I/O pool."""
+        next_metrics = time.monotonic() + self.metrics_interval
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            for route in self._unique_routes:
+                in_flight = route.pending_flush is not None and not route.pending_flush.done()
+                if route.writer is not None and not in_flight and route.writer.due():
+                    route.pending_flush = self.io.submit(route.writer.flush)
+            if time.monotonic() >= next_metrics:
+                next_metrics += self.metrics_interval
+                for route in self._unique_routes:
+                    # A flush still running when the next one is due absorbs it
+                    if route.pending_metrics is None or route.pending_metrics.done():
+                        route.pending_metrics = self.io.submit(route.flush_metrics)
+
+    def flush_all(self) -> None:
+        """Writes everything still buffered; called once the server stopped accepting."""
+        for route in self._unique_routes:
+            if route.writer is not None:
+                route.writer.flush()
+            route.flush_metrics()
+
+
+async def serve(host: str, port: int, reuse_port: bool = False) -> None:
+    """Serves until SIGTERM or SIGINT, then drains connections and buffered writes."""
+    server_state = ModelServer(load_routes())
+    server = await asyncio.start_server(
+        server_state.handle_connection,
+        host,
+        port,
+        limit=MAX_HEADER_BYTES,
+        reuse_port=reuse_port,
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    flusher = asyncio.create_task(server_state.flush_forever())
+    logger.info(f"Worker {os.getpid()} serving on http://{host}:{port}")
+    await stop.wait()
+
+    server.close()
+    server.close_clients()
+    await server.wait_closed()
+    flusher.cancel()
+    await loop.run_in_executor(server_state.io, server_state.flush_all)
+    server_state.io.shutdown()
+
+
+def _worker(host: str, port: int, reuse_port: bool, setup: Callable[[], None] | None) -> None:
+    if setup is not None:
+        setup()
+    asyncio.run(serve(host, port, reuse_port))
+
+
+def run(
+    host: str = "0.0.0.0",
+    port: int = 8080,
+    workers: int = 1,
+    setup: Callable[[], None] | None = None,
+) -> None:
+    """Runs `workers` server processes sharing one port.
+
+    Args:
+        host (str): Address to bind.
+        port (int): Port to bind.
+        workers (int): Number of processes; each has its own loop, model cache and buffers.
+        setup (Callable[[], None] | None): Called in each worker before the handlers are
+            imported, e.g. to install AWS stand-ins.
+    """
+    if workers <= 1:
+        _worker(host, port, False, setup)
+        return
+
+    processes = [
+        multiprocessing.Process(target=_worker, args=(host, port, True, setup), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+    for process in processes:
+        process.join()
+
+
+def _api_event(method: str, path: str, query: str, headers: dict, body: bytes) -> dict:
+    try:
+        text, is_base64 = body.decode(), False
+    except UnicodeDecodeError:
+        text, is_base64 = base64.b64encode(body).decode(), True
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": method,
+        "headers": headers,
+        "multiValueHeaders": {},
+        "queryStringParameters": dict(parse_qsl(query)) or None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {"resourcePath": path, "httpMethod": method, "path": path},
+        "body": text or None,
+        "isBase64Encoded": is_base64,
+    }
+
+
+def _unpack(response: dict) -> tuple[int, dict, bytes]:
+    headers = dict(response.get("headers") or {})
+    for key, values in (response.get("multiValueHeaders") or {}).items():
+        headers.setdefault(key, ", ".join(values))
+    payload = response.get("body") or ""
+    data = base64.b64decode(payload) if response.get("isBase64Encoded") else payload.encode()
+    return response["statusCode"], headers, data
+
+
+def _reason(status: int) -> str:
+    try:
+        return HTTPStatus(status).phrase
+    except ValueError:
+        return ""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the model handlers over HTTP")
+    parser.add_argument("--host", default=os.environ.get("SERVER_HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("SERVER_PORT", "8080")))
+    parser.add_argument(
+        "--workers", type=int, default=int(os.environ.get("SERVER_WORKERS", os.cpu_count() or 1))
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    run(args.host, args.port, args.workers)
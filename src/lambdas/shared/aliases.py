@@ -0,0 +1,170 @@
+"""Resolution of model version aliases such as "latest" or "production".
+
+Aliases live in the model registry next to the versions they point to, as items with
+`version = "alias#<name>"` and a `target_version`. "latest" needs no item: it is the
+version with the newest `trained_at`, read with a descending Query on the registry's
+`trained_at-index` global secondary index.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+LATEST = "latest"
+ALIAS_PREFIX = "alias#"
+TRAINED_AT_INDEX = "trained_at-index"
+# Versions named like this are never aliases and are used as-is, without a registry read
+EXPLICIT_VERSION = re.compile(r"^v\d+$")
+
+
+def alias_item_version(alias: str) -> str:
+    """Returns the registry sort key under which an alias is stored."""
+    return f"{ALIAS_PREFIX}{alias}"
+
+
+class AliasResolver:
+    """Resolves aliases to versions with an in-process, stale-while-revalidate cache.
+
+    A mapping younger than `ttl_seconds` is served from memory. An older one is still
+    served, while a background thread re-reads it from the registry, so a request only
+    waits for DynamoDB the first time it sees an alias. Names that are neither "latest"
+    nor a stored alias resolve to themselves, so versions not matching `EXPLICIT_VERSION`
+    keep working, at the cost of one cached registry read.
+
+    Since any name a caller sends is cached, the cache keeps at most `capacity`
+    (ALIAS_CACHE_SIZE, default 1024) mappings and drops the least recently used one.
+    """
+
+    def __init__(
+        self,
+        dynamodb,
+        table_name: str,
+        ttl_seconds: float | None = None,
+        metrics=None,
+        capacity: int | None = None,
+    ):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.environ.get("ALIAS_TTL_SECONDS", "60"))
+        )
+        self.capacity = capacity or int(os.environ.get("ALIAS_CACHE_SIZE", "1024"))
+        self.metrics = metrics
+        self._entries: OrderedDict[tuple[str, str], tuple[str, float]] = OrderedDict()
+        self._refreshing: set[tuple[str, str]] = set()
+        self._lock = threading.Lock()
+
+    def resolve(self, model_name: str, version: str) -> str:
+        """Returns the version that `version` currently refers to.
+
+        Args:
+            model_name (str): The name of the model.
+            version (str): An explicit version or an alias.
+
+        Returns:
+            str: The explicit version.
+        """
+        if not model_name or not version or EXPLICIT_VERSION.match(version):
+            return version
+
+        key = (model_name, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self._record("AliasCacheMiss")
+            return self._refresh(key)
+
+        target, fetched_at = entry
+        if time.monotonic() - fetched_at >= self.ttl_seconds:
+            with self._lock:
+                start = key not in self._refreshing
+                self._refreshing.add(key)
+            if start:
+                self._record("AliasRevalidation")
+                threading.Thread(target=self._refresh_quietly, args=(key,), daemon=True).start()
+        else:
+            self._record("AliasCacheHit")
+        return target
+
+    def cached(self, model_name: str, version: str) -> str | None:
+        """Returns what `resolve` would return if that needs no registry read, else None."""
+        if not model_name or not version or EXPLICIT_VERSION.match(version):
+            return version
+        entry = self._entries.get((model_name, version))
+        return entry[0] if entry is not None else None
+
+    def _refresh(self, key: tuple[str, str]) -> str:
+        target = self.lookup(*key)
+        with self._lock:
+            previous = self._entries.get(key)
+            self._entries[key] = (target, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        if previous is not None and previous[0] != target:
+            logger.info(f"{key[0]}@{key[1]} now resolves to {target} (was {previous[0]})")
+        return target
+
+    def _refresh_quietly(self, key: tuple[str, str]) -> None:
+        try:
+            self._refresh(key)
+        except Exception:
+            # Keep serving the stale mapping; the next request past the TTL retries
+            logger.exception(f"Could not revalidate alias {key[0]}@{key[1]}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def lookup(self, model_name: str, alias: str) -> str:
+        """Reads the current target of an alias from the registry, bypassing the cache.
+
+        Args:
+            model_name (str): The name of the model.
+            alias (str): "latest", a stored alias, or a version.
+
+        Returns:
+            str: The explicit version.
+
+        Raises:
+            ValueError: If "latest" is requested for a model without versions.
+        """
+        client = self.dynamodb.meta.client
+        if alias == LATEST:
+            response = client.query(
+                TableName=self.table_name,
+                IndexName=TRAINED_AT_INDEX,
+                KeyConditionExpression="model_name = :model",
+                ExpressionAttributeValues={":model": model_name},
+                ProjectionExpression="#version",
+                ExpressionAttributeNames={"#version": "version"},
+                ScanIndexForward=False,
+                Limit=1,
+            )
+            if not response.get("Items"):
+                raise ValueError(f"No versions registered for {model_name}")
+            return response["Items"][0]["version"]
+
+        response = client.get_item(
+            TableName=self.table_name,
+            Key={"model_name": model_name, "version": alias_item_version(alias)},
+        )
+        item = response.get("Item")
+        return item["target_version"] if item else alias
+
+    def forget(self) -> None:
+        """Drops every cached mapping."""
+        with self._lock:
+            self._entries.clear()
+
+    def _record(self, name: str) -> None:
+        if self.metrics is not None:
+            self.metrics.add_count(name, 1)
@@ -0,0 +1,164 @@
+import contextlib
+import json
+import os
+import tempfile
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A model artifact held in memory with the registry item it was resolved from."""
+
+    params: dict
+    etag: str
+    metadata: dict
+
+
+def _error_code(error: Exception) -> str | None:
+    return getattr(error, "response", {}).get("Error", {}).get("Code")
+
+
+class ArtifactLoader:
+    """Loads model artifacts straight into memory with `get_object`.
+
+    The registry metadata and ETag of every artifact are remembered, so loading the same
+    (model_name, version) again skips the registry read and sends a conditional request
+    (If-None-Match); an unchanged object is answered with 304 and is not re-downloaded.
+    They are kept until `forget`, which the handlers call when the model cache drops a
+    version, so the loader holds no more versions than the cache does.
+
+    Handlers load a version again only when its model cache entry expires, so an artifact
+    is revalidated once per MODEL_CACHE_TTL_SECONDS; with a TTL of 0 it never is.
+    """
+
+    def __init__(self, s3, fetch_metadata: Callable[[str, str], dict], metrics=None, tracer=None):
+        self.s3 = s3
+        self.fetch_metadata = fetch_metadata
+        self.metrics = metrics
+        self.tracer = tracer
+        self._artifacts: dict[tuple[str, str], Artifact] = {}
+        self._metadata: dict[tuple[str, str], dict] = {}
+        self._files: dict[tuple[str, str], tuple[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def metadata(self, model_name: str, version: str) -> dict:
+        """Returns the registry item of a model version, read once and then remembered.
+
+        Args:
+            model_name (str): The name of the model.
+            version (str): The version of the model.
+
+        Returns:
+            dict: The registry item.
+        """
+        key = (model_name, version)
+        if key not in self._metadata:
+            metadata = self.fetch_metadata(model_name, version)
+            with self._lock:
+                self._metadata[key] = metadata
+        return self._metadata[key]
+
+    def load(self, model_name: str, version: str) -> Artifact:
+        """Returns the artifact for a model version, revalidating a previously loaded copy.
+
+        Args:
+            model_name (str): The name of the model.
+            version (str): The version of the model.
+
+        Returns:
+            Artifact: The parsed artifact, its ETag and its registry metadata.
+        """
+        key = (model_name, version)
+        known = self._artifacts.get(key)
+        metadata = self.metadata(model_name, version)
+
+        request = {"Bucket": metadata["s3_bucket"], "Key": metadata["s3_key"]}
+        if known:
+            request["IfNoneMatch"] = known.etag
+
+        with self._stage("artifact_download"):
+            try:
+                response = self.s3.get_object(**request)
+            except Exception as e:
+                if known and _error_code(e) in ("304", "NotModified"):
+                    self._record("ArtifactNotModified")
+                    return known
+                raise
+            body = response["Body"].read()
+
+        artifact = Artifact(
+            params=json.loads(body),
+            etag=response["ETag"],
+            metadata=metadata,
+        )
+        with self._lock:
+            self._artifacts[key] = artifact
+        self._record("ArtifactDownloaded")
+        return artifact
+
+    def load_file(self, model_name: str, version: str, directory: str) -> str:
+        """Downloads a binary artifact to a file unique to the model version.
+
+        Used for artifacts that are memory-mapped rather than parsed. The object is
+        streamed to a temporary file and renamed into place, so readers never observe a
+        partial file; a file that is still current (304) is reused as-is.
+
+        Args:
+            model_name (str): The name of the model.
+            version (str): The version of the model.
+            directory (str): Local directory for downloaded artifacts.
+
+        Returns:
+            str: Path of the local copy.
+        """
+        key = (model_name, version)
+        metadata = self.metadata(model_name, version)
+        path = os.path.join(directory, f"{model_name}@{version}")
+        request = {"Bucket": metadata["s3_bucket"], "Key": metadata["s3_key"]}
+        known = self._files.get(key)
+        if known and os.path.exists(known[0]):
+            request["IfNoneMatch"] = known[1]
+
+        with self._stage("artifact_download"):
+            try:
+                response = self.s3.get_object(**request)
+            except Exception as e:
+                if "IfNoneMatch" in request and _error_code(e) in ("304", "NotModified"):
+                    self._record("ArtifactNotModified")
+                    return known[0]
+                raise
+
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory)
+            with os.fdopen(fd, "wb") as f:
+                for chunk in response["Body"].iter_chunks(1 << 20):
+                    f.write(chunk)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            self._files[key] = (path, response["ETag"])
+        self._record("ArtifactDownloaded")
+        return path
+
+    def forget(self, model_name: str, version: str) -> None:
+        """Drops everything remembered so the next load starts from the registry.
+
+        A downloaded file is deleted as well. Open memory maps of it stay valid; its space
+        is freed once they are closed.
+        """
+        with self._lock:
+            self._artifacts.pop((model_name, version), None)
+            self._metadata.pop((model_name, version), None)
+            known = self._files.pop((model_name, version), None)
+        if known is not None:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(known[0])
+
+    def _stage(self, name: str):
+        return self.tracer.stage(name) if self.tracer is not None else contextlib.nullcontext()
+
+    def _record(self, name: str) -> None:
+        if self.metrics is not None:
+            self.metrics.add_count(name, 1)
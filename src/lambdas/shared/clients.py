@@ -0,0 +1,72 @@
+import threading
+from collections.abc import Callable
+from typing import Any
+
+
+def _boto3_factory(service: str, kind: str) -> Any:
+    # Imported here so that importing a handler does not pay for the AWS SDK
+    import boto3
+
+    return boto3.client(service) if kind == "client" else boto3.resource(service)
+
+
+_factory: Callable[[str, str], Any] = _boto3_factory
+
+
+def set_client_factory(factory: Callable[[str, str], Any] | None) -> None:
+    """Replaces how lazy clients are built, e.g. with local stand-ins for benchmarks.
+
+    Must be called before the first client is used. Passing None restores boto3.
+
+    Args:
+        factory (Callable[[str, str], Any] | None): Called with (service, "client" or
+            "resource") and returns the object to use.
+    """
+    global _factory
+    _factory = factory or _boto3_factory
+
+
+class LazyClient:
+    """Stands in for a boto3 client or resource and builds it on first attribute access.
+
+    Handlers create these at import time for free; only the clients a request actually
+    touches are ever constructed.
+    """
+
+    def __init__(self, service: str, kind: str = "client"):
+        self._service = service
+        self._kind = kind
+        self._target = None
+        self._lock = threading.Lock()
+
+    @property
+    def created(self) -> bool:
+        """Whether the underlying client has been built."""
+        return self._target is not None
+
+    def resolve(self) -> Any:
+        """Builds the underlying client if needed and returns it."""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = _factory(self._service, self._kind)
+        return self._target
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
+
+
+def warm_clients(*clients: LazyClient) -> None:
+    """Builds the given clients now, e.g. during the Lambda init phase."""
+    for client in clients:
+        client.resolve()
+
+
+def lazy_client(service: str) -> LazyClient:
+    """Returns a lazily built `boto3.client(service)`."""
+    return LazyClient(service, "client")
+
+
+def lazy_resource(service: str) -> LazyClient:
+    """Returns a lazily built `boto3.resource(service)`."""
+    return LazyClient(service, "resource")
@@ -0,0 +1,423 @@
+"""Validated decoding of classification requests into typed structures.
+
+Three encodings are accepted, chosen by the Content-Type header:
+
+- `application/json` (default): `{"model_name", "model_version", "value", "timestamp"}` for
+  one point, or `{"model_name", "model_version", "data_points": [{"value", "timestamp"}]}`
+  for a batch. `entity_id` and `series_id` are optional.
+- `application/msgpack`: the same documents in MessagePack, if the `msgpack` package is
+  installed (otherwise 415).
+- `application/octet-stream`: a batch of little-endian float64 values packed back to back,
+  with `model_name`, `model_version`, `entity_id` and `series_id` in the query string.
+  This is the cheapest encoding for high-volume producers: the values are used in place,
+  with no per-point parsing.
+
+`/score` requests name several models instead of one; see `decode_score`.
+
+Every field is checked before the handler does any work, and all problems are reported as
+`RequestValidationError` (400) or `UnsupportedMediaType` (415).
+"""
+
+import base64
+import binascii
+import json
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from shared.aliases import ALIAS_PREFIX
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+JSON = "application/json"
+MSGPACK = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+PACKED_FLOAT64 = "application/octet-stream"
+# Event key under which `requested_models` keeps the parsed body for the decoders
+_DOCUMENT = "decodedDocument"
+
+
+class RequestValidationError(ValueError):
+    """The request body is malformed or a field is missing or invalid."""
+
+
+class UnsupportedMediaType(ValueError):
+    """The request uses an encoding this deployment cannot decode."""
+
+
+@dataclass(slots=True)
+class PointRequest:
+    model_name: str
+    model_version: str
+    value: float
+    timestamp: str | None = None
+    entity_id: str | None = None
+    series_id: str | None = None
+
+
+@dataclass(slots=True)
+class BatchRequest:
+    model_name: str
+    model_version: str
+    values: np.ndarray
+    timestamps: list[str | None]
+    entity_id: str | None = None
+    series_id: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+@dataclass(slots=True)
+class ModelRef:
+    model_name: str
+    model_version: str
+
+
+@dataclass(slots=True)
+class ScoreRequest:
+    """Points to score with every model in `models`; `single` if sent as one point."""
+
+    models: list[ModelRef]
+    values: np.ndarray
+    timestamps: list[str | None]
+    single: bool
+    entity_id: str | None = None
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+def _media_type(event) -> str:
+    content_type = event.headers.get("Content-Type") or JSON
+    return content_type.split(";", 1)[0].strip().lower()
+
+
+def _raw_body(event) -> bytes:
+    body = event.get("body") or ""
+    if event.get("isBase64Encoded"):
+        try:
+            return base64.b64decode(body)
+        except binascii.Error as e:
+            raise RequestValidationError("Body is not valid base64") from e
+    return body.encode() if isinstance(body, str) else body
+
+
+def _document(event, media_type: str) -> dict:
+    if (document := event.get(_DOCUMENT)) is not None:
+        return document
+    if media_type in MSGPACK and msgpack is None:
+        raise UnsupportedMediaType("MessagePack is not supported by this deployment")
+    body = _raw_body(event)
+    if not body:
+        raise RequestValidationError("Request body is empty")
+    try:
+        document = msgpack.unpackb(body) if media_type in MSGPACK else json.loads(body)
+    except (ValueError, TypeError) as e:
+        raise RequestValidationError(f"Body is not valid {media_type}") from e
+    if not isinstance(document, dict):
+        raise RequestValidationError("Body must be an object")
+    return document
+
+
+def _name(
+    document: dict, field: str, required: bool = True, field_path: str | None = None
+) -> str | None:
+    value = document.get(field)
+    if value is None and not required:
+        return None
+    if not isinstance(value, str) or not value:
+        raise RequestValidationError(f"{field_path or field} must be a non-empty string")
+    return value
+
+
+def _version(document: dict, field_path: str | None = None) -> str:
+    version = _name(document, "model_version", field_path=field_path)
+    # Registry items under this prefix hold alias mappings, not model versions
+    if version.startswith(ALIAS_PREFIX):
+        raise RequestValidationError(
+            f"{field_path or 'model_version'} must not start with {ALIAS_PREFIX!r}"
+        )
+    return version
+
+
+def _number(value, field: str) -> float:
+    # bool is an int subclass, but true/false are not measurements
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        raise RequestValidationError(f"{field} must be a number")
+    try:
+        value = float(value)
+    except OverflowError as e:
+        # An integer beyond the float64 range
+        raise RequestValidationError(f"{field} must be finite") from e
+    if not math.isfinite(value):
+        raise RequestValidationError(f"{field} must be finite")
+    return value
+
+
+def _timestamp(value, field: str) -> str | None:
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, int | float) and not isinstance(value, bool):
+        return str(value)
+    raise RequestValidationError(f"{field} must be a string or a number")
+
+
+def decode_point(event) -> PointRequest:
+    """Decodes a single-point classification request.
+
+    Args:
+        event: The API Gateway proxy event (`app.current_event`).
+
+    Returns:
+        PointRequest: The validated request.
+
+    Raises:
+        RequestValidationError: If the body or a field is invalid.
+        UnsupportedMediaType: If the encoding is not supported.
+    """
+    media_type = _media_type(event)
+    if media_type == PACKED_FLOAT64:
+        raise UnsupportedMediaType("Packed float64 bodies are only accepted by batch routes")
+    return _point(_document(event, media_type))
+
+
+def decode_batch(event, max_points: int) -> BatchRequest:
+    """Decodes a batch classification request in any supported encoding.
+
+    Args:
+        event: The API Gateway proxy event (`app.current_event`).
+        max_points (int): Largest accepted number of points.
+
+    Returns:
+        BatchRequest: The validated request; `values` is a float64 array.
+
+    Raises:
+        RequestValidationError: If the body or a field is invalid.
+        UnsupportedMediaType: If the encoding is not supported.
+    """
+    media_type = _media_type(event)
+    if media_type == PACKED_FLOAT64:
+        return _packed_batch(event, max_points)
+    return _batch(_document(event, media_type), max_points)
+
+
+def decode_points(event, max_points: int) -> tuple[BatchRequest, bool]:
+    """Decodes a request that carries either one point or a batch.
+
+    Args:
+        event: The API Gateway proxy event (`app.current_event`).
+        max_points (int): Largest accepted number of points.
+
+    Returns:
+        tuple[BatchRequest, bool]: The points as a batch, and whether the request was a
+            single point.
+
+    Raises:
+        RequestValidationError: If the body or a field is invalid.
+        UnsupportedMediaType: If the encoding is not supported.
+    """
+    media_type = _media_type(event)
+    if media_type == PACKED_FLOAT64:
+        return _packed_batch(event, max_points), False
+
+    document = _document(event, media_type)
+    if "data_points" in document:
+        return _batch(document, max_points), False
+    point = _point(document)
+    batch = BatchRequest(
+        model_name=point.model_name,
+        model_version=point.model_version,
+        values=np.array([point.value]),
+        timestamps=[point.timestamp],
+        entity_id=point.entity_id,
+        series_id=point.series_id,
+    )
+    return batch, True
+
+
+def decode_score(event, max_points: int, max_models: int) -> ScoreRequest:
+    """Decodes a request to score one point or a batch with several models.
+
+    JSON and MessagePack documents name the models as
+    `"models": [{"model_name", "model_version"}, ...]` next to either `value` or
+    `data_points`. Packed float64 bodies name them in the `models` query parameter, as
+    comma-separated `<model_name>@<model_version>` pairs.
+
+    Args:
+        event: The API Gateway proxy event (`app.current_event`).
+        max_points (int): Largest accepted number of points.
+        max_models (int): Largest accepted number of models.
+
+    Returns:
+        ScoreRequest: The validated request.
+
+    Raises:
+        RequestValidationError: If the body or a field is invalid.
+        UnsupportedMediaType: If the encoding is not supported.
+    """
+    media_type = _media_type(event)
+    if media_type == PACKED_FLOAT64:
+        query = event.get("queryStringParameters") or {}
+        refs = [ref.partition("@") for ref in (query.get("models") or "").split(",") if ref]
+        models = [{"model_name": name, "model_version": version} for name, _, version in refs]
+        values = _packed_values(event, max_points)
+        return ScoreRequest(
+            models=_model_refs(models, max_models),
+            values=values,
+            timestamps=[None] * len(values),
+            single=False,
+            entity_id=_name(query, "entity_id", required=False),
+        )
+
+    document = _document(event, media_type)
+    single = "data_points" not in document
+    if single:
+        values = np.array([_number(document.get("value"), "value")])
+        timestamps = [_timestamp(document.get("timestamp"), "timestamp")]
+    else:
+        values, timestamps = _points(document, max_points)
+    return ScoreRequest(
+        models=_model_refs(document.get("models"), max_models),
+        values=values,
+        timestamps=timestamps,
+        single=single,
+        entity_id=_name(document, "entity_id", required=False),
+    )
+
+
+def requested_models(event) -> list[ModelRef]:
+    """Names the models a request asks for, without decoding its points.
+
+    Works for every route: `models` of a `/score` request, otherwise `model_name` and
+    `model_version`. The parsed body is kept on the event, so decoding the request
+    afterwards does not parse it again.
+
+    Args:
+        event: The API Gateway proxy event.
+
+    Returns:
+        list[ModelRef]: The requested models, with versions as requested (maybe aliases).
+
+    Raises:
+        RequestValidationError: If the body or a model reference is invalid.
+        UnsupportedMediaType: If the encoding is not supported.
+    """
+    media_type = _media_type(event)
+    if media_type == PACKED_FLOAT64:
+        document = event.get("queryStringParameters") or {}
+        if "models" in document:
+            refs = [ref.partition("@") for ref in document["models"].split(",") if ref]
+            document = {"models": [{"model_name": n, "model_version": v} for n, _, v in refs]}
+    else:
+        document = _document(event, media_type)
+        event.raw_event[_DOCUMENT] = document
+
+    if "models" not in document:
+        return [
+            ModelRef(
+                model_name=_name(document, "model_name"),
+                model_version=_version(document),
+            )
+        ]
+    models = document["models"]
+    return _model_refs(models, len(models) if isinstance(models, list) else 0)
+
+
+def _model_refs(models, max_models: int) -> list[ModelRef]:
+    if not isinstance(models, list) or not 0 < len(models) <= max_models:
+        raise RequestValidationError(f"models must be a list of 1 to {max_models} models")
+    refs = []
+    for i, model in enumerate(models):
+        if not isinstance(model, dict):
+            raise RequestValidationError(f"models[{i}] must be an object")
+        refs.append(
+            ModelRef(
+                model_name=_name(model, "model_name", field_path=f"models[{i}].model_name"),
+                model_version=_version(model, field_path=f"models[{i}].model_version"),
+            )
+        )
+    names = [ref.model_name for ref in refs]
+    if len(set(names)) != len(names):
+        raise RequestValidationError("each model may only be requested once")
+    return refs
+
+
+def _point(document: dict) -> PointRequest:
+    return PointRequest(
+        model_name=_name(document, "model_name"),
+        model_version=_version(document),
+        value=_number(document.get("value"), "value"),
+        timestamp=_timestamp(document.get("timestamp"), "timestamp"),
+        entity_id=_name(document, "entity_id", required=False),
+        series_id=_name(document, "series_id", required=False),
+    )
+
+
+def _batch(document: dict, max_points: int) -> BatchRequest:
+    values, timestamps = _points(document, max_points)
+    return BatchRequest(
+        model_name=_name(document, "model_name"),
+        model_version=_version(document),
+        values=values,
+        timestamps=timestamps,
+        entity_id=_name(document, "entity_id", required=False),
+        series_id=_name(document, "series_id", required=False),
+    )
+
+
+def _points(document: dict, max_points: int) -> tuple[np.ndarray, list[str | None]]:
+    points = document.get("data_points")
+    if not isinstance(points, list) or not 0 < len(points) <= max_points:
+        raise RequestValidationError(f"data_points must be a list of 1 to {max_points} points")
+    try:
+        raw_values = [point["value"] for point in points]
+        timestamps = [point.get("timestamp") for point in points]
+    except (TypeError, KeyError, AttributeError) as e:
+        raise RequestValidationError("every data point must be an object with a value") from e
+
+    for i, timestamp in enumerate(timestamps):
+        if timestamp is not None and not isinstance(timestamp, str):
+            timestamps[i] = _timestamp(timestamp, f"data_points[{i}].timestamp")
+    return _values(raw_values), timestamps
+
+
+def _values(raw_values: list) -> np.ndarray:
+    # Exact type checks: np.array would also accept booleans and numeric strings
+    if not all(type(value) is float or type(value) is int for value in raw_values):
+        raise RequestValidationError("every data point value must be a number")
+    try:
+        values = np.array(raw_values, dtype=np.float64)
+    except OverflowError as e:
+        raise RequestValidationError("every data point value must be finite") from e
+    if not np.isfinite(values).all():
+        raise RequestValidationError("every data point value must be finite")
+    return values
+
+
+def _packed_values(event, max_points: int) -> np.ndarray:
+    body = _raw_body(event)
+    if not body or len(body) % 8:
+        raise RequestValidationError("Packed body must be a non-empty sequence of float64 values")
+    values = np.frombuffer(body, dtype="<f8")
+    if len(values) > max_points:
+        raise RequestValidationError(f"at most {max_points} values are accepted")
+    if not np.isfinite(values).all():
+        raise RequestValidationError("every value must be finite")
+    return values
+
+
+def _packed_batch(event, max_points: int) -> BatchRequest:
+    values = _packed_values(event, max_points)
+    query = event.get("queryStringParameters") or {}
+    return BatchRequest(
+        model_name=_name(query, "model_name"),
+        model_version=_version(query),
+        values=values,
+        timestamps=[None] * len(values),
+        entity_id=_name(query, "entity_id", required=False),
+        series_id=_name(query, "series_id", required=False),
+    )
@@ -0,0 +1,208 @@
+"""Drift monitoring of live inputs against the statistics a model was trained on.
+
+Every scored value is standardized with the mean and standard deviation stored in the
+model's artifact, `z = (value - mean) / std`, and folded into a fixed-size sketch kept per
+model version: Welford moments of `z` and a histogram of `z` over fixed bins. Updates are
+O(1) per value, sketches merge by adding them up, and because they live in z-space the
+entities of a bundle, each with its own statistics, share one sketch.
+
+While inputs look like the training data, `z` has mean 0 and standard deviation 1. The
+monitor reports how far the live sketch is from that as metrics of the handler's own
+`MetricsBuffer`, so they go out with the next metrics flush instead of in a call of
+their own:
+
+- DriftMeanShift: mean of `z`, the mean's shift in training standard deviations.
+- DriftStdRatio: standard deviation of `z`, live spread over training spread.
+- DriftP01 and DriftP99: 1st and 99th percentiles of `z` (about -2.33 and 2.33).
+- DriftPSI: population stability index of `z` over one-sigma bands against a standard
+  normal; above 0.25 is usually read as a significant shift.
+- DriftSamples: the number of values the other metrics describe.
+"""
+
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+# Histogram of z over [-Z_RANGE, Z_RANGE) in BINS bins, plus one underflow and one
+# overflow bin
+Z_RANGE = 8.0
+BINS = 128
+BIN_WIDTH = 2 * Z_RANGE / BINS
+# Fine bins per band of the PSI, one standard deviation wide
+BINS_PER_BAND = int(1 / BIN_WIDTH)
+# Floor for empty bands, so the PSI stays finite
+PSI_EPSILON = 1e-4
+
+
+def _normal_band_probabilities() -> np.ndarray:
+    edges = np.arange(-Z_RANGE, Z_RANGE + 1)
+    cdf = np.array([0.5 * (1 + math.erf(edge / math.sqrt(2))) for edge in edges])
+    return np.concatenate([[cdf[0]], np.diff(cdf), [1 - cdf[-1]]])
+
+
+NORMAL_BANDS = _normal_band_probabilities()
+
+
+class DriftSketch:
+    """Welford moments and a fixed-bin histogram of standardized values.
+
+    The sketch takes 130 counters and three floats however many values it has seen.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.bins = np.zeros(BINS + 2, dtype=np.int64)
+
+    def add(self, z: float) -> None:
+        """Folds one standardized value into the sketch."""
+        if math.isnan(z):
+            return
+        self.count += 1
+        delta = z - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (z - self.mean)
+        # Clamped first, so values off the range land in the underflow or overflow bin
+        clamped = min(max(z, -Z_RANGE - BIN_WIDTH), Z_RANGE)
+        self.bins[math.floor((clamped + Z_RANGE) / BIN_WIDTH) + 1] += 1
+
+    def add_many(self, z: np.ndarray) -> None:
+        """Folds an array of standardized values into the sketch with one merge."""
+        z = z[~np.isnan(z)]
+        if z.size == 0:
+            return
+        chunk = DriftSketch()
+        chunk.count = int(z.size)
+        chunk.mean = float(z.mean())
+        chunk.m2 = float(np.square(z - chunk.mean).sum())
+        clamped = np.clip(z, -Z_RANGE - BIN_WIDTH, Z_RANGE)
+        index = (np.floor((clamped + Z_RANGE) / BIN_WIDTH) + 1).astype(np.intp)
+        chunk.bins = np.bincount(index, minlength=BINS + 2)
+        self.merge(chunk)
+
+    def merge(self, other: "DriftSketch") -> None:
+        """Merges another sketch into this one (Chan's parallel update for the moments)."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta**2 * self.count * other.count / total
+        self.count = total
+        self.bins += other.bins
+
+    @property
+    def std(self) -> float:
+        return (self.m2 / self.count) ** 0.5 if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Estimates the `q` quantile of `z`, interpolating within a bin.
+
+        Values outside the histogram's range count as lying on its edge.
+        """
+        rank = q * self.count
+        cumulative = np.cumsum(self.bins)
+        index = int(np.searchsorted(cumulative, rank, side="left"))
+        if index == 0:
+            return -Z_RANGE
+        if index == BINS + 1:
+            return Z_RANGE
+        below = cumulative[index - 1]
+        fraction = (rank - below) / self.bins[index] if self.bins[index] else 0.0
+        return float(-Z_RANGE + (index - 1 + fraction) * BIN_WIDTH)
+
+    def psi(self) -> float:
+        """Population stability index against a standard normal, over one-sigma bands."""
+        inner = self.bins[1:-1].reshape(-1, BINS_PER_BAND).sum(axis=1)
+        bands = np.concatenate([self.bins[:1], inner, self.bins[-1:]])
+        actual = np.maximum(bands / max(self.count, 1), PSI_EPSILON)
+        expected = np.maximum(NORMAL_BANDS, PSI_EPSILON)
+        return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+class DriftMonitor:
+    """Keeps a `DriftSketch` per model version and reports drift with the handler's metrics.
+
+    Sketches live as long as the execution environment, so they aggregate across
+    invocations. `emit_if_due` turns every sketch with enough values into drift metrics at
+    most once per `interval_seconds` and starts it afresh; call it before flushing the
+    metrics buffer.
+    """
+
+    def __init__(
+        self,
+        metrics,
+        interval_seconds: float | None = None,
+        min_samples: int | None = None,
+    ):
+        self.metrics = metrics
+        self.interval_seconds = (
+            interval_seconds
+            if interval_seconds is not None
+            else float(os.environ.get("DRIFT_INTERVAL_SECONDS", "60"))
+        )
+        self.min_samples = (
+            min_samples
+            if min_samples is not None
+            else int(os.environ.get("DRIFT_MIN_SAMPLES", "100"))
+        )
+        self._sketches: dict[tuple[str, str], DriftSketch] = {}
+        self._last_emit = time.monotonic()
+        self._lock = threading.Lock()
+
+    def sketch(self, model_name: str, version: str) -> DriftSketch | None:
+        """Returns the current sketch of a model version, if it has seen any values."""
+        return self._sketches.get((model_name, version))
+
+    def observe(self, model_name: str, version: str, model, values: float | np.ndarray) -> None:
+        """Folds the values a model scored into its version's sketch.
+
+        Models without training statistics (no `reference`, or a zero deviation) are
+        skipped.
+
+        Args:
+            model_name (str): The name of the model.
+            version (str): The resolved version of the model.
+            model: The model that scored the values; `model.reference` is the mean and
+                standard deviation of its training data.
+            values (float | np.ndarray): One value or an array of values.
+        """
+        reference = getattr(model, "reference", None)
+        if reference is None or not reference[1]:
+            return
+        mean, std = reference
+        with self._lock:
+            sketch = self._sketches.get((model_name, version))
+            if sketch is None:
+                sketch = self._sketches[(model_name, version)] = DriftSketch()
+            if isinstance(values, np.ndarray):
+                sketch.add_many((values.astype(np.float64, copy=False) - mean) / std)
+            else:
+                sketch.add((values - mean) / std)
+
+    def emit_if_due(self) -> None:
+        """Records drift metrics for every sketch with enough values, once per interval."""
+        now = time.monotonic()
+        if now - self._last_emit < self.interval_seconds:
+            return
+        with self._lock:
+            self._last_emit = now
+            due = {key: s for key, s in self._sketches.items() if s.count >= self.min_samples}
+            for key in due:
+                del self._sketches[key]
+
+        for (model_name, version), sketch in due.items():
+            dimensions = {"model_name": model_name, "model_version": version}
+            for name, value in (
+                ("DriftMeanShift", sketch.mean),
+                ("DriftStdRatio", sketch.std),
+                ("DriftP01", sketch.quantile(0.01)),
+                ("DriftP99", sketch.quantile(0.99)),
+                ("DriftPSI", sketch.psi()),
+                ("DriftSamples", sketch.count),
+            ):
+                self.metrics.add_gauge(name, value, dimensions)
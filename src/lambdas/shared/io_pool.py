@@ -0,0 +1,92 @@
+"""Bounded thread pool for the independent AWS calls of one request.
+
+boto3 calls block while waiting on the network, so calls that do not depend on each
+other, such as the `batch_write_item` calls of one prediction flush, or loading several
+models, can wait side by side. A request then takes about as long as its slowest call, not the sum
+of all of them.
+
+Clients are thread-safe but resources are not: work handed to the pool must use a
+resource's `meta.client`. Tasks must not submit to the pool they run on, or a saturated
+pool would wait on itself.
+"""
+
+import logging
+import os
+import threading
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class IOPool:
+    """Runs blocking calls concurrently on at most `max_workers` threads.
+
+    Threads are started on first use, so handlers can create the pool at import time for
+    free. A single call runs inline in the calling thread.
+    """
+
+    def __init__(self, max_workers: int | None = None, name: str = "io"):
+        self.max_workers = max_workers or int(os.environ.get("IO_POOL_WORKERS", "8"))
+        self.name = name
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=self.name
+                    )
+        return self._executor
+
+    def map[T, R](self, function: Callable[[T], R], items: Iterable[T]) -> list[R]:
+        """Calls `function` on every item concurrently.
+
+        Every call finishes before this returns, even when one of them fails, so no call
+        outlives the request that made it.
+
+        Args:
+            function (Callable[[T], R]): The call to make per item.
+            items (Iterable[T]): The items.
+
+        Returns:
+            list[R]: The results, in the order of `items`.
+
+        Raises:
+            Exception: The first failure in the order of `items`; later failures are
+                logged.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [function(item) for item in items]
+
+        # The calling thread makes the first call itself instead of idling
+        futures = [self._pool().submit(function, item) for item in items[1:]]
+        first, first_error = None, None
+        try:
+            first = function(items[0])
+        except Exception as e:
+            first_error = e
+        wait(futures)
+
+        errors = [first_error] if first_error is not None else []
+        errors += [f.exception() for f in futures if f.exception() is not None]
+        for error in errors[1:]:
+            logger.error("Concurrent call failed", exc_info=error)
+        if errors:
+            raise errors[0]
+        return [first, *(f.result() for f in futures)]
+
+    def run(self, *calls: Callable[[], Any]) -> list[Any]:
+        """Makes independent calls concurrently; see `map`.
+
+        Args:
+            *calls (Callable[[], Any]): Calls without arguments.
+
+        Returns:
+            list[Any]: Their results, in order.
+        """
+        return self.map(lambda call: call(), calls)
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+# PutMetricData accepts up to 1000 datums per call and 150 distinct values per datum
+MAX_DATUMS_PER_CALL = 1000
+MAX_VALUES_PER_DATUM = 150
+# Embedded Metric Format accepts up to 100 values per metric per log line
+MAX_EMF_VALUES = 100
+
+
+class MetricsBuffer:
+    """Aggregates counters, gauges and latency distributions in memory and emits them in one flush.
+
+    Recording a metric never touches the network. `flush` sends everything collected since
+    the previous flush either as a single batched PutMetricData call (mode "api") or as
+    Embedded Metric Format log lines (mode "emf").
+    """
+
+    def __init__(self, namespace: str, service: str, cloudwatch=None, mode: str | None = None):
+        self.namespace = namespace
+        self.service = service
+        self.cloudwatch = cloudwatch
+        self.mode = mode or os.environ.get("METRICS_MODE", "api")
+        self._counts: dict[tuple, float] = defaultdict(float)
+        self._timings: dict[tuple, dict[float, int]] = defaultdict(dict)
+        self._gauges: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def _key(self, name: str, dimensions: dict | None) -> tuple:
+        dims = {"service": self.service, **(dimensions or {})}
+        return name, tuple(sorted(dims.items()))
+
+    def add_count(self, name: str, value: float = 1, dimensions: dict | None = None) -> None:
+        """Adds `value` to the counter `name`.
+
+        Args:
+            name (str): The metric name.
+            value (float): The amount to add.
+            dimensions (dict | None): Extra dimensions besides `service`.
+        """
+        with self._lock:
+            self._counts[self._key(name, dimensions)] += value
+
+    def add_timing(self, name: str, milliseconds: float, dimensions: dict | None = None) -> None:
+        """Records one latency observation for the distribution `name`.
+
+        Args:
+            name (str): The metric name.
+            milliseconds (float): The observed latency.
+            dimensions (dict | None): Extra dimensions besides `service`.
+        """
+        key, value = self._key(name, dimensions), round(milliseconds, 1)
+        with self._lock:
+            histogram = self._timings[key]
+            histogram[value] = histogram.get(value, 0) + 1
+
+    def add_gauge(self, name: str, value: float, dimensions: dict | None = None) -> None:
+        """Sets the gauge `name`; only the last value before a flush is emitted.
+
+        Args:
+            name (str): The metric name.
+            value (float): The current value.
+            dimensions (dict | None): Extra dimensions besides `service`.
+        """
+        with self._lock:
+            self._gauges[self._key(name, dimensions)] = value
+
+    def flush(self) -> None:
+        """Emits every metric recorded since the last flush and resets the buffer."""
+        with self._lock:
+            counts, self._counts = self._counts, defaultdict(float)
+            timings, self._timings = self._timings, defaultdict(dict)
+            gauges, self._gauges = self._gauges, {}
+
+        if not counts and not timings and not gauges:
+            return
+
+        try:
+            if self.mode == "emf":
+                self._emit_emf(counts, timings, gauges)
+            else:
+                self._emit_api(counts, timings, gauges)
+        except Exception:
+            logger.exception("Failed to flush metrics")
+
+    def _emit_api(self, counts: dict, timings: dict, gauges: dict) -> None:
+        datums = []
+        for (name, dims), value in counts.items():
+            datums.append(
+                {
+                    "MetricName": name,
+                    "Value": value,
+                    "Unit": "Count",
+                    "Dimensions": [{"Name": k, "Value": v} for k, v in dims],
+                }
+            )
+        for (name, dims), value in gauges.items():
+            datums.append(
+                {
+                    "MetricName": name,
+                    "Value": value,
+                    "Unit": "None",
+                    "Dimensions": [{"Name": k, "Value": v} for k, v in dims],
+                }
+            )
+        for (name, dims), histogram in timings.items():
+            observed = sorted(histogram.items())
+            for start in range(0, len(observed), MAX_VALUES_PER_DATUM):
+                chunk = observed[start : start + MAX_VALUES_PER_DATUM]
+                datums.append(
+                    {
+                        "MetricName": name,
+                        "Values": [value for value, _ in chunk],
+                        "Counts": [count for _, count in chunk],
+                        "Unit": "Milliseconds",
+                        "Dimensions": [{"Name": k, "Value": v} for k, v in dims],
+                    }
+                )
+
+        for start in range(0, len(datums), MAX_DATUMS_PER_CALL):
+            self.cloudwatch.put_metric_data(
+                Namespace=self.namespace, MetricData=datums[start : start + MAX_DATUMS_PER_CALL]
+            )
+
+    def _emit_emf(self, counts: dict, timings: dict, gauges: dict) -> None:
+        # One log document per dimension set; long distributions spill into extra documents
+        documents: dict[tuple, list[dict]] = defaultdict(lambda: [{}])
+        units: dict[tuple, dict[str, str]] = defaultdict(dict)
+
+        for (name, dims), value in counts.items():
+            documents[dims][0][name] = value
+            units[dims][name] = "Count"
+        for (name, dims), value in gauges.items():
+            documents[dims][0][name] = value
+            units[dims][name] = "None"
+        for (name, dims), histogram in timings.items():
+            values = [value for value, count in sorted(histogram.items()) for _ in range(count)]
+            units[dims][name] = "Milliseconds"
+            for i, start in enumerate(range(0, len(values), MAX_EMF_VALUES)):
+                if i == len(documents[dims]):
+                    documents[dims].append({})
+                documents[dims][i][name] = values[start : start + MAX_EMF_VALUES]
+
+        timestamp = int(time.time() * 1000)
+        for dims, docs in documents.items():
+            for doc in docs:
+                print(
+                    json.dumps(
+                        {
+                            "_aws": {
+                                "Timestamp": timestamp,
+                                "CloudWatchMetrics": [
+                                    {
+                                        "Namespace": self.namespace,
+                                        "Dimensions": [[k for k, _ in dims]],
+                                        "Metrics": [
+                                            {"Name": name, "Unit": units[dims][name]}
+                                            for name in doc
+                                        ],
+                                    }
+                                ],
+                            },
+                            **dict(dims),
+                            **doc,
+                        }
+                    )
+                )
@@ -0,0 +1,182 @@
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+
+class ModelCache:
+    """Bounded, thread-safe LRU cache of loaded models keyed by (model_name, version).
+
+    Entries older than `ttl_seconds` (MODEL_CACHE_TTL_SECONDS, default 300) are treated as
+    misses and reloaded, which is when the artifact loader revalidates them; a TTL of 0
+    keeps entries until they are evicted. Concurrent misses on one key load it once: the first
+    caller runs its loader and the others wait for that load. Hits, misses, waits,
+    expirations and evictions are counted on the instance and, when a metrics buffer is
+    given, recorded as metrics.
+
+    `on_evict`, when set, is called with the model name and version of every entry that
+    leaves the cache, whether the LRU policy evicts it or `invalidate` or `clear` drops
+    it, so whatever was kept to load it can be released too.
+    """
+
+    def __init__(
+        self,
+        capacity: int | None = None,
+        ttl_seconds: float | None = None,
+        metrics=None,
+        on_evict: Callable[[str, str], None] | None = None,
+    ):
+        self.capacity = capacity or int(os.environ.get("MODEL_CACHE_SIZE", "8"))
+        self.ttl_seconds = (
+            ttl_seconds
+            if ttl_seconds is not None
+            else float(os.environ.get("MODEL_CACHE_TTL_SECONDS", "300"))
+        )
+        self.metrics = metrics
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[Any, float]] = OrderedDict()
+        # Loads in progress, so concurrent misses on a key share one
+        self._loading: dict[tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple[str, str]) -> bool:
+        return self.cached(*key)
+
+    def cached(self, model_name: str, version: str) -> bool:
+        """Whether `get_or_load` would return the model without loading it."""
+        entry = self._entries.get((model_name, version))
+        return entry is not None and self._is_fresh(entry)
+
+    def get_or_load(self, model_name: str, version: str, loader: Callable[[], Any]) -> Any:
+        """Returns the cached model, calling `loader` on a miss or an expired entry.
+
+        When another thread is already loading the same key, this waits for its result
+        instead of calling `loader`.
+
+        Args:
+            model_name (str): The name of the model.
+            version (str): The version of the model.
+            loader (Callable[[], Any]): Loads the model when it is not cached.
+
+        Returns:
+            Any: The cached or freshly loaded model.
+
+        Raises:
+            Exception: Whatever `loader` raised, in the loading thread and in every thread
+                that waited for it. Failed loads are not cached.
+        """
+        key = (model_name, version)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._is_fresh(entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                self._record("ModelCacheHit")
+                return entry[0]
+            pending = self._loading.get(key)
+            if pending is None:
+                if entry is not None:
+                    self.expirations += 1
+                    self._record("ModelCacheExpiration")
+                self.misses += 1
+                self._record("ModelCacheMiss")
+                pending = self._loading[key] = Future()
+                owner = True
+            else:
+                self.waits += 1
+                self._record("ModelCacheLoadWait")
+                owner = False
+
+        if not owner:
+            return pending.result()
+
+        try:
+            model = loader()
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            pending.set_exception(e)
+            raise
+
+        evicted = []
+        with self._lock:
+            del self._loading[key]
+            self._entries[key] = (model, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                evicted.append(self._entries.popitem(last=False)[0])
+                self.evictions += 1
+                self._record("ModelCacheEviction")
+        pending.set_result(model)
+        self._released(evicted)
+        return model
+
+    def prefetch(self, spec: str, fetch: Callable[[str, str], Any]) -> list[str]:
+        """Loads models ahead of the first request, e.g. during the Lambda init phase.
+
+        Args:
+            spec (str): Comma-separated `model_name@version` references.
+            fetch (Callable[[str, str], Any]): Loads a model given its name and version.
+
+        Returns:
+            list[str]: The references that could not be loaded.
+        """
+        failed = []
+        for ref in filter(None, (part.strip() for part in spec.split(","))):
+            model_name, _, version = ref.partition("@")
+            try:
+                self.get_or_load(model_name, version, functools.partial(fetch, model_name, version))
+            except Exception:
+                failed.append(ref)
+        return failed
+
+    def invalidate(self, model_name: str, version: str) -> None:
+        """Drops a single entry so the next lookup reloads it."""
+        with self._lock:
+            entry = self._entries.pop((model_name, version), None)
+        if entry is not None:
+            self._released([(model_name, version)])
+
+    def clear(self) -> None:
+        """Drops every entry; counters are kept."""
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+        self._released(keys)
+
+    def stats(self) -> dict:
+        """Returns the cache counters and current size."""
+        return {
+            "size": len(self._entries),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "waits": self.waits,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
+    def _released(self, keys: list[tuple[str, str]]) -> None:
+        # Called outside the lock, since the callback may do I/O
+        if self.on_evict is not None:
+            for model_name, version in keys:
+                self.on_evict(model_name, version)
+
+    def _is_fresh(self, entry: tuple[Any, float]) -> bool:
+        return self.ttl_seconds <= 0 or time.monotonic() - entry[1] < self.ttl_seconds
+
+    def _record(self, name: str) -> None:
+        if self.metrics is not None:
+            self.metrics.add_count(name, 1)
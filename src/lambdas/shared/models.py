@@ -0,0 +1,167 @@
+"""Serving-side model classes, looked up by the `model_type` of their artifact.
+
+Every class is built from the parameters stored in its artifact (or in one entity of a
+bundle) with `from_params`, scores one point with `predict` and many with
+`predict_batch`, and names its result `output_name` in responses and prediction
+records. `reference` is the mean and standard deviation of the training data, against
+which `shared.drift` compares live inputs. New model types only need a class here and an
+entry in `MODEL_TYPES`.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from common.rolling import RollingDetector, RollingState
+
+
+@dataclass
+class DataPoint:
+    value: float
+    timestamp: str
+
+
+class ToyAnomalyClassifier:
+    output_name = "is_anomaly"
+
+    def __init__(self, mean: float, std: float, threshold: float):
+        self.mean = mean
+        self.std = std
+        self.threshold = threshold
+
+    @classmethod
+    def from_params(cls, params: dict) -> "ToyAnomalyClassifier":
+        return cls(mean=params["mean"], std=params["std"], threshold=params["threshold"])
+
+    @property
+    def reference(self) -> tuple[float, float]:
+        return self.mean, self.std
+
+    def predict(self, data_point: DataPoint) -> bool:
+        return data_point.value > self.threshold
+
+    def predict_batch(self, values: np.ndarray) -> np.ndarray:
+        return np.asarray(values, dtype=np.float64) > self.threshold
+
+
+class ToyLevelClassifier:
+    output_name = "level"
+    # Used for artifacts and bundles written before the cutoffs were tuned per model
+    default_high_cutoff = 1.5
+    default_low_cutoff = -1.5
+
+    def __init__(
+        self,
+        baseline_avg: float,
+        std_dev: float,
+        high_cutoff: float = default_high_cutoff,
+        low_cutoff: float = default_low_cutoff,
+    ):
+        self.baseline_avg = baseline_avg
+        self.std_dev = std_dev
+        self.high_cutoff = high_cutoff
+        self.low_cutoff = low_cutoff
+
+    @classmethod
+    def from_params(cls, params: dict) -> "ToyLevelClassifier":
+        return cls(
+            baseline_avg=params["baseline_avg"],
+            std_dev=params["std_dev"],
+            high_cutoff=params.get("high_cutoff", cls.default_high_cutoff),
+            low_cutoff=params.get("low_cutoff", cls.default_low_cutoff),
+        )
+
+    @property
+    def reference(self) -> tuple[float, float]:
+        return self.baseline_avg, self.std_dev
+
+    def predict(self, data_point: DataPoint) -> str:
+        deviation = (data_point.value - self.baseline_avg) / self.std_dev
+
+        if deviation > self.high_cutoff:
+            return "high"
+        elif deviation < self.low_cutoff:
+            return "low"
+        else:
+            return "normal"
+
+    def predict_batch(self, values: np.ndarray) -> np.ndarray:
+        deviation = (np.asarray(values, dtype=np.float64) - self.baseline_avg) / self.std_dev
+        return np.select(
+            [deviation > self.high_cutoff, deviation < self.low_cutoff],
+            ["high", "low"],
+            default="normal",
+        )
+
+
+class RollingAnomalyDetector:
+    """Rolling mean/variance detector; per-series state lives in the series state table.
+
+    `predict` and `predict_batch` score against the state the model was trained to, so
+    stateless routes still work; `/anomaly/rolling` scores against each series' own state.
+    """
+
+    output_name = "is_anomaly"
+
+    def __init__(
+        self,
+        alpha: float,
+        threshold_sigmas: float,
+        warmup: int,
+        count: int,
+        mean: float,
+        std: float,
+    ):
+        self.detector = RollingDetector(
+            alpha=alpha, threshold_sigmas=threshold_sigmas, warmup=int(warmup)
+        )
+        self.initial = RollingState(count=int(count), mean=mean, variance=std**2)
+
+    @classmethod
+    def from_params(cls, params: dict) -> "RollingAnomalyDetector":
+        return cls(
+            alpha=params["alpha"],
+            threshold_sigmas=params["threshold_sigmas"],
+            warmup=params["warmup"],
+            count=params["count"],
+            mean=params["mean"],
+            std=params["std"],
+        )
+
+    @property
+    def reference(self) -> tuple[float, float]:
+        return self.initial.mean, self.initial.std
+
+    def predict(self, data_point: DataPoint) -> bool:
+        return self.detector.is_anomaly(self.initial, data_point.value)
+
+    def predict_batch(self, values: np.ndarray) -> np.ndarray:
+        return np.array(
+            [self.detector.is_anomaly(self.initial, value) for value in values], dtype=bool
+        )
+
+
+Model = ToyAnomalyClassifier | ToyLevelClassifier | RollingAnomalyDetector
+
+MODEL_TYPES: dict[str, type[Model]] = {
+    cls.__name__: cls for cls in (ToyAnomalyClassifier, ToyLevelClassifier, RollingAnomalyDetector)
+}
+
+
+def build_model(model_type: str, params: dict) -> Model:
+    """Builds a model from the parameters in its artifact.
+
+    Args:
+        model_type (str): A key of `MODEL_TYPES`, e.g. "ToyLevelClassifier".
+        params (dict): The artifact's (or bundle entity's) parameters.
+
+    Returns:
+        Model: The model.
+
+    Raises:
+        ValueError: If the model type is unknown.
+    """
+    model_class = MODEL_TYPES.get(model_type)
+    if model_class is None:
+        raise ValueError(f"Unknown model type: {model_type}")
+    return model_class.from_params(params)
@@ -0,0 +1,138 @@
+import logging
+import os
+import random
+import threading
+import time
+
+from shared.prediction_keys import PredictionKeys
+
+logger = logging.getLogger(__name__)
+
+# BatchWriteItem accepts at most 25 put requests per call
+BATCH_WRITE_LIMIT = 25
+
+
+class PredictionWriter:
+    """Write-behind buffer for prediction records.
+
+    Records are kept in memory and written with `batch_write_item` by `flush_if_due` once
+    `max_items` records are pending or the oldest pending record is `max_age_seconds` old,
+    or by an explicit `flush`. `add` never writes, so buffering a large batch of
+    predictions does not hold up the response. With the default `max_age_seconds` of 0,
+    `flush_if_due` writes everything that is pending, which is what the handlers call
+    before an invocation ends.
+
+    Records without a `pk` get sharded keys from `keys` (see `shared.prediction_keys`),
+    based on their `model_name`, `version` and `timestamp`. With a `pool`, the batches of
+    one flush are written concurrently instead of one after the other.
+    """
+
+    def __init__(
+        self,
+        dynamodb,
+        table_name: str = "model-predictions",
+        max_items: int | None = None,
+        max_age_seconds: float | None = None,
+        max_retries: int = 5,
+        metrics=None,
+        keys: PredictionKeys | None = None,
+        pool=None,
+    ):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.max_items = max_items or int(os.environ.get("PREDICTION_BUFFER_MAX_ITEMS", "25"))
+        self.max_age_seconds = (
+            max_age_seconds
+            if max_age_seconds is not None
+            else float(os.environ.get("PREDICTION_BUFFER_MAX_AGE_SECONDS", "0"))
+        )
+        self.max_retries = max_retries
+        self.metrics = metrics
+        self.keys = keys or PredictionKeys()
+        self.pool = pool
+        self._pending: list[dict] = []
+        self._oldest: float | None = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, item: dict) -> None:
+        """Buffers one prediction record; see `flush_if_due` for when it is written.
+
+        Args:
+            item (dict): The DynamoDB item to persist.
+        """
+        if "pk" not in item:
+            item = {
+                **self.keys.next(item["model_name"], item["version"], item["timestamp"]),
+                **item,
+            }
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.append(item)
+
+    def due(self) -> bool:
+        """Whether the buffer reached the size threshold or its oldest record the age one."""
+        oldest = self._oldest
+        return oldest is not None and (
+            len(self._pending) >= self.max_items
+            or time.monotonic() - oldest >= self.max_age_seconds
+        )
+
+    def flush_if_due(self) -> None:
+        """Flushes the buffer if it reached the size or the age threshold."""
+        if self.due():
+            self.flush()
+
+    def flush(self) -> int:
+        """Writes every pending record to DynamoDB.
+
+        Returns:
+            int: The number of records that were written.
+        """
+        with self._lock:
+            pending, self._pending, self._oldest = self._pending, [], None
+
+        if not pending:
+            return 0
+
+        start = time.perf_counter()
+        batches = [
+            pending[offset : offset + BATCH_WRITE_LIMIT]
+            for offset in range(0, len(pending), BATCH_WRITE_LIMIT)
+        ]
+        if self.pool is not None:
+            written = sum(self.pool.map(self._write_batch, batches))
+        else:
+            written = sum(self._write_batch(batch) for batch in batches)
+        failed = len(pending) - written
+
+        if self.metrics is not None:
+            self.metrics.add_count("PredictionPersisted", written)
+            self.metrics.add_count("PredictionFlushFailed", failed)
+            self.metrics.add_timing("PredictionFlushLatency", (time.perf_counter() - start) * 1000)
+        if failed:
+            logger.error(f"Dropped {failed} of {len(pending)} predictions after retries")
+        return written
+
+    def _write_batch(self, items: list[dict]) -> int:
+        requests = {self.table_name: [{"PutRequest": {"Item": item}} for item in items]}
+        client = self.dynamodb.meta.client
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = client.batch_write_item(RequestItems=requests)
+            except Exception:
+                logger.exception(f"batch_write_item failed for {len(items)} predictions")
+                return len(items) - sum(len(r) for r in requests.values())
+
+            requests = response.get("UnprocessedItems") or {}
+            if not requests:
+                return len(items)
+            if attempt < self.max_retries:
+                # Exponential backoff with full jitter, capped at one second
+                time.sleep(random.uniform(0, min(1.0, 0.05 * 2**attempt)))
+
+        return len(items) - sum(len(r) for r in requests.values())
@@ -0,0 +1,60 @@
+"""Key scheme of the `model-predictions` table.
+
+    pk = "<model_name>#<version>#<shard>"   spreads one model version over `shards` partitions
+    sk = "<timestamp>#<writer id><sequence>" orders by time and never collides
+
+Writers spread records over the shards round-robin, so write throughput grows with the
+number of shards instead of being capped by one partition. Readers fan out over every
+shard and merge the results by sort key.
+"""
+
+import itertools
+import os
+import threading
+
+DEFAULT_SHARDS = int(os.environ.get("PREDICTION_SHARDS", "8"))
+# Sorts after "#", so "<end>" + SORT_KEY_END bounds every sort key of timestamp <= end
+SORT_KEY_END = "~"
+
+
+def partition_key(model_name: str, version: str, shard: int) -> str:
+    """Returns the partition key of one shard of a model version."""
+    return f"{model_name}#{version}#{shard}"
+
+
+def sort_key_range(start: str, end: str) -> tuple[str, str]:
+    """Returns inclusive sort key bounds covering timestamps from `start` to `end`."""
+    return start, end + SORT_KEY_END
+
+
+class PredictionKeys:
+    """Generates (pk, sk) pairs for new prediction records.
+
+    Sort keys end with a random id of this writer and a sequence number, so records with
+    identical timestamps, within one invocation or across concurrent ones, stay distinct.
+    """
+
+    def __init__(self, shards: int | None = None):
+        self.shards = shards or DEFAULT_SHARDS
+        self.writer_id = os.urandom(8).hex()
+        # A random starting shard keeps short-lived writers from all starting on shard 0
+        self._sequence = itertools.count(int.from_bytes(os.urandom(2)))
+        self._lock = threading.Lock()
+
+    def next(self, model_name: str, version: str, timestamp: str) -> dict:
+        """Returns the key attributes for a record.
+
+        Args:
+            model_name (str): The model that made the prediction.
+            version (str): The model version.
+            timestamp (str): ISO-8601 time of the prediction.
+
+        Returns:
+            dict: The `pk` and `sk` attributes.
+        """
+        with self._lock:
+            sequence = next(self._sequence)
+        return {
+            "pk": partition_key(model_name, version, sequence % self.shards),
+            "sk": f"{timestamp}#{self.writer_id}{sequence:012x}",
+        }
@@ -0,0 +1,455 @@
+import base64
+import binascii
+import heapq
+import itertools
+import json
+import threading
+from collections import Counter, defaultdict
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from shared.prediction_keys import DEFAULT_SHARDS, partition_key, sort_key_range
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_SCAN_SEGMENTS = 16
+# Most items one export page returns across all of its segments, so a page of large
+# items stays well under the 6 MB Lambda response limit
+MAX_EXPORT_ITEMS = 2000
+
+# Length of the ISO-8601 timestamp prefix that identifies each aggregation bucket
+BUCKET_PREFIXES = {"minute": 16, "hour": 13, "day": 10}
+
+# "timestamp" is a DynamoDB reserved word, so every attribute is referenced by name
+_NAMES = {
+    "#model": "model_name",
+    "#ts": "timestamp",
+    "#version": "version",
+    "#output": "output",
+}
+
+
+def encode_token(state: dict | None) -> str | None:
+    """Encodes pagination state as an opaque URL-safe token; None means no more pages."""
+    if state is None:
+        return None
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_token(token: str | None) -> dict | None:
+    """Decodes a token from `encode_token`.
+
+    Raises:
+        ValueError: If the token is malformed.
+    """
+    if not token:
+        return None
+    try:
+        return json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid next_token") from e
+
+
+def _is_key(value) -> bool:
+    """Whether `value` is a table key as the pagination state stores it."""
+    return isinstance(value, dict) and all(
+        isinstance(name, str) and isinstance(part, str) for name, part in value.items()
+    )
+
+
+def _is_index(value, count: int) -> bool:
+    """Whether `value` is an int in range(count)."""
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value < count
+
+
+def _is_index_str(value: str, count: int) -> bool:
+    """Whether `value` is the str of an int in range(count), as JSON object keys are."""
+    return value.isdecimal() and value.isascii() and int(value) < count
+
+
+def _query_state(token: str | None, shards: int) -> dict:
+    """Decodes the token of `query_predictions`, or returns the state of its first page.
+
+    Raises:
+        ValueError: If the token is malformed or names a shard outside 0..shards-1.
+    """
+    state = decode_token(token)
+    if state is None:
+        return {"shards": {str(s): None for s in range(shards)}}
+    positions = state.get("shards") if isinstance(state, dict) else None
+    if not isinstance(positions, dict) or not all(
+        _is_index_str(shard, shards) and (key is None or _is_key(key))
+        for shard, key in positions.items()
+    ):
+        raise ValueError("Invalid next_token")
+    return state
+
+
+def _scan_state(token: str | None, segments: int) -> dict:
+    """Decodes the token of `scan_predictions`, or returns the state of its first page.
+
+    Raises:
+        ValueError: If the token is malformed or names a segment the scan does not have.
+    """
+    state = decode_token(token)
+    if state is None:
+        return {"segments": max(1, min(segments, MAX_SCAN_SEGMENTS)), "keys": {}, "done": []}
+    if not isinstance(state, dict):
+        raise ValueError("Invalid next_token")
+    total, keys, done = state.get("segments"), state.get("keys"), state.get("done")
+    if not (
+        _is_index(total, MAX_SCAN_SEGMENTS + 1)
+        and total >= 1
+        and isinstance(keys, dict)
+        and all(_is_index_str(s, total) and _is_key(key) for s, key in keys.items())
+        and isinstance(done, list)
+        and all(_is_index(s, total) for s in done)
+    ):
+        raise ValueError("Invalid next_token")
+    return state
+
+
+def to_plain(value):
+    """Replaces the Decimals DynamoDB returns with ints and floats, recursively."""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if isinstance(value, dict):
+        return {k: to_plain(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [to_plain(v) for v in value]
+    return value
+
+
+def _names_used(kwargs: dict) -> dict:
+    # DynamoDB rejects attribute name placeholders that no expression uses
+    expressions = " ".join(v for k, v in kwargs.items() if k.endswith("Expression"))
+    return {name: attr for name, attr in _NAMES.items() if name in expressions}
+
+
+def _query_kwargs(
+    table_name: str, model_name: str, version: str, shard: int, start: str, end: str
+) -> dict:
+    low, high = sort_key_range(start, end)
+    return {
+        "TableName": table_name,
+        "KeyConditionExpression": "#pk = :pk AND #sk BETWEEN :low AND :high",
+        "ExpressionAttributeNames": {"#pk": "pk", "#sk": "sk"},
+        "ExpressionAttributeValues": {
+            ":pk": partition_key(model_name, version, shard),
+            ":low": low,
+            ":high": high,
+        },
+    }
+
+
+def _fan_out(function, shards: Iterable[int]) -> list:
+    # The resource's client is thread-safe (resources are not) and still converts
+    # attribute values to and from Python types
+    shards = list(shards)
+    with ThreadPoolExecutor(max_workers=max(1, len(shards))) as executor:
+        return list(executor.map(function, shards))
+
+
+class TooManyPredictions(ValueError):
+    """A time range holds more predictions than one request may aggregate."""
+
+
+def aggregate_shards(
+    dynamodb,
+    table_name: str,
+    model_name: str,
+    version: str,
+    start: str,
+    end: str,
+    bucket: str = "minute",
+    max_items: int | None = None,
+    shards: int = DEFAULT_SHARDS,
+) -> tuple[list[dict], int]:
+    """Aggregates every prediction of a model version in a time range, all shards concurrently.
+
+    Each shard is read page by page and every page is folded into the shard's running
+    `PredictionAggregate` as it arrives, so memory holds one page per shard, not the
+    range. Only the timestamp and output of each item are read back.
+
+    Args:
+        dynamodb: The DynamoDB resource.
+        table_name (str): The predictions table.
+        model_name (str): The model whose predictions are aggregated.
+        version (str): The model version.
+        start (str): Inclusive lower bound (ISO-8601).
+        end (str): Inclusive upper bound (ISO-8601).
+        bucket (str): Bucket width, one of `BUCKET_PREFIXES`.
+        max_items (int | None): Stop and fail once more predictions than this were read.
+        shards (int): Number of shards the predictions are spread over.
+
+    Returns:
+        tuple[list[dict], int]: The buckets (see `aggregate_predictions`) and the number
+            of predictions aggregated.
+
+    Raises:
+        TooManyPredictions: If the range holds more than `max_items` predictions.
+    """
+    client = dynamodb.meta.client
+    lock = threading.Lock()
+    read_total = 0
+    exceeded = threading.Event()
+
+    def read(shard: int) -> PredictionAggregate:
+        nonlocal read_total
+        kwargs = _query_kwargs(table_name, model_name, version, shard, start, end)
+        kwargs["ProjectionExpression"] = "#ts, #output"
+        kwargs["ExpressionAttributeNames"].update({"#ts": "timestamp", "#output": "output"})
+        aggregate = PredictionAggregate(bucket)
+        while not exceeded.is_set():
+            response = client.query(**kwargs)
+            items = response.get("Items", [])
+            with lock:
+                read_total += len(items)
+                if max_items is not None and read_total > max_items:
+                    exceeded.set()
+                    raise TooManyPredictions(
+                        f"More than {max_items} predictions in range; narrow start and end"
+                    )
+            aggregate.add(items)
+            if "LastEvaluatedKey" not in response:
+                break
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return aggregate
+
+    total = PredictionAggregate(bucket)
+    for aggregate in _fan_out(read, range(shards)):
+        total.merge(aggregate)
+    return total.buckets(), total.count
+
+
+def query_predictions(
+    dynamodb,
+    table_name: str,
+    model_name: str,
+    version: str,
+    start: str,
+    end: str,
+    limit: int = DEFAULT_PAGE_SIZE,
+    next_token: str | None = None,
+    newest_first: bool = False,
+    shards: int = DEFAULT_SHARDS,
+) -> tuple[list[dict], str | None]:
+    """Returns up to `limit` predictions in time order and a token for the next page.
+
+    Every unfinished shard is queried concurrently for up to `limit` items and the
+    results are merged by sort key. The token records, per shard, the key of the last
+    item that was returned, so the next page resumes exactly where this one stopped.
+
+    Args:
+        dynamodb: The DynamoDB resource.
+        table_name (str): The predictions table.
+        model_name (str): The model whose predictions are returned.
+        version (str): The model version.
+        start (str): Inclusive lower bound (ISO-8601).
+        end (str): Inclusive upper bound (ISO-8601).
+        limit (int): Maximum number of predictions returned.
+        next_token (str | None): Token returned by the previous call.
+        newest_first (bool): Return the most recent predictions first.
+        shards (int): Number of shards the predictions are spread over.
+
+    Returns:
+        tuple[list[dict], str | None]: The predictions and the token of the next page.
+
+    Raises:
+        ValueError: If `next_token` is not a token this function returned.
+    """
+    # Shard -> key to resume after (None: from the start); finished shards are dropped
+    state = _query_state(next_token, shards)
+    positions = state["shards"]
+    client = dynamodb.meta.client
+
+    def read(shard: int) -> tuple[list[dict], bool]:
+        kwargs = _query_kwargs(table_name, model_name, version, shard, start, end)
+        kwargs["ScanIndexForward"] = not newest_first
+        if key := positions[str(shard)]:
+            kwargs["ExclusiveStartKey"] = key
+        items = []
+        while len(items) < limit:
+            response = client.query(Limit=limit - len(items), **kwargs)
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                return items, True
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        return items, False
+
+    active = sorted(int(shard) for shard in positions)
+    results = dict(zip(active, _fan_out(read, active), strict=True))
+
+    merged = heapq.merge(
+        *[[(item["sk"], shard, item) for item in items] for shard, (items, _) in results.items()],
+        reverse=newest_first,
+    )
+    page = list(itertools.islice(merged, limit))
+
+    consumed = Counter(shard for _, shard, _ in page)
+    for _, shard, item in page:
+        positions[str(shard)] = {"pk": item["pk"], "sk": item["sk"]}
+    for shard, (items, exhausted) in results.items():
+        if exhausted and consumed[shard] == len(items):
+            del positions[str(shard)]
+
+    items = [to_plain(item) for _, _, item in page]
+    return items, encode_token(state) if positions else None
+
+
+def scan_predictions(
+    dynamodb,
+    table_name: str,
+    segments: int = 4,
+    model_name: str | None = None,
+    version: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    next_token: str | None = None,
+) -> tuple[list[dict], str | None]:
+    """Reads one page from every unfinished segment of a parallel Scan, concurrently.
+
+    Meant for full exports: repeated calls with the returned token walk the whole table
+    with `segments` workers. Filters are applied server-side. Each segment evaluates at
+    most `page_size` items, and fewer when that is needed to keep the page within
+    MAX_EXPORT_ITEMS.
+
+    Args:
+        dynamodb: The DynamoDB resource. Its client is shared by the worker threads, since
+            clients are thread-safe and resources are not; the resource's client still
+            converts attribute values to and from Python types.
+        table_name (str): The table to scan.
+        segments (int): TotalSegments of the parallel Scan; fixed by the first call.
+        model_name (str | None): Only export predictions of this model.
+        version (str | None): Only export predictions of this model version.
+        start (str | None): Inclusive lower bound on the timestamp (ISO-8601).
+        end (str | None): Inclusive upper bound on the timestamp (ISO-8601).
+        page_size (int): Most items evaluated per segment and call.
+        next_token (str | None): Token returned by the previous call.
+
+    Returns:
+        tuple[list[dict], str | None]: The predictions and the token of the next page.
+
+    Raises:
+        ValueError: If `next_token` is not a token this function returned.
+    """
+    state = _scan_state(next_token, segments)
+    total = state["segments"]
+    pending = [s for s in range(total) if s not in state["done"]]
+    limit = max(1, min(page_size, MAX_EXPORT_ITEMS // max(1, len(pending))))
+
+    conditions, values = [], {}
+    for placeholder, value, condition in (
+        (":model", model_name, "#model = :model"),
+        (":version", version, "#version = :version"),
+        (":start", start, "#ts >= :start"),
+        (":end", end, "#ts <= :end"),
+    ):
+        if value:
+            conditions.append(condition)
+            values[placeholder] = value
+
+    client = dynamodb.meta.client
+
+    def scan_segment(segment: int) -> dict:
+        kwargs = {"TableName": table_name, "Segment": segment, "TotalSegments": total}
+        kwargs["Limit"] = limit
+        if conditions:
+            kwargs["FilterExpression"] = " AND ".join(conditions)
+            kwargs["ExpressionAttributeValues"] = values
+            kwargs["ExpressionAttributeNames"] = _names_used(kwargs)
+        if key := state["keys"].get(str(segment)):
+            kwargs["ExclusiveStartKey"] = key
+        return client.scan(**kwargs)
+
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+        responses = list(executor.map(scan_segment, pending))
+
+    items = []
+    for segment, response in zip(pending, responses, strict=True):
+        items.extend(response["Items"])
+        if key := response.get("LastEvaluatedKey"):
+            state["keys"][str(segment)] = key
+        else:
+            state["keys"].pop(str(segment), None)
+            state["done"].append(segment)
+
+    finished = len(state["done"]) == total
+    return [to_plain(item) for item in items], None if finished else encode_token(state)
+
+
+class PredictionAggregate:
+    """Running per-bucket counts of predictions.
+
+    Every bucket counts its predictions; anomaly predictions add the anomaly count, and
+    level predictions the count of each level. A /score prediction, whose output holds one
+    `{key: value}` per model, counts as an anomaly when any of its models flagged it and
+    adds the level of each of its level models. Aggregates of disjoint sets of
+    predictions combine with `merge`.
+
+    Args:
+        bucket (str): Bucket width, one of `BUCKET_PREFIXES`.
+    """
+
+    def __init__(self, bucket: str = "minute"):
+        self.prefix = BUCKET_PREFIXES[bucket]
+        self.count = 0
+        self.counts: Counter = Counter()
+        self.anomalies: Counter = Counter()
+        self.levels: dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, items: Iterable[dict]) -> None:
+        """Folds prediction items with `timestamp` and `output` into the counts."""
+        for item in items:
+            key = item["timestamp"][: self.prefix]
+            self.count += 1
+            self.counts[key] += 1
+            output = item.get("output") or {}
+            if "is_anomaly" in output or "level" in output:
+                outputs = [output]
+            else:
+                outputs = [value for value in output.values() if isinstance(value, dict)]
+            flags = [bool(o["is_anomaly"]) for o in outputs if "is_anomaly" in o]
+            if flags:
+                self.anomalies[key] += any(flags)
+            for o in outputs:
+                if "level" in o:
+                    self.levels[key][o["level"]] += 1
+
+    def merge(self, other: "PredictionAggregate") -> None:
+        """Adds the counts of another aggregate with the same bucket width."""
+        self.count += other.count
+        self.counts.update(other.counts)
+        self.anomalies.update(other.anomalies)
+        for key, levels in other.levels.items():
+            self.levels[key].update(levels)
+
+    def buckets(self) -> list[dict]:
+        """Returns one entry per non-empty bucket, in time order, with its anomaly rate."""
+        buckets = []
+        for key in sorted(self.counts):
+            entry = {"bucket": key, "count": self.counts[key]}
+            if key in self.anomalies:
+                entry["anomalies"] = self.anomalies[key]
+                entry["anomaly_rate"] = self.anomalies[key] / self.counts[key]
+            if key in self.levels:
+                entry["levels"] = dict(self.levels[key])
+            buckets.append(entry)
+        return buckets
+
+
+def aggregate_predictions(items: Iterable[dict], bucket: str = "minute") -> list[dict]:
+    """Aggregates predictions into time buckets; see `PredictionAggregate`.
+
+    Args:
+        items (Iterable[dict]): Prediction items with `timestamp` and `output`.
+        bucket (str): Bucket width, one of `BUCKET_PREFIXES`.
+
+    Returns:
+        list[dict]: One entry per non-empty bucket, in time order.
+    """
+    aggregate = PredictionAggregate(bucket)
+    aggregate.add(items)
+    return aggregate.buckets()
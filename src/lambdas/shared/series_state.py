@@ -0,0 +1,103 @@
+import dataclasses
+import logging
+from collections.abc import Callable
+
+from common.rolling import RollingState
+
+logger = logging.getLogger(__name__)
+
+
+class StateConflict(RuntimeError):
+    """The state of a series kept changing under concurrent updates."""
+
+
+class SeriesStateStore:
+    """Keeps the packed `RollingState` of each series in DynamoDB.
+
+    Items are `{"series_key", "state" (binary), "seq"}`. Writes are conditional on `seq`, so
+    two invocations updating the same series at once cannot overwrite each other: the
+    loser re-reads the newer state and applies its values on top of it.
+    """
+
+    def __init__(self, dynamodb, table_name: str = "series-state", max_retries: int = 3):
+        self.dynamodb = dynamodb
+        self.table_name = table_name
+        self.max_retries = max_retries
+
+    def load(
+        self, series_key: str, initial: RollingState | None = None
+    ) -> tuple[RollingState, int]:
+        """Reads the state of a series.
+
+        Args:
+            series_key (str): The series, e.g. "<model_name>#<version>#<series_id>".
+            initial (RollingState | None): State of a series that was never written.
+
+        Returns:
+            tuple[RollingState, int]: The state (a copy of `initial` if never written) and
+                its sequence number (0 if never written).
+        """
+        response = self.dynamodb.meta.client.get_item(
+            TableName=self.table_name, Key={"series_key": series_key}, ConsistentRead=True
+        )
+        item = response.get("Item")
+        if item is None:
+            return dataclasses.replace(initial or RollingState()), 0
+        return RollingState.unpack(item["state"]), int(item["seq"])
+
+    def save(self, series_key: str, state: RollingState, seq: int) -> bool:
+        """Writes a state if the stored one is still at sequence number `seq`.
+
+        Args:
+            series_key (str): The series.
+            state (RollingState): The new state.
+            seq (int): The sequence number the state was loaded at.
+
+        Returns:
+            bool: False if another writer got there first.
+        """
+        kwargs = {
+            "TableName": self.table_name,
+            "Item": {"series_key": series_key, "state": state.pack(), "seq": seq + 1},
+        }
+        if seq:
+            kwargs["ConditionExpression"] = "seq = :seq"
+            kwargs["ExpressionAttributeValues"] = {":seq": seq}
+        else:
+            kwargs["ConditionExpression"] = "attribute_not_exists(series_key)"
+        try:
+            self.dynamodb.meta.client.put_item(**kwargs)
+        except Exception as e:
+            code = getattr(e, "response", {}).get("Error", {}).get("Code")
+            if code == "ConditionalCheckFailedException":
+                return False
+            raise
+        return True
+
+    def apply(
+        self,
+        series_key: str,
+        update: Callable[[RollingState], object],
+        initial: RollingState | None = None,
+    ):
+        """Loads a state, applies `update` to it in place and saves it, retrying on conflict.
+
+        Args:
+            series_key (str): The series.
+            update (Callable[[RollingState], object]): Mutates the state; its result is
+                returned from the attempt that was saved.
+            initial (RollingState | None): State of a series that was never written.
+
+        Returns:
+            tuple: The result of `update` and the saved state.
+
+        Raises:
+            StateConflict: If every attempt lost to a concurrent writer.
+        """
+        for _ in range(self.max_retries + 1):
+            state, seq = self.load(series_key, initial)
+            result = update(state)
+            if self.save(series_key, state, seq):
+                return result, state
+            logger.info(f"State of {series_key} changed concurrently, retrying")
+        raise StateConflict(f"Could not update {series_key} after {self.max_retries} retries")
@@ -0,0 +1,191 @@
+"""Per-stage latency of the serving path, and an opt-in sampling profiler for slow requests.
+
+`Tracer.stage` times one step of a request (alias resolution, registry read, S3 download,
+predict, persistence, ...). At the end of the invocation every stage is recorded as an
+observation of the `StageLatency` distribution, with `stage`, `start` (cold or warm) and
+`model_version` dimensions, and emitted with the handler's other metrics.
+
+With PROFILE_SLOW_MS set, a background thread samples the stack of the request thread
+every PROFILE_INTERVAL_MS while a request runs, and the stack of any other thread, such as
+an I/O pool worker, while it runs one of the request's stages. Requests slower than the
+threshold get their samples written to PROFILE_DIR in collapsed-stack format (one
+"frame;frame;frame count" line per stack, readable by flamegraph.pl and speedscope) and
+their hottest stacks logged.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+logger = logging.getLogger(__name__)
+
+STAGE_METRIC = "StageLatency"
+
+
+class SamplingProfiler:
+    """Samples the call stacks of a set of threads at a fixed interval from a daemon thread."""
+
+    def __init__(self, interval_seconds: float = 0.005, max_depth: int = 64):
+        self.interval_seconds = interval_seconds
+        self.max_depth = max_depth
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        # Thread id -> number of times it was added and not yet removed
+        self._threads: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def start(self, thread_id: int) -> None:
+        """Starts sampling the thread with identifier `thread_id`."""
+        self.samples = Counter()
+        with self._lock:
+            self._threads = Counter({thread_id: 1})
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add_thread(self, thread_id: int) -> None:
+        """Samples `thread_id` too, until a matching `remove_thread`."""
+        with self._lock:
+            self._threads[thread_id] += 1
+
+    def remove_thread(self, thread_id: int) -> None:
+        """Undoes one `add_thread`."""
+        with self._lock:
+            self._threads[thread_id] -= 1
+            if self._threads[thread_id] <= 0:
+                del self._threads[thread_id]
+
+    def stop(self) -> Counter:
+        """Stops sampling and returns the number of samples per collapsed stack."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        return self.samples
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            with self._lock:
+                thread_ids = list(self._threads)
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+                    )
+                    frame = frame.f_back
+                if stack:
+                    self.samples[";".join(reversed(stack))] += 1
+
+
+class Tracer:
+    """Times the stages of each invocation and records them as tagged distributions.
+
+    Handlers call `begin` when an invocation starts and `end` before flushing metrics.
+    Stages timed after `end` (such as the metrics flush itself) keep the tags of the
+    invocation they belong to and are emitted with the next one. Like the handlers, a
+    tracer serves one invocation at a time, but that invocation's stages may run on
+    several threads at once; each thread is profiled while it is inside a stage.
+    """
+
+    def __init__(
+        self,
+        metrics,
+        slow_ms: float | None = None,
+        profile_dir: str | None = None,
+        sample_interval_ms: float | None = None,
+    ):
+        self.metrics = metrics
+        slow = os.environ.get("PROFILE_SLOW_MS")
+        self.slow_ms = slow_ms if slow_ms is not None else (float(slow) if slow else None)
+        self.profile_dir = profile_dir or os.environ.get("PROFILE_DIR", "/tmp/profiles")
+        interval_ms = sample_interval_ms or float(os.environ.get("PROFILE_INTERVAL_MS", "5"))
+        self.profiler = SamplingProfiler(interval_ms / 1000) if self.slow_ms is not None else None
+        self.invocations = 0
+        self._tags: dict[str, str] = {"start": "init"}
+        self._stages: list[tuple[str, float, dict[str, str]]] = []
+        self._started = 0.0
+
+    def begin(self) -> None:
+        """Starts an invocation; the first one of the process is tagged as a cold start."""
+        self._tags = {"start": "cold" if self.invocations == 0 else "warm"}
+        self.invocations += 1
+        self._started = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.start(threading.get_ident())
+
+    def tag(self, **tags: str | None) -> None:
+        """Adds dimensions, such as the resolved `model_version`, to this invocation's stages."""
+        self._tags.update({k: str(v) for k, v in tags.items() if v is not None})
+
+    def stage(self, name: str) -> "_StageTimer":
+        """Times the enclosed `with` block as stage `name` of the current invocation."""
+        return _StageTimer(self, name)
+
+    def end(self) -> float:
+        """Records the stages timed so far and handles profiling of a slow request.
+
+        Returns:
+            float: Milliseconds since `begin`.
+        """
+        elapsed_ms = (time.perf_counter() - self._started) * 1000
+        stages, self._stages = self._stages, []
+        for name, milliseconds, tags in stages:
+            dimensions = {"stage": name, "model_version": "unknown", **tags}
+            self.metrics.add_timing(STAGE_METRIC, milliseconds, dimensions)
+
+        if self.profiler is not None:
+            samples = self.profiler.stop()
+            if elapsed_ms >= self.slow_ms and samples:
+                self._dump_profile(samples, elapsed_ms)
+        return elapsed_ms
+
+    def _dump_profile(self, samples: Counter, elapsed_ms: float) -> None:
+        self.metrics.add_count("SlowRequestProfiled", 1)
+        path = os.path.join(
+            self.profile_dir, f"profile-{int(time.time() * 1000)}-{self.invocations}.folded"
+        )
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            with open(path, "w") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in samples.most_common())
+        except OSError:
+            logger.exception(f"Could not write profile to {path}")
+            path = None
+
+        total = sum(samples.values())
+        hottest = "\n".join(
+            f"  {count / total:6.1%}  {' > '.join(stack.split(';')[-3:])}"
+            for stack, count in samples.most_common(5)
+        )
+        logger.warning(
+            f"Slow request took {elapsed_ms:.1f} ms ({self._tags}); {total} samples saved to "
+            f"{path}; hottest stacks:\n{hottest}"
+        )
+
+
+class _StageTimer:
+    # A plain class rather than @contextmanager: stages wrap every request's hot path
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer: Tracer, name: str):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self) -> None:
+        if self.tracer.profiler is not None:
+            self.tracer.profiler.add_thread(threading.get_ident())
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        milliseconds = (time.perf_counter() - self.start) * 1000
+        self.tracer._stages.append((self.name, milliseconds, self.tracer._tags))
+        if self.tracer.profiler is not None:
+            self.tracer.profiler.remove_thread(threading.get_ident())
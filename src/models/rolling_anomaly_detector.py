@@ -0,0 +1,158 @@
+import json
+from collections.abc import Iterable, Sequence
+from datetime import datetime
+
+import numpy as np
+
+from src.common.rolling import RollingDetector, RollingState
+from src.schemas.data_point import ColumnarTimeSeries, DataPoint, TimeSeries, values_of
+from src.utils.running_stats import RunningMoments
+
+
+class RollingAnomalyDetector:
+    """Streaming anomaly detector with an exponentially weighted rolling mean and variance.
+
+    Unlike `ToyAnomalyClassifier`, whose threshold is frozen at training time, the
+    threshold follows the series: every update moves the rolling mean and variance, at O(1)
+    cost per value. Training only seeds the starting state; `state_bytes` and
+    `load_state_bytes` move the state between processes as a 24-byte record.
+    """
+
+    def __init__(self, alpha: float = 0.05, threshold_sigmas: float = 3.0, warmup: int = 30):
+        self.detector = RollingDetector(
+            alpha=alpha, threshold_sigmas=threshold_sigmas, warmup=warmup
+        )
+        self.state = RollingState()
+        self._moments = RunningMoments()
+
+    @property
+    def mean(self) -> float:
+        return self.state.mean
+
+    @property
+    def std(self) -> float:
+        return self.state.std
+
+    def fit(self, data: TimeSeries | ColumnarTimeSeries) -> None:
+        """Seeds the rolling state with the mean and variance of the training data.
+
+        Args:
+            data (TimeSeries | ColumnarTimeSeries): The time series data to fit the model on.
+        """
+        self.fit_stream([data])
+
+    def partial_fit(self, chunk: ColumnarTimeSeries | Sequence[float] | np.ndarray) -> None:
+        """Accumulates one more chunk of training values into the starting state.
+
+        Args:
+            chunk (ColumnarTimeSeries | Sequence[float] | np.ndarray): The values to accumulate.
+        """
+        self._moments.update(values_of(chunk))
+        self.state = RollingState(
+            count=self._moments.count, mean=self._moments.mean, variance=self._moments.variance
+        )
+
+    def fit_stream(
+        self, chunks: Iterable[ColumnarTimeSeries | Sequence[float] | np.ndarray]
+    ) -> None:
+        """Seeds the rolling state from scratch on a stream of chunks in constant memory.
+
+        Args:
+            chunks (Iterable[ColumnarTimeSeries | Sequence[float] | np.ndarray]): The chunks
+                to fit the model on.
+        """
+        self._moments = RunningMoments()
+        self.state = RollingState()
+        for chunk in chunks:
+            self.partial_fit(chunk)
+
+    def predict(self, data_point: DataPoint) -> bool:
+        """Predicts whether the given data point is an anomaly, without updating the state.
+
+        Args:
+            data_point (DataPoint): The data point to evaluate.
+
+        Returns:
+            bool: True if the data point is an anomaly, False otherwise.
+        """
+        return self.detector.is_anomaly(self.state, data_point.value)
+
+    def predict_batch(
+        self, values: ColumnarTimeSeries | Sequence[float] | np.ndarray
+    ) -> np.ndarray:
+        """Predicts anomalies for many values against the current state, without updating it.
+
+        Args:
+            values (ColumnarTimeSeries | Sequence[float] | np.ndarray): The values to evaluate.
+
+        Returns:
+            np.ndarray: Boolean array, True where the value is an anomaly.
+        """
+        values = values_of(values)
+        if self.state.count < self.detector.warmup:
+            return np.zeros(values.shape, dtype=bool)
+        return values > self.state.mean + self.detector.threshold_sigmas * self.state.std
+
+    def update(self, data_point: DataPoint) -> bool:
+        """Scores a data point, then folds it into the rolling state.
+
+        Args:
+            data_point (DataPoint): The newest data point of the series.
+
+        Returns:
+            bool: True if the data point is an anomaly, False otherwise.
+        """
+        return self.detector.update(self.state, data_point.value)
+
+    def update_batch(self, values: ColumnarTimeSeries | Sequence[float] | np.ndarray) -> np.ndarray:
+        """Scores and folds in consecutive values, oldest first.
+
+        Each value is scored against the state left by the values before it, exactly as if
+        `update` had been called once per value.
+
+        Args:
+            values (ColumnarTimeSeries | Sequence[float] | np.ndarray): The new values.
+
+        Returns:
+            np.ndarray: Boolean array, True where the value is an anomaly.
+        """
+        flags = self.detector.update_batch(self.state, values_of(values).tolist())
+        return np.array(flags, dtype=bool)
+
+    def state_bytes(self) -> bytes:
+        """Returns the packed rolling state."""
+        return self.state.pack()
+
+    def load_state_bytes(self, data: bytes) -> None:
+        """Restores a rolling state packed with `state_bytes`.
+
+        Args:
+            data (bytes): The packed state.
+        """
+        self.state = RollingState.unpack(data)
+
+    def to_dict(self) -> dict:
+        """Serializes model parameters and the starting state to dictionary.
+
+        Returns:
+            dict: Model parameters including version metadata.
+        """
+        return {
+            "alpha": self.detector.alpha,
+            "threshold_sigmas": self.detector.threshold_sigmas,
+            "warmup": self.detector.warmup,
+            "count": int(self.state.count),
+            "mean": float(self.state.mean),
+            "std": float(self.state.std),
+            "model_type": "RollingAnomalyDetector",
+            "version": datetime.utcnow().isoformat(),
+        }
+
+    def save_model(self, file_path: str) -> None:
+        """Saves the model parameters to a JSON file.
+
+        Args:
+            file_path (str): The path to the file where the model will be saved.
+        """
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f)
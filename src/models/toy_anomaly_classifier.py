@@ -1,27 +1,71 @@
 import json
+from collections.abc import Iterable, Sequence
 from datetime import datetime
 
 import numpy as np
 
-from src.schemas.data_point import DataPoint, TimeSeries
+from src.schemas.data_point import ColumnarTimeSeries, DataPoint, TimeSeries, values_of
+from src.utils.running_stats import RunningMoments
+
+DEFAULT_THRESHOLD_MULTIPLIER = 3.0
 
 
 class ToyAnomalyClassifier:
-    def __init__(self) -> None:
+    def __init__(self, threshold_multiplier: float = DEFAULT_THRESHOLD_MULTIPLIER) -> None:
+        """
+        Args:
+            threshold_multiplier (float): Values above mean + threshold_multiplier * std
+                are anomalies; see `src.train.backtest` for choosing it.
+        """
+        self.threshold_multiplier = threshold_multiplier
         self.mean = None
         self.std = None
-        self.threshold = None
+        self._moments = RunningMoments()
 
-    def fit(self, data: TimeSeries) -> None:
+    def fit(self, data: TimeSeries | ColumnarTimeSeries) -> None:
         """Fits the model to the provided time series data.
 
         Args:
-            data (TimeSeries): The time series data to fit the model on.
+            data (TimeSeries | ColumnarTimeSeries): The time series data to fit the model on.
+        """
+        self.fit_stream([data])
+
+    def partial_fit(self, chunk: ColumnarTimeSeries | Sequence[float] | np.ndarray) -> None:
+        """Updates the model with one more chunk of values.
+
+        The model stays unfitted until it has seen at least one value, so empty chunks
+        leave it as it was.
+
+        Args:
+            chunk (ColumnarTimeSeries | Sequence[float] | np.ndarray): The values to accumulate.
+        """
+        self._moments.update(values_of(chunk))
+        if self._moments.count == 0:
+            return
+        self.mean = self._moments.mean
+        self.std = self._moments.std
+
+    @property
+    def threshold(self) -> float | None:
+        """Values above this are anomalies; None until the model is fitted."""
+        if self.mean is None:
+            return None
+        return self.mean + self.threshold_multiplier * self.std
+
+    def fit_stream(
+        self, chunks: Iterable[ColumnarTimeSeries | Sequence[float] | np.ndarray]
+    ) -> None:
+        """Fits the model from scratch on a stream of chunks in constant memory.
+
+        Args:
+            chunks (Iterable[ColumnarTimeSeries | Sequence[float] | np.ndarray]): The chunks
+                to fit the model on.
         """
-        values_stream = [d.value for d in data.data_points]
-        self.mean = np.mean(values_stream)
-        self.std = np.std(values_stream)
-        self.threshold = self.mean + 3 * self.std
+        self._moments = RunningMoments()
+        self.mean = None
+        self.std = None
+        for chunk in chunks:
+            self.partial_fit(chunk)
 
     def predict(self, data_point: DataPoint) -> bool:
         """Predicts whether the given data point is an anomaly.
@@ -34,6 +78,19 @@ class ToyAnomalyClassifier:
         """
         return data_point.value > self.threshold
 
+    def predict_batch(
+        self, values: ColumnarTimeSeries | Sequence[float] | np.ndarray
+    ) -> np.ndarray:
+        """Predicts anomalies for many values in a single vectorized pass.
+
+        Args:
+            values (ColumnarTimeSeries | Sequence[float] | np.ndarray): The values to evaluate.
+
+        Returns:
+            np.ndarray: Boolean array, True where the value is an anomaly.
+        """
+        return values_of(values) > self.threshold
+
     def to_dict(self) -> dict:
         """Serializes model parameters to dictionary.
 
@@ -44,6 +101,7 @@ class ToyAnomalyClassifier:
             "mean": float(self.mean),
             "std": float(self.std),
             "threshold": float(self.threshold),
+            "threshold_multiplier": float(self.threshold_multiplier),
             "model_type": "ToyAnomalyClassifier",
             "version": datetime.utcnow().isoformat(),
         }
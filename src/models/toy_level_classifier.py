@@ -1,24 +1,69 @@
 import json
+from collections.abc import Iterable, Sequence
 from datetime import datetime
 
-from src.schemas.data_point import DataPoint, TimeSeries
+import numpy as np
+
+from src.schemas.data_point import ColumnarTimeSeries, DataPoint, TimeSeries, values_of
+from src.utils.running_stats import RunningMoments
+
+DEFAULT_HIGH_CUTOFF = 1.5
+DEFAULT_LOW_CUTOFF = -1.5
 
 
 class ToyLevelClassifier:
-    def __init__(self) -> None:
+    def __init__(
+        self, high_cutoff: float = DEFAULT_HIGH_CUTOFF, low_cutoff: float = DEFAULT_LOW_CUTOFF
+    ) -> None:
+        """
+        Args:
+            high_cutoff (float): Deviations (in standard deviations) above this are "high".
+            low_cutoff (float): Deviations below this are "low"; see `src.train.backtest`
+                for choosing both.
+        """
+        self.high_cutoff = high_cutoff
+        self.low_cutoff = low_cutoff
         self.baseline_avg = None
         self.std_dev = None
+        self._moments = RunningMoments()
 
-    def fit(self, data: TimeSeries) -> None:
+    def fit(self, data: TimeSeries | ColumnarTimeSeries) -> None:
         """Fits the model to the provided time series data.
 
         Args:
-            data (TimeSeries): The time series data to fit the model on.
+            data (TimeSeries | ColumnarTimeSeries): The time series data to fit the model on.
+        """
+        self.fit_stream([data])
+
+    def partial_fit(self, chunk: ColumnarTimeSeries | Sequence[float] | np.ndarray) -> None:
+        """Updates the model with one more chunk of values.
+
+        The model stays unfitted until it has seen at least one value, so empty chunks
+        leave it as it was.
+
+        Args:
+            chunk (ColumnarTimeSeries | Sequence[float] | np.ndarray): The values to accumulate.
+        """
+        self._moments.update(values_of(chunk))
+        if self._moments.count == 0:
+            return
+        self.baseline_avg = self._moments.mean
+        self.std_dev = self._moments.std
+
+    def fit_stream(
+        self, chunks: Iterable[ColumnarTimeSeries | Sequence[float] | np.ndarray]
+    ) -> None:
+        """Fits the model from scratch on a stream of chunks in constant memory.
+
+        Args:
+            chunks (Iterable[ColumnarTimeSeries | Sequence[float] | np.ndarray]): The chunks
+                to fit the model on.
         """
-        values_stream = [d.value for d in data.data_points]
-        self.baseline_avg = sum(values_stream) / len(values_stream)
-        variance = sum((x - self.baseline_avg) ** 2 for x in values_stream) / len(values_stream)
-        self.std_dev = variance**0.5
+        self._moments = RunningMoments()
+        self.baseline_avg = None
+        self.std_dev = None
+        for chunk in chunks:
+            self.partial_fit(chunk)
 
     def predict(self, data_point: DataPoint) -> str:
         """Classifies the given data point as high, normal, or low.
@@ -31,13 +76,31 @@ class ToyLevelClassifier:
         """
         deviation = (data_point.value - self.baseline_avg) / self.std_dev
 
-        if deviation > 1.5:
+        if deviation > self.high_cutoff:
             return "high"
-        elif deviation < -1.5:
+        elif deviation < self.low_cutoff:
             return "low"
         else:
             return "normal"
 
+    def predict_batch(
+        self, values: ColumnarTimeSeries | Sequence[float] | np.ndarray
+    ) -> np.ndarray:
+        """Classifies many values in a single vectorized pass.
+
+        Args:
+            values (ColumnarTimeSeries | Sequence[float] | np.ndarray): The values to classify.
+
+        Returns:
+            np.ndarray: Array of "high", "normal", or "low" labels.
+        """
+        deviation = (values_of(values) - self.baseline_avg) / self.std_dev
+        return np.select(
+            [deviation > self.high_cutoff, deviation < self.low_cutoff],
+            ["high", "low"],
+            default="normal",
+        )
+
     def to_dict(self) -> dict:
         """Serializes model parameters to dictionary.
 
@@ -47,6 +110,8 @@ class ToyLevelClassifier:
         return {
             "baseline_avg": self.baseline_avg,
             "std_dev": self.std_dev,
+            "high_cutoff": float(self.high_cutoff),
+            "low_cutoff": float(self.low_cutoff),
             "model_type": "ToyLevelClassifier",
             "version": datetime.now().isoformat(),
         }
@@ -1,6 +1,8 @@
 from collections.abc import Sequence
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class DataPoint:
@@ -11,3 +13,125 @@ class DataPoint:
 @dataclass
 class TimeSeries:
     data_points: Sequence[DataPoint]
+
+
+def to_epoch_seconds(raw: np.ndarray) -> np.ndarray:
+    """Converts epoch numbers or ISO-8601 strings to int64 epoch seconds.
+
+    Args:
+        raw (np.ndarray): Numeric epochs, numeric strings or ISO-8601 strings.
+
+    Returns:
+        np.ndarray: The timestamps as int64 epoch seconds.
+    """
+    raw = np.asarray(raw)
+    if raw.dtype.kind in "iuf":
+        return raw.astype(np.int64, copy=False)
+    if raw.dtype.kind == "M":
+        return raw.astype("datetime64[s]").astype(np.int64)
+    try:
+        return raw.astype(np.float64).astype(np.int64)
+    except ValueError:
+        pass
+
+    # Mixed or ISO-8601 strings: numeric strings would otherwise be parsed as years
+    raw = raw.astype(str)
+    numeric = np.char.isdigit(np.char.lstrip(raw, "-"))
+    epochs = np.empty(raw.shape, dtype=np.int64)
+    epochs[numeric] = raw[numeric].astype(np.int64)
+    iso = np.char.rstrip(raw[~numeric], "Z")
+    epochs[~numeric] = iso.astype("datetime64[s]").astype(np.int64)
+    return epochs
+
+
+@dataclass
+class ColumnarTimeSeries:
+    """A time series stored as two contiguous columns instead of one object per point.
+
+    `values` is float64 and `timestamps` is int64 epoch seconds. Arrays that already have
+    those dtypes are used as-is, and slicing returns views, so no data is copied.
+    """
+
+    values: np.ndarray
+    timestamps: np.ndarray
+
+    def __post_init__(self) -> None:
+        self.values = np.asarray(self.values, dtype=np.float64)
+        self.timestamps = to_epoch_seconds(self.timestamps)
+        if self.values.ndim != 1 or self.values.shape != self.timestamps.shape:
+            raise ValueError("values and timestamps must be 1-D arrays of the same length")
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int | slice) -> "DataPoint | ColumnarTimeSeries":
+        if isinstance(index, slice):
+            return ColumnarTimeSeries(values=self.values[index], timestamps=self.timestamps[index])
+        return DataPoint(value=float(self.values[index]), timestamp=str(self.timestamps[index]))
+
+    @classmethod
+    def from_data_points(cls, data_points: Sequence[DataPoint]) -> "ColumnarTimeSeries":
+        """Builds a columnar series from `DataPoint`s.
+
+        Args:
+            data_points (Sequence[DataPoint]): The points to convert.
+
+        Returns:
+            ColumnarTimeSeries: The columnar series.
+        """
+        count = len(data_points)
+        return cls(
+            values=np.fromiter((d.value for d in data_points), dtype=np.float64, count=count),
+            timestamps=np.array([d.timestamp for d in data_points]),
+        )
+
+    @classmethod
+    def from_time_series(cls, data: TimeSeries) -> "ColumnarTimeSeries":
+        """Builds a columnar series from a `TimeSeries`."""
+        return cls.from_data_points(data.data_points)
+
+    def to_data_points(self) -> list[DataPoint]:
+        """Converts the series back to `DataPoint`s with epoch-second string timestamps."""
+        return [
+            DataPoint(value=value, timestamp=timestamp)
+            for value, timestamp in zip(
+                self.values.tolist(), self.timestamps.astype(str).tolist(), strict=True
+            )
+        ]
+
+    def to_time_series(self) -> TimeSeries:
+        """Converts the series back to a `TimeSeries`."""
+        return TimeSeries(data_points=self.to_data_points())
+
+    def between(self, start: int | None = None, end: int | None = None) -> "ColumnarTimeSeries":
+        """Returns a view of the points with start <= timestamp < end.
+
+        Timestamps must be sorted in ascending order.
+
+        Args:
+            start (int | None): Inclusive lower bound in epoch seconds.
+            end (int | None): Exclusive upper bound in epoch seconds.
+
+        Returns:
+            ColumnarTimeSeries: A view over the selected range.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, start, side="left"))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, end, side="left"))
+        return self[lo:hi]
+
+
+def values_of(data: TimeSeries | ColumnarTimeSeries | Sequence[float] | np.ndarray) -> np.ndarray:
+    """Returns the values of any supported series type as a float64 array.
+
+    Args:
+        data: A `TimeSeries`, a `ColumnarTimeSeries` or plain values.
+
+    Returns:
+        np.ndarray: The values, without copying when they already are a float64 array.
+    """
+    if isinstance(data, ColumnarTimeSeries):
+        return data.values
+    if isinstance(data, TimeSeries):
+        points = data.data_points
+        return np.fromiter((d.value for d in points), dtype=np.float64, count=len(points))
+    return np.asarray(data, dtype=np.float64)
@@ -4,20 +4,21 @@ from pathlib import Path
 from dotenv import load_dotenv
 from loguru import logger
 
+from src.models.rolling_anomaly_detector import RollingAnomalyDetector
 from src.models.toy_anomaly_classifier import ToyAnomalyClassifier
-from src.schemas.data_point import DataPoint, TimeSeries
+from src.schemas.data_point import ColumnarTimeSeries, DataPoint, TimeSeries
+from src.train.datasets import DEFAULT_CHUNK_SIZE, read_dataset
 from src.utils.model_registry import register_model_version
 from src.utils.s3 import upload_model_to_s3
 
+MODEL_TYPES = {
+    "ToyAnomalyClassifier": (ToyAnomalyClassifier, "toy_anomaly_classifier"),
+    "RollingAnomalyDetector": (RollingAnomalyDetector, "rolling_anomaly_detector"),
+}
 
-def train(version: str = "v1") -> tuple[str, dict]:
-    """
-    Train anomaly classifier model.
 
-    Args:
-        version: Simple version
-    """
-    # Example usage
+def example_time_series() -> TimeSeries:
+    """Small hand-made series used when no dataset is given."""
     data_points = [
         DataPoint(value=10.0, timestamp="1622548800"),
         DataPoint(value=12.0, timestamp="1622548860"),
@@ -25,19 +26,53 @@ def train(version: str = "v1") -> tuple[str, dict]:
         DataPoint(value=13.0, timestamp="1622548980"),
         DataPoint(value=50.0, timestamp="1622549040"),  # Anomalous point
     ]
-    time_series = TimeSeries(data_points=data_points)
-
-    model = ToyAnomalyClassifier()
-    model.fit(time_series)
+    return TimeSeries(data_points=data_points)
+
+
+def train(
+    version: str = "v1",
+    series: TimeSeries | ColumnarTimeSeries | None = None,
+    dataset_path: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    model_type: str = "ToyAnomalyClassifier",
+    threshold_multiplier: float | None = None,
+) -> tuple[str, dict]:
+    """
+    Train anomaly classifier model.
 
-    model_path = f"toy_anomaly_classifier_{version}.json"
+    Args:
+        version: Simple version
+        series: In-memory series to train on, row-based or columnar
+        dataset_path: CSV, JSON-lines, NPY or NPZ file streamed in chunks; the built-in
+                      example series is used when neither this nor series is given
+        start: Only train on points with timestamp >= start (epoch or ISO-8601)
+        end: Only train on points with timestamp < end (epoch or ISO-8601)
+        chunk_size: Number of rows read per chunk
+        model_type: One of MODEL_TYPES; RollingAnomalyDetector only seeds its rolling state
+        threshold_multiplier: ToyAnomalyClassifier threshold in standard deviations above
+                              the mean, e.g. as chosen by src.train.backtest
+    """
+    model_class, file_stem = MODEL_TYPES[model_type]
+    if threshold_multiplier is not None and model_class is ToyAnomalyClassifier:
+        model = model_class(threshold_multiplier=threshold_multiplier)
+    else:
+        model = model_class()
+    if series is not None:
+        model.fit(series)
+    elif dataset_path:
+        model.fit_stream(read_dataset(dataset_path, chunk_size=chunk_size, start=start, end=end))
+    else:
+        model.fit(example_time_series())
+
+    model_path = f"{file_stem}_{version}.json"
     model.save_model(model_path)
 
-    metrics = {
-        "mean": model.mean,
-        "std": model.std,
-        "threshold": model.threshold,
-    }
+    metrics = {"mean": model.mean, "std": model.std}
+    if isinstance(model, ToyAnomalyClassifier):
+        metrics["threshold"] = model.threshold
+        metrics["threshold_multiplier"] = model.threshold_multiplier
 
     return model_path, metrics
 
@@ -46,12 +81,24 @@ if __name__ == "__main__":
     load_dotenv()
 
     version = os.environ.get("ANOMALY_CLASSIFIER_MODEL_VERSION", "v1")
+    model_type = os.environ.get("ANOMALY_CLASSIFIER_MODEL_TYPE", "ToyAnomalyClassifier")
 
     bucket_name = "anomaly-classifier-models"
-    model_path, metrics = train(version)
+    model_path, metrics = train(
+        version,
+        dataset_path=os.environ.get("ANOMALY_CLASSIFIER_DATASET"),
+        start=os.environ.get("TRAINING_START"),
+        end=os.environ.get("TRAINING_END"),
+        model_type=model_type,
+        threshold_multiplier=(
+            float(os.environ["ANOMALY_THRESHOLD_MULTIPLIER"])
+            if os.environ.get("ANOMALY_THRESHOLD_MULTIPLIER")
+            else None
+        ),
+    )
 
     # Upload to S3 with versioned key
-    s3_key = f"models/{version}/toy_anomaly_classifier.json"
+    s3_key = f"models/{version}/{MODEL_TYPES[model_type][1]}.json"
     upload_model_to_s3(model_path, bucket_name, s3_key)
 
     # Register in DynamoDB
@@ -60,7 +107,9 @@ if __name__ == "__main__":
         version=version,
         s3_bucket=bucket_name,
         s3_key=s3_key,
-        model_type="ToyAnomalyClassifier",
+        model_type=model_type,
+        # Comma-separated, e.g. MODEL_ALIASES=production
+        aliases=tuple(filter(None, os.environ.get("MODEL_ALIASES", "").split(","))),
     )
 
     Path(model_path).unlink()
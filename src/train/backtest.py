@@ -0,0 +1,396 @@
+"""Backtests anomaly thresholds and level cutoffs against labelled historical data.
+
+A labelled dataset is any file `read_dataset` accepts plus a `label` column (see
+`read_labels`). Anomaly labels are truthy for anomalies; level labels are "high", "low"
+and "normal", or 1, -1 and 0.
+
+Every setting of a grid is scored in the same pass over the data. Instead of comparing
+each value with each cutoff (an n x m matrix per chunk), the cutoffs are sorted once and
+every value is placed among them with `np.searchsorted`; a histogram of those positions,
+summed from the top, is the number of values above each cutoff. That costs O(n log m)
+per chunk, keeps memory at O(chunk + m) and counts exactly what `predict_batch` would
+flag, so millions of points against hundreds of settings take seconds.
+
+Usage:
+    python -m src.train.backtest history.npz --kind anomaly --multipliers 2 2.5 3 3.5 4
+    python -m src.train.backtest history.csv --kind level --output level.json
+"""
+
+import argparse
+import json
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import asdict, dataclass
+
+import numpy as np
+from loguru import logger
+
+from src.models.toy_anomaly_classifier import ToyAnomalyClassifier
+from src.models.toy_level_classifier import ToyLevelClassifier
+from src.schemas.data_point import ColumnarTimeSeries
+from src.train.datasets import DEFAULT_CHUNK_SIZE, read_dataset, read_labels
+
+DEFAULT_MULTIPLIERS = np.round(np.arange(1.0, 6.01, 0.05), 2)
+DEFAULT_HIGH_CUTOFFS = np.round(np.arange(0.5, 4.01, 0.1), 2)
+DEFAULT_LOW_CUTOFFS = -DEFAULT_HIGH_CUTOFFS
+
+LEVEL_LABELS = {"high": 1, "low": -1, "normal": 0}
+
+
+@dataclass
+class AnomalyThresholdResult:
+    """Backtest of one anomaly threshold multiplier."""
+
+    threshold_multiplier: float
+    threshold: float
+    alerts: int
+    true_positives: int
+    precision: float
+    recall: float
+    f1: float
+    alert_rate: float
+
+
+@dataclass
+class LevelCutoffResult:
+    """Backtest of one pair of level cutoffs; precision and recall count both levels."""
+
+    high_cutoff: float
+    low_cutoff: float
+    alerts: int
+    true_positives: int
+    precision: float
+    recall: float
+    f1: float
+    alert_rate: float
+    high_precision: float
+    high_recall: float
+    low_precision: float
+    low_recall: float
+
+
+def count_exceedances(scores: np.ndarray, cutoffs: np.ndarray) -> np.ndarray:
+    """Counts, for every cutoff, the scores strictly above it.
+
+    Equivalent to `(scores[:, None] > cutoffs).sum(axis=0)` without the n x m matrix.
+    NaN scores are above no cutoff, as in `predict_batch`.
+
+    Args:
+        scores (np.ndarray): The values to count.
+        cutoffs (np.ndarray): The cutoffs, in any order.
+
+    Returns:
+        np.ndarray: int64 counts in the order of `cutoffs`.
+    """
+    scores = scores[~np.isnan(scores)]
+    order = np.argsort(cutoffs, kind="stable")
+    # Position i means sorted_cutoffs[i - 1] < score <= sorted_cutoffs[i]: above i cutoffs
+    positions = np.searchsorted(cutoffs[order], scores, side="left")
+    histogram = np.bincount(positions, minlength=len(cutoffs) + 1)
+    above = np.cumsum(histogram[::-1])[::-1][1:]
+    counts = np.empty(len(cutoffs), dtype=np.int64)
+    counts[order] = above
+    return counts
+
+
+def anomaly_labels(labels: np.ndarray) -> np.ndarray:
+    """Normalizes anomaly labels (booleans, 0/1 or "true"/"false" strings) to booleans."""
+    labels = np.asarray(labels)
+    if labels.dtype.kind in "US":
+        names, inverse = np.unique(labels, return_inverse=True)
+        truthy = np.array([str(name).lower() in ("1", "1.0", "true", "yes") for name in names])
+        return truthy[inverse]
+    return labels.astype(bool)
+
+
+def level_labels(labels: np.ndarray) -> np.ndarray:
+    """Normalizes level labels to 1 (high), -1 (low) and 0 (normal)."""
+    labels = np.asarray(labels)
+    if labels.dtype.kind in "US":
+        # Only the few distinct names are normalized, not every row
+        names, inverse = np.unique(labels, return_inverse=True)
+        codes = np.array([LEVEL_LABELS.get(str(name).lower(), 0) for name in names], np.int8)
+        return codes[inverse]
+    return np.sign(labels.astype(np.float64)).astype(np.int8)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray | int) -> np.ndarray:
+    numerator = np.asarray(numerator, dtype=np.float64)
+    denominator = np.broadcast_to(np.asarray(denominator, dtype=np.float64), numerator.shape)
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator), where=denominator > 0)
+
+
+def _f1(precision: np.ndarray, recall: np.ndarray) -> np.ndarray:
+    return _ratio(2 * precision * recall, precision + recall)
+
+
+class AnomalyBacktest:
+    """Accumulates how every threshold multiplier would have alerted on labelled chunks.
+
+    Thresholds are computed as `ToyAnomalyClassifier` computes them, so the counts match
+    its `predict_batch` exactly.
+    """
+
+    def __init__(self, mean: float, std: float, multipliers: Sequence[float]):
+        self.multipliers = np.asarray(multipliers, dtype=np.float64)
+        self.thresholds = mean + self.multipliers * std
+        self.count = 0
+        self.positives = 0
+        self.alerts = np.zeros(len(self.multipliers), dtype=np.int64)
+        self.true_positives = np.zeros(len(self.multipliers), dtype=np.int64)
+
+    def update(self, values: np.ndarray, labels: np.ndarray) -> None:
+        """Scores one chunk of values against every threshold.
+
+        Args:
+            values (np.ndarray): The chunk's values.
+            labels (np.ndarray): Its anomaly labels, see `anomaly_labels`.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        labels = anomaly_labels(labels)
+        self.count += len(values)
+        self.positives += int(labels.sum())
+        self.alerts += count_exceedances(values, self.thresholds)
+        self.true_positives += count_exceedances(values[labels], self.thresholds)
+
+    def results(self) -> list[AnomalyThresholdResult]:
+        """Returns precision, recall and alert rate for each multiplier, in grid order."""
+        precision = _ratio(self.true_positives, self.alerts)
+        recall = _ratio(self.true_positives, self.positives)
+        f1 = _f1(precision, recall)
+        alert_rate = _ratio(self.alerts, self.count)
+        return [
+            AnomalyThresholdResult(
+                threshold_multiplier=float(self.multipliers[i]),
+                threshold=float(self.thresholds[i]),
+                alerts=int(self.alerts[i]),
+                true_positives=int(self.true_positives[i]),
+                precision=float(precision[i]),
+                recall=float(recall[i]),
+                f1=float(f1[i]),
+                alert_rate=float(alert_rate[i]),
+            )
+            for i in range(len(self.multipliers))
+        ]
+
+
+class LevelBacktest:
+    """Accumulates how every pair of level cutoffs would have classified labelled chunks.
+
+    High and low cutoffs are counted separately, each against its own grid, and combined
+    into the full high x low grid by broadcasting. Every low cutoff must be below every
+    high cutoff so that no value is both "high" and "low".
+    """
+
+    def __init__(
+        self,
+        baseline_avg: float,
+        std_dev: float,
+        high_cutoffs: Sequence[float],
+        low_cutoffs: Sequence[float],
+    ):
+        self.baseline_avg = baseline_avg
+        self.std_dev = std_dev
+        self.high_cutoffs = np.asarray(high_cutoffs, dtype=np.float64)
+        self.low_cutoffs = np.asarray(low_cutoffs, dtype=np.float64)
+        if self.low_cutoffs.max() >= self.high_cutoffs.min():
+            raise ValueError("Every low cutoff must be below every high cutoff")
+        self.count = 0
+        self.high_positives = 0
+        self.low_positives = 0
+        self.high_alerts = np.zeros(len(self.high_cutoffs), dtype=np.int64)
+        self.high_true_positives = np.zeros(len(self.high_cutoffs), dtype=np.int64)
+        self.low_alerts = np.zeros(len(self.low_cutoffs), dtype=np.int64)
+        self.low_true_positives = np.zeros(len(self.low_cutoffs), dtype=np.int64)
+
+    def update(self, values: np.ndarray, labels: np.ndarray) -> None:
+        """Classifies one chunk of values with every cutoff.
+
+        Args:
+            values (np.ndarray): The chunk's values.
+            labels (np.ndarray): Its level labels, see `level_labels`.
+        """
+        deviation = (np.asarray(values, dtype=np.float64) - self.baseline_avg) / self.std_dev
+        labels = level_labels(labels)
+        high, low = labels == 1, labels == -1
+        self.count += len(deviation)
+        self.high_positives += int(high.sum())
+        self.low_positives += int(low.sum())
+        self.high_alerts += count_exceedances(deviation, self.high_cutoffs)
+        self.high_true_positives += count_exceedances(deviation[high], self.high_cutoffs)
+        # deviation < cutoff exactly when -deviation > -cutoff
+        self.low_alerts += count_exceedances(-deviation, -self.low_cutoffs)
+        self.low_true_positives += count_exceedances(-deviation[low], -self.low_cutoffs)
+
+    def results(self) -> list[LevelCutoffResult]:
+        """Returns the metrics of every (high, low) pair, high cutoffs varying slowest."""
+        alerts = self.high_alerts[:, None] + self.low_alerts[None, :]
+        true_positives = self.high_true_positives[:, None] + self.low_true_positives[None, :]
+        precision = _ratio(true_positives, alerts)
+        recall = _ratio(true_positives, self.high_positives + self.low_positives)
+        f1 = _f1(precision, recall)
+        alert_rate = _ratio(alerts, self.count)
+        high_precision = _ratio(self.high_true_positives, self.high_alerts)
+        high_recall = _ratio(self.high_true_positives, self.high_positives)
+        low_precision = _ratio(self.low_true_positives, self.low_alerts)
+        low_recall = _ratio(self.low_true_positives, self.low_positives)
+        return [
+            LevelCutoffResult(
+                high_cutoff=float(self.high_cutoffs[h]),
+                low_cutoff=float(self.low_cutoffs[lo]),
+                alerts=int(alerts[h, lo]),
+                true_positives=int(true_positives[h, lo]),
+                precision=float(precision[h, lo]),
+                recall=float(recall[h, lo]),
+                f1=float(f1[h, lo]),
+                alert_rate=float(alert_rate[h, lo]),
+                high_precision=float(high_precision[h]),
+                high_recall=float(high_recall[h]),
+                low_precision=float(low_precision[lo]),
+                low_recall=float(low_recall[lo]),
+            )
+            for h in range(len(self.high_cutoffs))
+            for lo in range(len(self.low_cutoffs))
+        ]
+
+
+def select_best(
+    results: Iterable[AnomalyThresholdResult | LevelCutoffResult],
+    max_alert_rate: float | None = None,
+) -> AnomalyThresholdResult | LevelCutoffResult:
+    """Picks the setting with the best F1, preferring fewer alerts on ties.
+
+    Args:
+        results (Iterable[AnomalyThresholdResult | LevelCutoffResult]): Backtest results.
+        max_alert_rate (float | None): Only consider settings alerting on at most this
+            fraction of points.
+
+    Returns:
+        AnomalyThresholdResult | LevelCutoffResult: The chosen setting.
+
+    Raises:
+        ValueError: If no setting stays within `max_alert_rate`.
+    """
+    candidates = [r for r in results if max_alert_rate is None or r.alert_rate <= max_alert_rate]
+    if not candidates:
+        raise ValueError(f"No setting alerts on at most {max_alert_rate:.4%} of points")
+    return max(candidates, key=lambda r: (r.f1, -r.alerts))
+
+
+def labelled_chunks(
+    path: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[ColumnarTimeSeries, np.ndarray]]:
+    """Streams a labelled dataset as (chunk, labels) pairs."""
+    yield from zip(
+        read_dataset(path, chunk_size=chunk_size),
+        read_labels(path, chunk_size=chunk_size),
+        strict=True,
+    )
+
+
+def backtest_anomaly(
+    path: str,
+    multipliers: Sequence[float] = DEFAULT_MULTIPLIERS,
+    model: ToyAnomalyClassifier | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[ToyAnomalyClassifier, list[AnomalyThresholdResult]]:
+    """Backtests anomaly threshold multipliers on a labelled dataset.
+
+    Args:
+        path (str): The labelled dataset.
+        multipliers (Sequence[float]): The multipliers to evaluate.
+        model (ToyAnomalyClassifier | None): A fitted model whose mean and std to use;
+            by default one is fitted on the dataset first, in one more pass.
+        chunk_size (int): Number of rows read per chunk.
+
+    Returns:
+        tuple[ToyAnomalyClassifier, list[AnomalyThresholdResult]]: The fitted model and
+            one result per multiplier.
+    """
+    if model is None:
+        model = ToyAnomalyClassifier()
+        model.fit_stream(read_dataset(path, chunk_size=chunk_size))
+    backtest = AnomalyBacktest(model.mean, model.std, multipliers)
+    for chunk, labels in labelled_chunks(path, chunk_size):
+        backtest.update(chunk.values, labels)
+    return model, backtest.results()
+
+
+def backtest_level(
+    path: str,
+    high_cutoffs: Sequence[float] = DEFAULT_HIGH_CUTOFFS,
+    low_cutoffs: Sequence[float] = DEFAULT_LOW_CUTOFFS,
+    model: ToyLevelClassifier | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> tuple[ToyLevelClassifier, list[LevelCutoffResult]]:
+    """Backtests every pair of level cutoffs on a labelled dataset.
+
+    Args:
+        path (str): The labelled dataset.
+        high_cutoffs (Sequence[float]): The high cutoffs to evaluate, in deviations.
+        low_cutoffs (Sequence[float]): The low cutoffs to evaluate, as stored in the
+            model (negative for values below the baseline).
+        model (ToyLevelClassifier | None): A fitted model whose baseline and deviation to
+            use; by default one is fitted on the dataset first, in one more pass.
+        chunk_size (int): Number of rows read per chunk.
+
+    Returns:
+        tuple[ToyLevelClassifier, list[LevelCutoffResult]]: The fitted model and one
+            result per pair of cutoffs.
+    """
+    if model is None:
+        model = ToyLevelClassifier()
+        model.fit_stream(read_dataset(path, chunk_size=chunk_size))
+    backtest = LevelBacktest(model.baseline_avg, model.std_dev, high_cutoffs, low_cutoffs)
+    for chunk, labels in labelled_chunks(path, chunk_size):
+        backtest.update(chunk.values, labels)
+    return model, backtest.results()
+
+
+def _load_model(kind: str, path: str) -> ToyAnomalyClassifier | ToyLevelClassifier:
+    with open(path) as f:
+        params = json.load(f)
+    if kind == "anomaly":
+        model = ToyAnomalyClassifier()
+        model.mean, model.std = params["mean"], params["std"]
+    else:
+        model = ToyLevelClassifier()
+        model.baseline_avg, model.std_dev = params["baseline_avg"], params["std_dev"]
+    return model
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest thresholds on labelled data")
+    parser.add_argument("dataset", help="Labelled CSV, JSON-lines, NPY or NPZ file")
+    parser.add_argument("--kind", choices=["anomaly", "level"], required=True)
+    parser.add_argument("--multipliers", type=float, nargs="+", default=DEFAULT_MULTIPLIERS)
+    parser.add_argument("--high-cutoffs", type=float, nargs="+", default=DEFAULT_HIGH_CUTOFFS)
+    parser.add_argument("--low-cutoffs", type=float, nargs="+", default=DEFAULT_LOW_CUTOFFS)
+    parser.add_argument(
+        "--max-alert-rate", type=float, help="Only choose settings alerting on at most this"
+    )
+    parser.add_argument("--model", help="Use this artifact's statistics instead of fitting")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--report", help="Write every setting's metrics to this JSON path")
+    parser.add_argument("--output", help="Save the model with the chosen setting here")
+    args = parser.parse_args()
+
+    model = _load_model(args.kind, args.model) if args.model else None
+    if args.kind == "anomaly":
+        model, results = backtest_anomaly(args.dataset, args.multipliers, model, args.chunk_size)
+    else:
+        model, results = backtest_level(
+            args.dataset, args.high_cutoffs, args.low_cutoffs, model, args.chunk_size
+        )
+    best = select_best(results, args.max_alert_rate)
+    logger.info(f"Evaluated {len(results)} settings; chosen: {asdict(best)}")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"chosen": asdict(best), "results": [asdict(r) for r in results]}, f)
+    if args.output:
+        if isinstance(best, AnomalyThresholdResult):
+            model.threshold_multiplier = best.threshold_multiplier
+        else:
+            model.high_cutoff, model.low_cutoff = best.high_cutoff, best.low_cutoff
+        model.save_model(args.output)
+        logger.info(f"Saved {args.output}")
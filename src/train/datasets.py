@@ -0,0 +1,192 @@
+import json
+import struct
+import zipfile
+from collections.abc import Iterator
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from src.schemas.data_point import ColumnarTimeSeries, to_epoch_seconds
+
+DEFAULT_CHUNK_SIZE = 65_536
+
+
+def read_dataset(
+    path: str | Path,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    start: int | str | None = None,
+    end: int | str | None = None,
+) -> Iterator[ColumnarTimeSeries]:
+    """Streams a training dataset in fixed-size chunks, picking the reader by file suffix.
+
+    Supported formats are CSV and JSON-lines with `timestamp` and `value` fields, NPY
+    (structured with those fields, an (n, 2) array of [timestamp, value], or plain values)
+    and NPZ with `timestamp` and `value` arrays. NPY and uncompressed NPZ members are
+    memory-mapped, so only the chunk being processed is paged in.
+
+    Args:
+        path (str | Path): The dataset file.
+        chunk_size (int): Maximum number of rows per chunk.
+        start (int | str | None): Keep rows with timestamp >= start (epoch or ISO-8601).
+        end (int | str | None): Keep rows with timestamp < end (epoch or ISO-8601).
+
+    Yields:
+        ColumnarTimeSeries: int64 epoch-second timestamps and float64 values.
+    """
+    readers = {
+        ".csv": read_csv_chunks,
+        ".jsonl": read_jsonl_chunks,
+        ".ndjson": read_jsonl_chunks,
+        ".npy": read_npy_chunks,
+        ".npz": read_npz_chunks,
+    }
+    suffix = Path(path).suffix.lower()
+    if suffix not in readers:
+        raise ValueError(f"Unsupported dataset format: {suffix}")
+
+    chunks = readers[suffix](path, chunk_size)
+    if start is None and end is None:
+        yield from chunks
+        return
+
+    lower = to_epoch_seconds(np.array([start]))[0] if start is not None else None
+    upper = to_epoch_seconds(np.array([end]))[0] if end is not None else None
+    for chunk in chunks:
+        mask = np.ones(len(chunk.values), dtype=bool)
+        if lower is not None:
+            mask &= chunk.timestamps >= lower
+        if upper is not None:
+            mask &= chunk.timestamps < upper
+        if mask.all():
+            yield chunk
+        elif mask.any():
+            yield ColumnarTimeSeries(values=chunk.values[mask], timestamps=chunk.timestamps[mask])
+
+
+def read_labels(path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Streams the `label` column of a labelled dataset, in the chunks of `read_dataset`.
+
+    CSV and JSON-lines files need a `label` column or field, NPY files a structured
+    `label` field and NPZ files a `label` member. Labels are returned as stored (numbers,
+    booleans or strings); see `src.train.backtest` for their meaning.
+
+    Args:
+        path (str | Path): The dataset file.
+        chunk_size (int): Maximum number of rows per chunk.
+
+    Yields:
+        np.ndarray: The labels of each chunk.
+    """
+    suffix = Path(path).suffix.lower()
+    if suffix == ".csv":
+        with open(path) as f:
+            header = [column.strip() for column in f.readline().split(",")]
+            column = header.index("label")
+            while lines := list(islice(f, chunk_size)):
+                yield np.loadtxt(lines, delimiter=",", dtype=str, usecols=column, ndmin=1)
+    elif suffix in (".jsonl", ".ndjson"):
+        with open(path) as f:
+            while lines := [line for line in islice(f, chunk_size) if line.strip()]:
+                yield np.array([json.loads(line)["label"] for line in lines])
+    elif suffix in (".npy", ".npz"):
+        if suffix == ".npy":
+            array = np.load(path, mmap_mode="r")
+            if not array.dtype.names or "label" not in array.dtype.names:
+                raise ValueError(f"{path} has no structured 'label' field")
+            labels = array["label"]
+        else:
+            labels = _memmap_npz_member(path, "label")
+        for offset in range(0, len(labels), chunk_size):
+            yield labels[offset : offset + chunk_size]
+    else:
+        raise ValueError(f"Unsupported dataset format: {suffix}")
+
+
+def read_csv_chunks(
+    path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[ColumnarTimeSeries]:
+    """Streams a CSV file with a header containing `timestamp` and `value` columns."""
+    with open(path) as f:
+        header = [column.strip() for column in f.readline().split(",")]
+        columns = (header.index("timestamp"), header.index("value"))
+        while lines := list(islice(f, chunk_size)):
+            table = np.loadtxt(lines, delimiter=",", dtype=str, usecols=columns, ndmin=2)
+            yield ColumnarTimeSeries(values=table[:, 1], timestamps=table[:, 0])
+
+
+def read_jsonl_chunks(
+    path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[ColumnarTimeSeries]:
+    """Streams a JSON-lines file whose records have `timestamp` and `value` fields."""
+    with open(path) as f:
+        while lines := [line for line in islice(f, chunk_size) if line.strip()]:
+            timestamps = np.empty(len(lines), dtype=object)
+            values = np.empty(len(lines), dtype=np.float64)
+            for i, line in enumerate(lines):
+                record = json.loads(line)
+                timestamps[i] = record["timestamp"]
+                values[i] = record["value"]
+            yield ColumnarTimeSeries(values=values, timestamps=timestamps.astype(str))
+
+
+def read_npy_chunks(
+    path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[ColumnarTimeSeries]:
+    """Streams a memory-mapped NPY file."""
+    array = np.load(path, mmap_mode="r")
+
+    if array.dtype.names:
+        timestamps, values = array["timestamp"], array["value"]
+    elif array.ndim == 2:
+        timestamps, values = array[:, 0], array[:, 1]
+    else:
+        timestamps, values = None, array
+
+    yield from _chunk_columns(timestamps, values, chunk_size)
+
+
+def read_npz_chunks(
+    path: str | Path, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[ColumnarTimeSeries]:
+    """Streams an NPZ file, memory-mapping its `timestamp` and `value` members if stored."""
+    timestamps = _memmap_npz_member(path, "timestamp")
+    values = _memmap_npz_member(path, "value")
+    yield from _chunk_columns(timestamps, values, chunk_size)
+
+
+def _chunk_columns(
+    timestamps: np.ndarray | None, values: np.ndarray, chunk_size: int
+) -> Iterator[ColumnarTimeSeries]:
+    for offset in range(0, len(values), chunk_size):
+        chunk_values = values[offset : offset + chunk_size]
+        if timestamps is None:
+            # Plain value arrays carry no time axis; number rows instead
+            chunk_timestamps = np.arange(offset, offset + len(chunk_values), dtype=np.int64)
+        else:
+            chunk_timestamps = timestamps[offset : offset + chunk_size]
+        yield ColumnarTimeSeries(values=chunk_values, timestamps=chunk_timestamps)
+
+
+def _memmap_npz_member(path: str | Path, name: str) -> np.ndarray:
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(f"{name}.npy")
+        if info.compress_type != zipfile.ZIP_STORED:
+            # Compressed members (np.savez_compressed) cannot be mapped
+            with archive.open(info) as member:
+                return np.lib.format.read_array(member)
+
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        name_length, extra_length = struct.unpack("<HH", f.read(30)[26:30])
+        f.seek(info.header_offset + 30 + name_length + extra_length)
+        major, _ = np.lib.format.read_magic(f)
+        if major == 1:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    return np.memmap(
+        path, dtype=dtype, mode="r", offset=offset, shape=shape, order="F" if fortran_order else "C"
+    )
@@ -0,0 +1,334 @@
+import argparse
+import json
+import os
+import time
+import traceback
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from itertools import chain
+from pathlib import Path
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from src.common.model_bundle import write_bundle
+from src.models.toy_anomaly_classifier import ToyAnomalyClassifier
+from src.models.toy_level_classifier import ToyLevelClassifier
+from src.schemas.data_point import ColumnarTimeSeries
+from src.train.datasets import DEFAULT_CHUNK_SIZE, read_dataset
+from src.utils.publisher import Artifact, ArtifactPublisher
+
+DATASET_SUFFIXES = {".csv", ".jsonl", ".ndjson", ".npy", ".npz"}
+
+# kind -> (model class, registry model name, S3 bucket)
+MODEL_KINDS = {
+    "anomaly": (ToyAnomalyClassifier, "anomaly_classifier", "anomaly-classifier-models"),
+    "level": (ToyLevelClassifier, "level_classifier", "level-classifier-models"),
+}
+
+
+@dataclass
+class TrainingTask:
+    entity_id: str
+    paths: list[str]
+    version: str
+    kinds: tuple[str, ...]
+    output_dir: str
+    start: str | None = None
+    end: str | None = None
+    chunk_size: int = DEFAULT_CHUNK_SIZE
+
+
+@dataclass
+class TaskResult:
+    entity_id: str
+    ok: bool
+    seconds: float
+    artifacts: dict[str, str] = field(default_factory=dict)
+    metrics: dict[str, dict] = field(default_factory=dict)
+    error: str | None = None
+    # kind -> "uploaded", "unchanged" or "failed", when published
+    published: dict[str, str] = field(default_factory=dict)
+
+
+def entity_model_name(base_name: str, entity_id: str) -> str:
+    """Registry model name of the per-entity model, e.g. anomaly_classifier-sensor42."""
+    return f"{base_name}-{entity_id}"
+
+
+def discover_partitions(dataset_dir: str | Path) -> dict[str, list[str]]:
+    """Maps every entity in a partitioned dataset directory to its data files.
+
+    Each supported file directly inside `dataset_dir` is one entity named after its stem,
+    and each subdirectory is one entity whose supported files are read in name order.
+
+    Args:
+        dataset_dir (str | Path): The partitioned dataset directory.
+
+    Returns:
+        dict[str, list[str]]: Entity id to data file paths.
+    """
+    partitions = {}
+    for entry in sorted(Path(dataset_dir).iterdir()):
+        if entry.is_dir():
+            files = [str(p) for p in sorted(entry.iterdir()) if p.suffix in DATASET_SUFFIXES]
+            if files:
+                partitions[entry.name] = files
+        elif entry.suffix in DATASET_SUFFIXES:
+            partitions[entry.stem] = [str(entry)]
+    return partitions
+
+
+def bundle_results(
+    results: list[TaskResult],
+    version: str,
+    output_dir: str | Path = "artifacts",
+    bundle_name: str = "fleet",
+    publish: bool = False,
+) -> dict[str, str]:
+    """Packs the successfully trained per-entity models into one bundle per kind.
+
+    Args:
+        results (list[TaskResult]): Results returned by `train_partitioned`.
+        version (str): Version of the bundle.
+        output_dir (str | Path): Where bundles are written.
+        bundle_name (str): Suffix of the bundle's registry model name.
+        publish (bool): Upload and register each bundle, with multipart uploads.
+
+    Returns:
+        dict[str, str]: Model kind to bundle location.
+    """
+    locations = {}
+    artifacts = {}
+    kinds = {kind for result in results if result.ok for kind in result.metrics}
+    for kind in sorted(kinds):
+        model_class, base_name, bucket_name = MODEL_KINDS[kind]
+        models = {r.entity_id: r.metrics[kind] for r in results if r.ok and kind in r.metrics}
+        bundle_path = Path(output_dir) / version / f"toy_{kind}_classifier.bundle"
+        bundle_path.parent.mkdir(parents=True, exist_ok=True)
+        size = write_bundle(str(bundle_path), model_class.__name__, models)
+        logger.info(f"Bundled {len(models)} {kind} models into {bundle_path} ({size} bytes)")
+        locations[kind] = str(bundle_path)
+
+        artifacts[kind] = Artifact(
+            path=str(bundle_path),
+            bucket=bucket_name,
+            key=f"models/{version}/toy_{kind}_classifier.bundle",
+            model_name=entity_model_name(base_name, bundle_name),
+            version=version,
+            model_type=model_class.__name__,
+            artifact_format="bundle",
+        )
+
+    if publish:
+        reports = ArtifactPublisher().publish(artifacts.values())
+        for kind, report in zip(artifacts, reports, strict=True):
+            if not report.ok:
+                raise RuntimeError(f"Publishing {report.uri} failed: {report.error}")
+            locations[kind] = report.uri
+    return locations
+
+
+def _read_partition(task: TrainingTask) -> Iterator[ColumnarTimeSeries]:
+    return chain.from_iterable(
+        read_dataset(path, chunk_size=task.chunk_size, start=task.start, end=task.end)
+        for path in task.paths
+    )
+
+
+def train_entity(task: TrainingTask) -> TaskResult:
+    """Trains every requested model kind for one entity in a single pass over its data.
+
+    Runs inside a worker process; errors are captured in the result instead of raised so
+    one bad partition never aborts the run.
+
+    Args:
+        task (TrainingTask): The entity to train.
+
+    Returns:
+        TaskResult: Artifacts, fitted parameters, timing and any error.
+    """
+    start = time.perf_counter()
+    result = TaskResult(entity_id=task.entity_id, ok=False, seconds=0.0)
+    try:
+        models = {kind: MODEL_KINDS[kind][0]() for kind in task.kinds}
+        rows = 0
+        for chunk in _read_partition(task):
+            rows += len(chunk)
+            for model in models.values():
+                model.partial_fit(chunk)
+        if rows == 0:
+            raise ValueError(f"No data points for entity {task.entity_id}")
+
+        entity_dir = Path(task.output_dir) / task.entity_id
+        entity_dir.mkdir(parents=True, exist_ok=True)
+        for kind, model in models.items():
+            model_path = entity_dir / f"toy_{kind}_classifier.json"
+            model.save_model(str(model_path))
+            result.metrics[kind] = model.to_dict()
+            result.artifacts[kind] = str(model_path)
+        result.ok = True
+    except Exception:
+        result.error = traceback.format_exc()
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def publish_results(results: list[TaskResult], version: str) -> None:
+    """Uploads and registers the per-entity artifacts of successful results in bulk.
+
+    Each published artifact's location in `result.artifacts` becomes its S3 URI. A result
+    with an artifact that could not be published is marked as failed.
+
+    Args:
+        results (list[TaskResult]): Results returned by `train_entity`; updated in place.
+        version (str): Version the artifacts are registered as.
+    """
+    artifacts, owners = [], []
+    for result in results:
+        if not result.ok:
+            continue
+        for kind, path in result.artifacts.items():
+            model_class, base_name, bucket_name = MODEL_KINDS[kind]
+            artifacts.append(
+                Artifact(
+                    path=path,
+                    bucket=bucket_name,
+                    key=f"models/{version}/{result.entity_id}/toy_{kind}_classifier.json",
+                    model_name=entity_model_name(base_name, result.entity_id),
+                    version=version,
+                    model_type=model_class.__name__,
+                )
+            )
+            owners.append((result, kind))
+
+    reports = ArtifactPublisher().publish(artifacts)
+    for (result, kind), report in zip(owners, reports, strict=True):
+        result.published[kind] = report.status
+        if report.ok:
+            result.artifacts[kind] = report.uri
+        else:
+            result.ok = False
+            result.error = f"Publishing {report.uri} failed: {report.error}"
+
+
+def train_partitioned(
+    dataset_dir: str | Path,
+    version: str = "v1",
+    kinds: tuple[str, ...] = ("anomaly", "level"),
+    output_dir: str | Path = "artifacts",
+    publish: bool = False,
+    workers: int | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[TaskResult]:
+    """Trains one model per entity and kind across a process pool.
+
+    Args:
+        dataset_dir (str | Path): Partitioned dataset, see `discover_partitions`.
+        version (str): Version assigned to every trained model.
+        kinds (tuple[str, ...]): Model kinds to train per entity ("anomaly", "level").
+        output_dir (str | Path): Where artifacts are written, one folder per entity.
+        publish (bool): Upload artifacts to S3 and register them in the model registry
+            once every entity is trained, see `publish_results`.
+        workers (int | None): Worker processes; defaults to the number of CPUs.
+        start (str | None): Only train on points with timestamp >= start.
+        end (str | None): Only train on points with timestamp < end.
+        chunk_size (int): Number of rows read per chunk.
+
+    Returns:
+        list[TaskResult]: One result per entity, in completion order.
+    """
+    partitions = discover_partitions(dataset_dir)
+    output_dir = Path(output_dir) / version
+    workers = workers or os.cpu_count() or 1
+    logger.info(f"Training {len(partitions)} entities x {len(kinds)} kinds on {workers} workers")
+
+    results = []
+    run_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(
+                train_entity,
+                TrainingTask(
+                    entity_id=entity_id,
+                    paths=paths,
+                    version=version,
+                    kinds=tuple(kinds),
+                    output_dir=str(output_dir),
+                    start=start,
+                    end=end,
+                    chunk_size=chunk_size,
+                ),
+            ): entity_id
+            for entity_id, paths in partitions.items()
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                result = future.result()
+            except Exception:
+                # The worker process itself died (e.g. out of memory)
+                result = TaskResult(
+                    entity_id=futures[future], ok=False, seconds=0.0, error=traceback.format_exc()
+                )
+            results.append(result)
+            if result.ok:
+                logger.info(f"[{done}/{len(futures)}] {result.entity_id} in {result.seconds:.2f}s")
+            else:
+                last_line = result.error.strip().splitlines()[-1]
+                logger.error(f"[{done}/{len(futures)}] {result.entity_id} failed: {last_line}")
+
+    wall = time.perf_counter() - run_start
+    failed = sum(not r.ok for r in results)
+    busy = sum(r.seconds for r in results)
+    logger.info(
+        f"Trained {len(results) - failed}/{len(results)} entities in {wall:.2f}s "
+        f"({busy:.2f}s of task time, {busy / wall if wall else 0:.1f}x parallelism)"
+    )
+    if publish:
+        publish_results(results, version)
+    return results
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Train one model per entity in parallel")
+    parser.add_argument("dataset_dir", help="Directory with one file or folder per entity")
+    parser.add_argument("--version", default=os.environ.get("FLEET_MODEL_VERSION", "v1"))
+    parser.add_argument(
+        "--kinds", nargs="+", choices=sorted(MODEL_KINDS), default=["anomaly", "level"]
+    )
+    parser.add_argument("--output-dir", default="artifacts")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--publish", action="store_true", help="Upload and register artifacts")
+    parser.add_argument(
+        "--bundle",
+        metavar="NAME",
+        help="Publish one bundle per kind, registered as <model>-NAME, instead of one "
+        "artifact per entity",
+    )
+    parser.add_argument("--start", default=os.environ.get("TRAINING_START"))
+    parser.add_argument("--end", default=os.environ.get("TRAINING_END"))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--report", help="Write a JSON report of every task to this path")
+    args = parser.parse_args()
+
+    results = train_partitioned(
+        args.dataset_dir,
+        version=args.version,
+        kinds=tuple(args.kinds),
+        output_dir=args.output_dir,
+        publish=args.publish and not args.bundle,
+        workers=args.workers,
+        start=args.start,
+        end=args.end,
+        chunk_size=args.chunk_size,
+    )
+    if args.bundle:
+        bundle_results(results, args.version, args.output_dir, args.bundle, args.publish)
+    if args.report:
+        Path(args.report).write_text(json.dumps([asdict(r) for r in results], indent=2))
+    raise SystemExit(1 if any(not r.ok for r in results) else 0)
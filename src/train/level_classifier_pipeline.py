@@ -4,21 +4,19 @@ from pathlib import Path
 from dotenv import load_dotenv
 from loguru import logger
 
-from src.models.toy_level_classifier import ToyLevelClassifier
-from src.schemas.data_point import DataPoint, TimeSeries
+from src.models.toy_level_classifier import (
+    DEFAULT_HIGH_CUTOFF,
+    DEFAULT_LOW_CUTOFF,
+    ToyLevelClassifier,
+)
+from src.schemas.data_point import ColumnarTimeSeries, DataPoint, TimeSeries
+from src.train.datasets import DEFAULT_CHUNK_SIZE, read_dataset
 from src.utils.model_registry import register_model_version
 from src.utils.s3 import upload_model_to_s3
 
 
-def train(version: str = "v1") -> tuple[str, dict]:
-    """
-    Train level classifier model.
-
-    Args:
-        version: Simple version (e.g., v1, v2, v3)
-                 Increment for each new training run
-    """
-    # Example usage
+def example_time_series() -> TimeSeries:
+    """Small hand-made series used when no dataset is given."""
     data_points = [
         DataPoint(value=10.0, timestamp="1622548800"),
         DataPoint(value=12.0, timestamp="1622548860"),
@@ -26,15 +24,51 @@ def train(version: str = "v1") -> tuple[str, dict]:
         DataPoint(value=13.0, timestamp="1622548980"),
         DataPoint(value=50.0, timestamp="1622549040"),  # Anomalous point
     ]
-    time_series = TimeSeries(data_points=data_points)
+    return TimeSeries(data_points=data_points)
+
+
+def train(
+    version: str = "v1",
+    series: TimeSeries | ColumnarTimeSeries | None = None,
+    dataset_path: str | None = None,
+    start: str | None = None,
+    end: str | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    high_cutoff: float = DEFAULT_HIGH_CUTOFF,
+    low_cutoff: float = DEFAULT_LOW_CUTOFF,
+) -> tuple[str, dict]:
+    """
+    Train level classifier model.
 
-    model = ToyLevelClassifier()
-    model.fit(time_series)
+    Args:
+        version: Simple version (e.g., v1, v2, v3)
+                 Increment for each new training run
+        series: In-memory series to train on, row-based or columnar
+        dataset_path: CSV, JSON-lines, NPY or NPZ file streamed in chunks; the built-in
+                      example series is used when neither this nor series is given
+        start: Only train on points with timestamp >= start (epoch or ISO-8601)
+        end: Only train on points with timestamp < end (epoch or ISO-8601)
+        chunk_size: Number of rows read per chunk
+        high_cutoff: Deviation above which a value is "high", e.g. from src.train.backtest
+        low_cutoff: Deviation below which a value is "low"
+    """
+    model = ToyLevelClassifier(high_cutoff=high_cutoff, low_cutoff=low_cutoff)
+    if series is not None:
+        model.fit(series)
+    elif dataset_path:
+        model.fit_stream(read_dataset(dataset_path, chunk_size=chunk_size, start=start, end=end))
+    else:
+        model.fit(example_time_series())
 
     model_path = f"toy_level_classifier_{version}.json"
     model.save_model(model_path)
 
-    metrics = {"baseline_avg": model.baseline_avg, "std_dev": model.std_dev}
+    metrics = {
+        "baseline_avg": model.baseline_avg,
+        "std_dev": model.std_dev,
+        "high_cutoff": model.high_cutoff,
+        "low_cutoff": model.low_cutoff,
+    }
 
     return model_path, metrics
 
@@ -45,7 +79,14 @@ if __name__ == "__main__":
     version = os.environ.get("LEVEL_CLASSIFIER_MODEL_VERSION", "v1")
 
     bucket_name = "level-classifier-models"
-    model_path, metrics = train(version)
+    model_path, metrics = train(
+        version,
+        dataset_path=os.environ.get("LEVEL_CLASSIFIER_DATASET"),
+        start=os.environ.get("TRAINING_START"),
+        end=os.environ.get("TRAINING_END"),
+        high_cutoff=float(os.environ.get("LEVEL_HIGH_CUTOFF", DEFAULT_HIGH_CUTOFF)),
+        low_cutoff=float(os.environ.get("LEVEL_LOW_CUTOFF", DEFAULT_LOW_CUTOFF)),
+    )
 
     # Upload to S3 with versioned key
     s3_key = f"models/{version}/toy_level_classifier.json"
@@ -58,6 +99,8 @@ if __name__ == "__main__":
         s3_bucket=bucket_name,
         s3_key=s3_key,
         model_type="ToyLevelClassifier",
+        # Comma-separated, e.g. MODEL_ALIASES=production
+        aliases=tuple(filter(None, os.environ.get("MODEL_ALIASES", "").split(","))),
     )
 
     Path(model_path).unlink()
@@ -0,0 +1,54 @@
+import functools
+import os
+
+import boto3
+from botocore.config import Config
+
+# Large enough for the publisher's upload threads plus their multipart workers
+MAX_POOL_CONNECTIONS = 64
+
+
+@functools.cache
+def _session() -> boto3.session.Session:
+    return boto3.session.Session(
+        aws_access_key_id=os.environ["LOCALSTACK_ACCESS_KEY_ID"],
+        aws_secret_access_key=os.environ["LOCALSTACK_SECRET_ACCESS_KEY"],
+        region_name=os.environ["LOCALSTACK_REGION_NAME"],
+    )
+
+
+def _config() -> Config:
+    return Config(
+        max_pool_connections=MAX_POOL_CONNECTIONS,
+        retries={"max_attempts": 10, "mode": "adaptive"},
+    )
+
+
+@functools.cache
+def aws_client(service: str):
+    """Returns the process-wide client for `service`, created on first use.
+
+    Clients are thread-safe and keep their connection pool, so every upload and registry
+    write of a run shares one set of connections instead of building its own client.
+
+    Args:
+        service (str): The AWS service name, e.g. "s3".
+    """
+    return _session().client(
+        service, endpoint_url=os.environ["LOCALSTACK_ENDPOINT_URL"], config=_config()
+    )
+
+
+@functools.cache
+def aws_resource(service: str):
+    """Returns the process-wide resource for `service`, created on first use.
+
+    Resources are not thread-safe; share them between threads only through
+    `resource.meta.client`.
+
+    Args:
+        service (str): The AWS service name, e.g. "dynamodb".
+    """
+    return _session().resource(
+        service, endpoint_url=os.environ["LOCALSTACK_ENDPOINT_URL"], config=_config()
+    )
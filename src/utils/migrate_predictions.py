@@ -0,0 +1,103 @@
+"""Backfills predictions stored under the old (model_name, timestamp) key into the pk/sk table.
+
+Changing the key schema of the predictions table makes `terraform apply` destroy the table
+and create an empty one. Predictions that should survive are carried over like this:
+
+    1. aws dynamodb create-backup --table-name model-predictions --backup-name pre-pk-sk
+    2. terraform apply
+    3. aws dynamodb restore-table-from-backup --backup-arn <arn from step 1> \\
+           --target-table-name model-predictions-legacy
+    4. python -m src.utils.migrate_predictions model-predictions-legacy model-predictions
+    5. aws dynamodb delete-table --table-name model-predictions-legacy
+
+Items written between steps 1 and 2 are not in the backup. The keys of a migrated item are
+derived from its old key alone, so running the script again after an interruption
+overwrites what it copied before instead of duplicating it.
+"""
+
+import argparse
+import os
+import zlib
+
+from dotenv import load_dotenv
+from loguru import logger
+
+from src.utils.aws import aws_resource
+
+DEFAULT_SHARDS = int(os.environ.get("PREDICTION_SHARDS", "8"))
+# Writer id of migrated sort keys; live writers use random ones
+MIGRATION_WRITER_ID = "0" * 16
+
+
+def migrated_item(item: dict, shards: int) -> dict | None:
+    """Returns `item` with the pk and sk attributes of the current key scheme.
+
+    The old key (model_name, timestamp) was unique, so the sequence part of the sort key is
+    a checksum of it; it also picks the shard.
+
+    Args:
+        item (dict): A prediction item of the source table.
+        shards (int): Number of partition key shards.
+
+    Returns:
+        dict | None: The item to write, or None when it has no model name, version or
+            timestamp to build keys from.
+    """
+    if "pk" in item and "sk" in item:
+        return item
+    model_name, version = item.get("model_name"), item.get("version")
+    timestamp = item.get("timestamp")
+    if not (model_name and version and timestamp):
+        return None
+    sequence = zlib.crc32(f"{model_name}#{timestamp}".encode())
+    # Same formats as the writers in src/lambdas/shared/prediction_keys.py
+    return {
+        **item,
+        "pk": f"{model_name}#{version}#{sequence % shards}",
+        "sk": f"{timestamp}#{MIGRATION_WRITER_ID}{sequence:012x}",
+    }
+
+
+def migrate_predictions(source: str, target: str, shards: int = DEFAULT_SHARDS) -> tuple[int, int]:
+    """Copies every item of `source` into `target`, adding pk/sk keys where missing.
+
+    Args:
+        source (str): Table keyed by (model_name, timestamp), e.g. restored from a backup.
+        target (str): The predictions table keyed by (pk, sk).
+        shards (int): PREDICTION_SHARDS of the Lambdas writing to `target`.
+
+    Returns:
+        tuple[int, int]: The number of items copied and the number skipped.
+    """
+    dynamodb = aws_resource("dynamodb")
+    copied = skipped = 0
+    kwargs = {}
+    with dynamodb.Table(target).batch_writer() as batch:
+        while True:
+            response = dynamodb.Table(source).scan(**kwargs)
+            for item in response["Items"]:
+                migrated = migrated_item(item, shards)
+                if migrated is None:
+                    skipped += 1
+                    continue
+                batch.put_item(Item=migrated)
+                copied += 1
+            logger.info(f"Copied {copied} predictions from {source} to {target}")
+            if "LastEvaluatedKey" not in response:
+                return copied, skipped
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+if __name__ == "__main__":
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Backfill predictions into the pk/sk table")
+    parser.add_argument("source", help="Table keyed by (model_name, timestamp)")
+    parser.add_argument("target", help="Table keyed by (pk, sk)")
+    parser.add_argument("--shards", type=int, default=DEFAULT_SHARDS)
+    args = parser.parse_args()
+
+    copied, skipped = migrate_predictions(args.source, args.target, args.shards)
+    logger.info(
+        f"Done: {copied} copied, {skipped} skipped for missing model_name/version/timestamp"
+    )
@@ -1,9 +1,39 @@
-import os
+import re
 
-import boto3
 import pendulum
 from loguru import logger
 
+from src.utils.aws import aws_resource
+
+# Mirrors src/lambdas/shared/aliases.py
+LATEST = "latest"
+ALIAS_PREFIX = "alias#"
+EXPLICIT_VERSION = re.compile(r"^v\d+$")
+
+
+def _registry_table(table_name: str):
+    return aws_resource("dynamodb").Table(table_name)
+
+
+def version_item(
+    model_name: str,
+    version: str,
+    s3_bucket: str,
+    s3_key: str,
+    model_type: str,
+    artifact_format: str = "json",
+) -> dict:
+    """Builds the registry item of a model version; see `register_model_version`."""
+    return {
+        "model_name": model_name,
+        "version": version,
+        "s3_bucket": s3_bucket,
+        "s3_key": s3_key,
+        "trained_at": pendulum.now("UTC").to_iso8601_string(),
+        "model_type": model_type,
+        "artifact_format": artifact_format,
+    }
+
 
 def register_model_version(
     model_name: str,
@@ -12,6 +42,8 @@ def register_model_version(
     s3_key: str,
     model_type: str,
     table_name: str = "model-registry",
+    artifact_format: str = "json",
+    aliases: tuple[str, ...] = (),
 ):
     """
     Register a model version in DynamoDB with simple versioning.
@@ -23,31 +55,52 @@ def register_model_version(
         s3_key: S3 key (path) to model JSON file
         model_type: Type of model class
         table_name: DynamoDB table name
+        artifact_format: "json" for a single model, "bundle" for a multi-model bundle
+        aliases: Aliases to point at this version once it is registered
 
     DynamoDB Schema:
     - PK (HASH): model_name
-    - SK (RANGE): version
-    - Attributes: s3_bucket, s3_key, trained_at, model_type
+    - SK (RANGE): version, or "alias#<alias>" for alias items
+    - GSI trained_at-index (HASH model_name, RANGE trained_at): versions only, newest last
+    - Attributes: s3_bucket, s3_key, trained_at, model_type, artifact_format
     """
-    dynamodb = boto3.resource(
-        "dynamodb",
-        endpoint_url=os.environ["LOCALSTACK_ENDPOINT_URL"],
-        aws_access_key_id=os.environ["LOCALSTACK_ACCESS_KEY_ID"],
-        aws_secret_access_key=os.environ["LOCALSTACK_SECRET_ACCESS_KEY"],
-        region_name=os.environ["LOCALSTACK_REGION_NAME"],
-    )
-    table = dynamodb.Table(table_name)
+    item = version_item(model_name, version, s3_bucket, s3_key, model_type, artifact_format)
+    _registry_table(table_name).put_item(Item=item)
 
-    item = {
-        "model_name": model_name,
-        "version": version,
-        "s3_bucket": s3_bucket,
-        "s3_key": s3_key,
-        "trained_at": pendulum.now("UTC").to_iso8601_string(),
-        "model_type": model_type,
-    }
+    logger.info(f"Registered {model_name} version {version}")
+    for alias in aliases:
+        set_alias(model_name, alias, version, table_name=table_name)
+    return version
 
-    table.put_item(Item=item)
 
-    logger.info(f"Registered {model_name} version {version}")
+def set_alias(model_name: str, alias: str, version: str, table_name: str = "model-registry"):
+    """
+    Point an alias such as "production" at a registered version.
+
+    Handlers pick up the change within their alias TTL (ALIAS_TTL_SECONDS), without
+    client changes. "latest" is not stored; it always means the newest trained_at.
+
+    Args:
+        model_name: Name of the model
+        alias: Alias name; must not look like an explicit version ("v<number>")
+        version: Registered version the alias points to
+        table_name: DynamoDB table name
+    """
+    if alias == LATEST or EXPLICIT_VERSION.match(alias) or alias.startswith(ALIAS_PREFIX):
+        raise ValueError(f"Invalid alias name: {alias}")
+
+    table = _registry_table(table_name)
+    if "Item" not in table.get_item(Key={"model_name": model_name, "version": version}):
+        raise ValueError(f"Model version not found: {model_name}@{version}")
+
+    table.put_item(
+        Item={
+            "model_name": model_name,
+            "version": f"{ALIAS_PREFIX}{alias}",
+            "target_version": version,
+            "updated_at": pendulum.now("UTC").to_iso8601_string(),
+        }
+    )
+
+    logger.info(f"Alias {model_name}@{alias} now points to {version}")
     return version
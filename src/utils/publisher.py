@@ -0,0 +1,228 @@
+import hashlib
+import itertools
+import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+from loguru import logger
+
+from src.utils.aws import aws_client, aws_resource
+from src.utils.model_registry import version_item
+from src.utils.s3 import ensure_bucket
+
+# S3 user metadata holding the MD5 of the uploaded file; multipart ETags are not MD5s
+CHECKSUM_METADATA = "content-md5-hex"
+# BatchGetItem reads at most 100 keys per call
+BATCH_GET_SIZE = 100
+
+
+@dataclass
+class Artifact:
+    """A local model artifact and the registry version it is published as."""
+
+    path: str
+    bucket: str
+    key: str
+    model_name: str
+    version: str
+    model_type: str
+    artifact_format: str = "json"
+
+    @property
+    def uri(self) -> str:
+        return f"s3://{self.bucket}/{self.key}"
+
+
+@dataclass
+class PublishResult:
+    """Outcome of publishing one artifact.
+
+    `status` is "uploaded", "unchanged" (the object already held the same bytes) or
+    "failed"; `registered` is False when the registry already pointed at the object.
+    """
+
+    model_name: str
+    version: str
+    uri: str
+    status: str
+    registered: bool = False
+    size: int = 0
+    seconds: float = 0.0
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+def file_md5(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Returns the hex MD5 digest of a file, read in chunks."""
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ArtifactPublisher:
+    """Uploads many model artifacts concurrently and registers them with batched writes.
+
+    Publishing is idempotent, so a failed run can simply be repeated:
+
+    - An artifact whose object already carries the same MD5 is not uploaded again.
+    - A version already registered at the same S3 location is not rewritten, so its
+      `trained_at`, and with it what "latest" resolves to, stays unchanged.
+
+    Artifacts above `multipart_threshold` bytes (typically bundles) are uploaded in
+    parallel parts. All uploads share the pooled clients of `src.utils.aws`.
+    """
+
+    def __init__(
+        self,
+        table_name: str = "model-registry",
+        max_workers: int = 32,
+        multipart_threshold: int = 16 * 1024 * 1024,
+        multipart_chunksize: int = 16 * 1024 * 1024,
+        s3=None,
+        dynamodb=None,
+    ):
+        self.table_name = table_name
+        self.max_workers = max_workers
+        self.s3 = s3 or aws_client("s3")
+        self.dynamodb = dynamodb or aws_resource("dynamodb")
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunksize,
+            max_concurrency=4,
+        )
+
+    def publish(self, artifacts: Iterable[Artifact]) -> list[PublishResult]:
+        """Uploads and registers artifacts.
+
+        Args:
+            artifacts (Iterable[Artifact]): The artifacts to publish.
+
+        Returns:
+            list[PublishResult]: One result per artifact, in input order. Failures are
+                reported there rather than raised.
+        """
+        artifacts = list(artifacts)
+        start = time.perf_counter()
+        for bucket in sorted({artifact.bucket for artifact in artifacts}):
+            ensure_bucket(bucket)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = list(executor.map(self._upload, artifacts))
+
+        self._register([(a, r) for a, r in zip(artifacts, results, strict=True) if r.ok])
+
+        counts = {
+            status: sum(r.status == status for r in results)
+            for status in ("uploaded", "unchanged", "failed")
+        }
+        logger.info(
+            f"Published {len(results)} artifacts in {time.perf_counter() - start:.2f}s: "
+            f"{counts['uploaded']} uploaded, {counts['unchanged']} unchanged, "
+            f"{counts['failed']} failed, {sum(r.registered for r in results)} registered"
+        )
+        return results
+
+    def _upload(self, artifact: Artifact) -> PublishResult:
+        start = time.perf_counter()
+        result = PublishResult(
+            model_name=artifact.model_name,
+            version=artifact.version,
+            uri=artifact.uri,
+            status="uploaded",
+        )
+        try:
+            checksum = file_md5(artifact.path)
+            if self._stored_checksum(artifact) == checksum:
+                result.status = "unchanged"
+            else:
+                self.s3.upload_file(
+                    artifact.path,
+                    artifact.bucket,
+                    artifact.key,
+                    ExtraArgs={"Metadata": {CHECKSUM_METADATA: checksum}},
+                    Config=self.transfer_config,
+                )
+            result.size = os.path.getsize(artifact.path)
+        except Exception as e:
+            result.status, result.error = "failed", f"{type(e).__name__}: {e}"
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def _stored_checksum(self, artifact: Artifact) -> str | None:
+        try:
+            response = self.s3.head_object(Bucket=artifact.bucket, Key=artifact.key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return response.get("Metadata", {}).get(CHECKSUM_METADATA)
+
+    def _register(self, uploaded: list[tuple[Artifact, PublishResult]]) -> None:
+        if not uploaded:
+            return
+        try:
+            existing = self._registered_locations([artifact for artifact, _ in uploaded])
+            pending = [
+                (artifact, result)
+                for artifact, result in uploaded
+                if existing.get((artifact.model_name, artifact.version))
+                != (artifact.bucket, artifact.key)
+            ]
+            table = self.dynamodb.Table(self.table_name)
+            # Sends 25 items per BatchWriteItem call and resubmits unprocessed items
+            with table.batch_writer(overwrite_by_pkeys=["model_name", "version"]) as batch:
+                for artifact, _ in pending:
+                    batch.put_item(
+                        Item=version_item(
+                            artifact.model_name,
+                            artifact.version,
+                            artifact.bucket,
+                            artifact.key,
+                            artifact.model_type,
+                            artifact.artifact_format,
+                        )
+                    )
+        except Exception as e:
+            # Some items may have been written; publishing again fills in the rest
+            logger.exception("Registering published artifacts failed")
+            for _, result in uploaded:
+                result.status, result.error = "failed", f"registration failed: {e}"
+            return
+        for _, result in pending:
+            result.registered = True
+
+    def _registered_locations(
+        self, artifacts: list[Artifact]
+    ) -> dict[tuple[str, str], tuple[str, str]]:
+        client = self.dynamodb.meta.client
+        keys = list({(a.model_name, a.version) for a in artifacts})
+        locations = {}
+        for chunk in itertools.batched(keys, BATCH_GET_SIZE, strict=False):
+            request = {
+                self.table_name: {
+                    "Keys": [{"model_name": name, "version": version} for name, version in chunk],
+                    "ProjectionExpression": "model_name, #version, s3_bucket, s3_key",
+                    "ExpressionAttributeNames": {"#version": "version"},
+                }
+            }
+            for attempt in itertools.count():
+                response = client.batch_get_item(RequestItems=request)
+                for item in response["Responses"].get(self.table_name, []):
+                    locations[(item["model_name"], item["version"])] = (
+                        item.get("s3_bucket"),
+                        item.get("s3_key"),
+                    )
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+                time.sleep(min(0.05 * 2**attempt, 1.0))
+        return locations
@@ -0,0 +1,54 @@
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass
+class RunningMoments:
+    """One-pass, numerically stable mean and variance accumulator.
+
+    Each chunk is reduced with NumPy and folded in with Chan's parallel merge, so memory
+    use is constant no matter how many values are streamed through `update`.
+    """
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    def update(self, values: Sequence[float] | np.ndarray) -> None:
+        """Folds a chunk of values into the running moments.
+
+        Args:
+            values (Sequence[float] | np.ndarray): The chunk to accumulate.
+        """
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if values.size == 0:
+            return
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(np.square(values - chunk_mean).sum())
+        self.merge(RunningMoments(count=values.size, mean=chunk_mean, m2=chunk_m2))
+
+    def merge(self, other: "RunningMoments") -> None:
+        """Merges the moments of another accumulator into this one.
+
+        Args:
+            other (RunningMoments): The accumulator to merge.
+        """
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta**2 * self.count * other.count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        """Population variance of every value seen so far."""
+        return self.m2 / self.count if self.count else 0.0
+
+    @property
+    def std(self) -> float:
+        """Population standard deviation of every value seen so far."""
+        return self.variance**0.5
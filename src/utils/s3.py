@@ -1,8 +1,35 @@
-import os
+import threading
 
-import boto3
+from botocore.exceptions import ClientError
 from loguru import logger
 
+from src.utils.aws import aws_client
+
+_known_buckets: set[str] = set()
+_bucket_lock = threading.Lock()
+
+
+def ensure_bucket(bucket_name: str) -> None:
+    """Creates an S3 bucket unless it exists, checking each bucket once per process.
+
+    Args:
+        bucket_name (str): Name of the S3 bucket.
+    """
+    if bucket_name in _known_buckets:
+        return
+    with _bucket_lock:
+        if bucket_name in _known_buckets:
+            return
+        s3 = aws_client("s3")
+        try:
+            s3.head_bucket(Bucket=bucket_name)
+        except ClientError as e:
+            if e.response["Error"]["Code"] not in ("404", "NoSuchBucket"):
+                raise
+            s3.create_bucket(Bucket=bucket_name)
+            logger.info(f"Created bucket: {bucket_name}")
+        _known_buckets.add(bucket_name)
+
 
 def upload_model_to_s3(model_path: str, bucket_name: str, object_name: str) -> None:
     """Uploads the trained model to an S3 bucket.
@@ -12,16 +39,6 @@ def upload_model_to_s3(model_path: str, bucket_name: str, object_name: str) -> N
         bucket_name (str): Name of the S3 bucket to upload the model to.
         object_name (str): S3 object name for the uploaded model.
     """
-    s3 = boto3.client(
-        "s3",
-        endpoint_url=os.environ["LOCALSTACK_ENDPOINT_URL"],
-        aws_access_key_id=os.environ["LOCALSTACK_ACCESS_KEY_ID"],
-        aws_secret_access_key=os.environ["LOCALSTACK_SECRET_ACCESS_KEY"],
-        region_name=os.environ["LOCALSTACK_REGION_NAME"],
-    )
-    if bucket_name not in [bucket["Name"] for bucket in s3.list_buckets().get("Buckets", [])]:
-        s3.create_bucket(Bucket=bucket_name)
-        logger.info(f"Created bucket: {bucket_name}")
-
-    s3.upload_file(model_path, bucket_name, object_name)
+    ensure_bucket(bucket_name)
+    aws_client("s3").upload_file(model_path, bucket_name, object_name)
     logger.info(f"Uploaded model to s3://{bucket_name}/{object_name}")
@@ -4,6 +4,9 @@ resource "aws_api_gateway_rest_api" "mlops" {
   name        = local.api_gateway_name
   description = "REST API for MLOps Lambda functions with path-based routing"
 
+  # Passed to the Lambdas base64-encoded; see src/lambdas/shared/decoding.py
+  binary_media_types = ["application/octet-stream", "application/msgpack"]
+
   endpoint_configuration {
     types = ["REGIONAL"]
   }
@@ -32,6 +35,38 @@ resource "aws_api_gateway_resource" "level" {
   path_part   = "level"
 }
 
+# Score Resource
+resource "aws_api_gateway_resource" "score" {
+  count       = var.enable_api_gateway ? 1 : 0
+  rest_api_id = aws_api_gateway_rest_api.mlops[0].id
+  parent_id   = aws_api_gateway_rest_api.mlops[0].root_resource_id
+  path_part   = "score"
+}
+
+# Anomaly Batch Resource
+resource "aws_api_gateway_resource" "anomaly_batch" {
+  count       = var.enable_api_gateway ? 1 : 0
+  rest_api_id = aws_api_gateway_rest_api.mlops[0].id
+  parent_id   = aws_api_gateway_resource.anomaly[0].id
+  path_part   = "batch"
+}
+
+# Anomaly Rolling Resource
+resource "aws_api_gateway_resource" "anomaly_rolling" {
+  count       = var.enable_api_gateway ? 1 : 0
+  rest_api_id = aws_api_gateway_rest_api.mlops[0].id
+  parent_id   = aws_api_gateway_resource.anomaly[0].id
+  path_part   = "rolling"
+}
+
+# Level Batch Resource
+resource "aws_api_gateway_resource" "level_batch" {
+  count       = var.enable_api_gateway ? 1 : 0
+  rest_api_id = aws_api_gateway_rest_api.mlops[0].id
+  parent_id   = aws_api_gateway_resource.level[0].id
+  path_part   = "batch"
+}
+
 # Anomaly POST Method
 resource "aws_api_gateway_method" "anomaly_post" {
   count            = var.enable_api_gateway ? 1 : 0
@@ -72,6 +107,170 @@ resource "aws_api_gateway_integration" "level_integration" {
   uri                     = aws_lambda_function.classify_level.invoke_arn
 }
 
+# Anomaly Batch POST Method
+resource "aws_api_gateway_method" "anomaly_batch_post" {
+  count            = var.enable_api_gateway ? 1 : 0
+  rest_api_id      = aws_api_gateway_rest_api.mlops[0].id
+  resource_id      = aws_api_gateway_resource.anomaly_batch[0].id
+  http_method      = "POST"
+  authorization    = "NONE"
+}
+
+# Anomaly Batch Integration
+resource "aws_api_gateway_integration" "anomaly_batch_integration" {
+  count                   = var.enable_api_gateway ? 1 : 0
+  rest_api_id             = aws_api_gateway_rest_api.mlops[0].id
+  resource_id             = aws_api_gateway_resource.anomaly_batch[0].id
+  http_method             = aws_api_gateway_method.anomaly_batch_post[0].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.classify_anomaly.invoke_arn
+}
+
+# Anomaly Rolling POST Method
+resource "aws_api_gateway_method" "anomaly_rolling_post" {
+  count            = var.enable_api_gateway ? 1 : 0
+  rest_api_id      = aws_api_gateway_rest_api.mlops[0].id
+  resource_id      = aws_api_gateway_resource.anomaly_rolling[0].id
+  http_method      = "POST"
+  authorization    = "NONE"
+}
+
+# Anomaly Rolling Integration
+resource "aws_api_gateway_integration" "anomaly_rolling_integration" {
+  count                   = var.enable_api_gateway ? 1 : 0
+  rest_api_id             = aws_api_gateway_rest_api.mlops[0].id
+  resource_id             = aws_api_gateway_resource.anomaly_rolling[0].id
+  http_method             = aws_api_gateway_method.anomaly_rolling_post[0].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.classify_anomaly.invoke_arn
+}
+
+# Level Batch POST Method
+resource "aws_api_gateway_method" "level_batch_post" {
+  count            = var.enable_api_gateway ? 1 : 0
+  rest_api_id      = aws_api_gateway_rest_api.mlops[0].id
+  resource_id      = aws_api_gateway_resource.level_batch[0].id
+  http_method      = "POST"
+  authorization    = "NONE"
+}
+
+# Level Batch Integration
+resource "aws_api_gateway_integration" "level_batch_integration" {
+  count                   = var.enable_api_gateway ? 1 : 0
+  rest_api_id             = aws_api_gateway_rest_api.mlops[0].id
+  resource_id             = aws_api_gateway_resource.level_batch[0].id
+  http_method             = aws_api_gateway_method.level_batch_post[0].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.classify_level.invoke_arn
+}
+
+# Predictions Resource
+resource "aws_api_gateway_resource" "predictions" {
+  count       = var.enable_api_gateway ? 1 : 0
+  rest_api_id = aws_api_gateway_rest_api.mlops[0].id
+  parent_id   = aws_api_gateway_rest_api.mlops[0].root_resource_id
+  path_part   = "predictions"
+}
+
+# Predictions Export Resource
+resource "aws_api_gateway_resource" "predictions_export" {
+  count       = var.enable_api_gateway ? 1 : 0
+  rest_api_id = aws_api_gateway_rest_api.mlops[0].id
+  parent_id   = aws_api_gateway_resource.predictions[0].id
+  path_part   = "export"
+}
+
+# Predictions Aggregate Resource
+resource "aws_api_gateway_resource" "predictions_aggregate" {
+  count       = var.enable_api_gateway ? 1 : 0
+  rest_api_id = aws_api_gateway_rest_api.mlops[0].id
+  parent_id   = aws_api_gateway_resource.predictions[0].id
+  path_part   = "aggregate"
+}
+
+# Predictions GET Method
+resource "aws_api_gateway_method" "predictions_get" {
+  count            = var.enable_api_gateway ? 1 : 0
+  rest_api_id      = aws_api_gateway_rest_api.mlops[0].id
+  resource_id      = aws_api_gateway_resource.predictions[0].id
+  http_method      = "GET"
+  authorization    = "NONE"
+}
+
+# Predictions Integration
+resource "aws_api_gateway_integration" "predictions_integration" {
+  count                   = var.enable_api_gateway ? 1 : 0
+  rest_api_id             = aws_api_gateway_rest_api.mlops[0].id
+  resource_id             = aws_api_gateway_resource.predictions[0].id
+  http_method             = aws_api_gateway_method.predictions_get[0].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.query_predictions.invoke_arn
+}
+
+# Predictions Export GET Method
+resource "aws_api_gateway_method" "predictions_export_get" {
+  count            = var.enable_api_gateway ? 1 : 0
+  rest_api_id      = aws_api_gateway_rest_api.mlops[0].id
+  resource_id      = aws_api_gateway_resource.predictions_export[0].id
+  http_method      = "GET"
+  authorization    = "NONE"
+}
+
+# Predictions Export Integration
+resource "aws_api_gateway_integration" "predictions_export_integration" {
+  count                   = var.enable_api_gateway ? 1 : 0
+  rest_api_id             = aws_api_gateway_rest_api.mlops[0].id
+  resource_id             = aws_api_gateway_resource.predictions_export[0].id
+  http_method             = aws_api_gateway_method.predictions_export_get[0].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.query_predictions.invoke_arn
+}
+
+# Predictions Aggregate GET Method
+resource "aws_api_gateway_method" "predictions_aggregate_get" {
+  count            = var.enable_api_gateway ? 1 : 0
+  rest_api_id      = aws_api_gateway_rest_api.mlops[0].id
+  resource_id      = aws_api_gateway_resource.predictions_aggregate[0].id
+  http_method      = "GET"
+  authorization    = "NONE"
+}
+
+# Predictions Aggregate Integration
+resource "aws_api_gateway_integration" "predictions_aggregate_integration" {
+  count                   = var.enable_api_gateway ? 1 : 0
+  rest_api_id             = aws_api_gateway_rest_api.mlops[0].id
+  resource_id             = aws_api_gateway_resource.predictions_aggregate[0].id
+  http_method             = aws_api_gateway_method.predictions_aggregate_get[0].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.query_predictions.invoke_arn
+}
+
+# Score POST Method
+resource "aws_api_gateway_method" "score_post" {
+  count            = var.enable_api_gateway ? 1 : 0
+  rest_api_id      = aws_api_gateway_rest_api.mlops[0].id
+  resource_id      = aws_api_gateway_resource.score[0].id
+  http_method      = "POST"
+  authorization    = "NONE"
+}
+
+# Score Integration
+resource "aws_api_gateway_integration" "score_integration" {
+  count                   = var.enable_api_gateway ? 1 : 0
+  rest_api_id             = aws_api_gateway_rest_api.mlops[0].id
+  resource_id             = aws_api_gateway_resource.score[0].id
+  http_method             = aws_api_gateway_method.score_post[0].http_method
+  integration_http_method = "POST"
+  type                    = "AWS_PROXY"
+  uri                     = aws_lambda_function.score.invoke_arn
+}
+
 # API Gateway Deployment
 resource "aws_api_gateway_deployment" "mlops" {
   count       = var.enable_api_gateway ? 1 : 0
@@ -80,6 +279,13 @@ resource "aws_api_gateway_deployment" "mlops" {
   depends_on = [
     aws_api_gateway_integration.anomaly_integration,
     aws_api_gateway_integration.level_integration,
+    aws_api_gateway_integration.anomaly_batch_integration,
+    aws_api_gateway_integration.anomaly_rolling_integration,
+    aws_api_gateway_integration.level_batch_integration,
+    aws_api_gateway_integration.score_integration,
+    aws_api_gateway_integration.predictions_integration,
+    aws_api_gateway_integration.predictions_export_integration,
+    aws_api_gateway_integration.predictions_aggregate_integration,
   ]
 }
 
@@ -109,3 +315,21 @@ resource "aws_lambda_permission" "api_gateway_level" {
   principal    = "apigateway.amazonaws.com"
   source_arn   = "${aws_api_gateway_rest_api.mlops[0].execution_arn}/*/*"
 }
+
+resource "aws_lambda_permission" "api_gateway_score" {
+  count       = var.enable_api_gateway ? 1 : 0
+  statement_id = "AllowAPIGatewayInvoke"
+  action       = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.score.function_name
+  principal    = "apigateway.amazonaws.com"
+  source_arn   = "${aws_api_gateway_rest_api.mlops[0].execution_arn}/*/*"
+}
+
+resource "aws_lambda_permission" "api_gateway_query_predictions" {
+  count       = var.enable_api_gateway ? 1 : 0
+  statement_id = "AllowAPIGatewayInvoke"
+  action       = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.query_predictions.function_name
+  principal    = "apigateway.amazonaws.com"
+  source_arn   = "${aws_api_gateway_rest_api.mlops[0].execution_arn}/*/*"
+}
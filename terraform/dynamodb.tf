@@ -15,6 +15,21 @@ resource "aws_dynamodb_table" "model_registry" {
     type = "S"
   }
 
+  attribute {
+    name = "trained_at"
+    type = "S"
+  }
+
+  # Resolves "latest" with one descending Query; alias items ("alias#<name>") have no
+  # trained_at, so only versions are indexed. A global index, unlike a local one, is
+  # added to the existing table in place and keeps its items.
+  global_secondary_index {
+    name            = "trained_at-index"
+    hash_key        = "model_name"
+    range_key       = "trained_at"
+    projection_type = "KEYS_ONLY"
+  }
+
   tags = merge(
     local.common_tags,
     {
@@ -24,19 +39,23 @@ resource "aws_dynamodb_table" "model_registry" {
 }
 
 # Model Predictions Table
+# pk = "<model_name>#<version>#<shard>" spreads writes over var.prediction_shards partitions
+# sk = "<timestamp>#<writer id><sequence>" keeps time order and never collides
+# Moving a table from the old (model_name, timestamp) key to this one replaces it and
+# drops its items; back it up first and backfill with src/utils/migrate_predictions.py.
 resource "aws_dynamodb_table" "model_predictions" {
   name           = local.model_predictions_table_name
   billing_mode   = var.dynamodb_billing_mode
-  hash_key       = "model_name"
-  range_key      = "timestamp"
+  hash_key       = "pk"
+  range_key      = "sk"
 
   attribute {
-    name = "model_name"
+    name = "pk"
     type = "S"
   }
 
   attribute {
-    name = "timestamp"
+    name = "sk"
     type = "S"
   }
 
@@ -47,3 +66,24 @@ resource "aws_dynamodb_table" "model_predictions" {
     }
   )
 }
+
+# Series State Table
+# Packed rolling mean/variance of every series scored by /anomaly/rolling,
+# key "<model_name>#<version>#<series_id>"
+resource "aws_dynamodb_table" "series_state" {
+  name           = local.series_state_table_name
+  billing_mode   = var.dynamodb_billing_mode
+  hash_key       = "series_key"
+
+  attribute {
+    name = "series_key"
+    type = "S"
+  }
+
+  tags = merge(
+    local.common_tags,
+    {
+      Name = "Series State"
+    }
+  )
+}
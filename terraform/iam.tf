@@ -42,13 +42,16 @@ resource "aws_iam_role_policy" "dynamodb_access" {
         Action = [
           "dynamodb:GetItem",
           "dynamodb:PutItem",
+          "dynamodb:BatchWriteItem",
           "dynamodb:Query",
           "dynamodb:Scan",
           "dynamodb:UpdateItem"
         ]
         Resource = [
           aws_dynamodb_table.model_registry.arn,
-          aws_dynamodb_table.model_predictions.arn
+          "${aws_dynamodb_table.model_registry.arn}/index/*",
+          aws_dynamodb_table.model_predictions.arn,
+          aws_dynamodb_table.series_state.arn
         ]
       }
     ]
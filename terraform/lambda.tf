@@ -15,6 +15,15 @@ resource "aws_lambda_function" "classify_anomaly" {
       MODEL_REGISTRY_TABLE         = aws_dynamodb_table.model_registry.name
       POWERTOOLS_METRICS_NAMESPACE = "ClassifyAnomaly"
       POWERTOOLS_SERVICE_NAME      = "ClassifyAnomalyService"
+      METRICS_MODE                 = var.metrics_mode
+      PREFETCH_MODELS              = var.anomaly_prefetch_models
+      PREFETCH_CLIENTS             = tostring(var.prefetch_clients)
+      PREDICTION_SHARDS            = tostring(var.prediction_shards)
+      ALIAS_TTL_SECONDS            = tostring(var.alias_ttl_seconds)
+      MODEL_CACHE_TTL_SECONDS      = tostring(var.model_cache_ttl_seconds)
+      DRIFT_INTERVAL_SECONDS       = tostring(var.drift_interval_seconds)
+      PROFILE_SLOW_MS              = var.profile_slow_ms
+      SERIES_STATE_TABLE           = aws_dynamodb_table.series_state.name
     }
   }
 
@@ -45,8 +54,16 @@ resource "aws_lambda_function" "classify_level" {
 
   environment {
     variables = {
-      STAGE                = var.stage
-      MODEL_REGISTRY_TABLE = aws_dynamodb_table.model_registry.name
+      STAGE                   = var.stage
+      MODEL_REGISTRY_TABLE    = aws_dynamodb_table.model_registry.name
+      METRICS_MODE            = var.metrics_mode
+      PREFETCH_MODELS         = var.level_prefetch_models
+      PREFETCH_CLIENTS        = tostring(var.prefetch_clients)
+      PREDICTION_SHARDS       = tostring(var.prediction_shards)
+      ALIAS_TTL_SECONDS       = tostring(var.alias_ttl_seconds)
+      MODEL_CACHE_TTL_SECONDS = tostring(var.model_cache_ttl_seconds)
+      DRIFT_INTERVAL_SECONDS  = tostring(var.drift_interval_seconds)
+      PROFILE_SLOW_MS         = var.profile_slow_ms
     }
   }
 
@@ -64,6 +81,84 @@ resource "aws_lambda_function" "classify_level" {
   )
 }
 
+# Query Predictions Lambda Function
+resource "aws_lambda_function" "query_predictions" {
+  function_name = local.query_predictions_function_name
+  role          = aws_iam_role.lambda_execution.arn
+  handler       = "handler.handler"
+  runtime       = var.lambda_runtime
+  timeout       = var.lambda_timeout
+
+  s3_bucket = var.lambda_code_bucket
+  s3_key    = local.query_predictions_s3_key
+
+  environment {
+    variables = {
+      STAGE                       = var.stage
+      PREDICTIONS_TABLE           = aws_dynamodb_table.model_predictions.name
+      METRICS_MODE                = var.metrics_mode
+      PREDICTION_SHARDS           = tostring(var.prediction_shards)
+      MAX_AGGREGATE_RANGE_MINUTES = tostring(var.max_aggregate_range_minutes)
+      MAX_AGGREGATE_ITEMS         = tostring(var.max_aggregate_items)
+    }
+  }
+
+  depends_on = [
+    aws_iam_role_policy_attachment.lambda_basic_execution,
+    aws_iam_role_policy.dynamodb_access,
+    aws_iam_role_policy.cloudwatch_metrics,
+  ]
+
+  tags = merge(
+    local.common_tags,
+    {
+      Name = "Query Predictions Function"
+    }
+  )
+}
+
+# Score Lambda Function: any set of registered models over one payload
+resource "aws_lambda_function" "score" {
+  function_name = local.score_function_name
+  role          = aws_iam_role.lambda_execution.arn
+  handler       = "handler.handler"
+  runtime       = var.lambda_runtime
+  timeout       = var.lambda_timeout
+
+  s3_bucket = var.lambda_code_bucket
+  s3_key    = local.score_s3_key
+
+  environment {
+    variables = {
+      STAGE                        = var.stage
+      MODEL_REGISTRY_TABLE         = aws_dynamodb_table.model_registry.name
+      POWERTOOLS_METRICS_NAMESPACE = "Score"
+      POWERTOOLS_SERVICE_NAME      = "ScoreService"
+      METRICS_MODE                 = var.metrics_mode
+      PREFETCH_MODELS              = var.score_prefetch_models
+      PREFETCH_CLIENTS             = tostring(var.prefetch_clients)
+      PREDICTION_SHARDS            = tostring(var.prediction_shards)
+      ALIAS_TTL_SECONDS            = tostring(var.alias_ttl_seconds)
+      MODEL_CACHE_TTL_SECONDS      = tostring(var.model_cache_ttl_seconds)
+      DRIFT_INTERVAL_SECONDS       = tostring(var.drift_interval_seconds)
+      PROFILE_SLOW_MS              = var.profile_slow_ms
+    }
+  }
+
+  depends_on = [
+    aws_iam_role_policy_attachment.lambda_basic_execution,
+    aws_iam_role_policy.dynamodb_access,
+    aws_iam_role_policy.cloudwatch_metrics,
+  ]
+
+  tags = merge(
+    local.common_tags,
+    {
+      Name = "Score Function"
+    }
+  )
+}
+
 # Lambda Function URLs (if enabled)
 resource "aws_lambda_function_url" "classify_anomaly" {
   count              = var.enable_function_urls ? 1 : 0
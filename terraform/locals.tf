@@ -19,10 +19,13 @@ locals {
   # DynamoDB table names
   model_registry_table_name    = "model-registry"
   model_predictions_table_name = "model-predictions"
+  series_state_table_name      = "series-state"
 
   # Lambda function names
-  classify_anomaly_function_name = "classify_anomaly"
-  classify_level_function_name   = "classify_level"
+  classify_anomaly_function_name  = "classify_anomaly"
+  classify_level_function_name    = "classify_level"
+  query_predictions_function_name = "query_predictions"
+  score_function_name             = "score"
 
   # IAM role name
   lambda_execution_role_name = "${local.resource_prefix}-lambda-execution-role"
@@ -31,6 +34,8 @@ locals {
   api_gateway_name = "${local.resource_prefix}-api"
 
   # Lambda code keys in S3
-  classify_anomaly_s3_key = "classify_anomaly.zip"
-  classify_level_s3_key   = "classify_level.zip"
+  classify_anomaly_s3_key  = "classify_anomaly.zip"
+  classify_level_s3_key    = "classify_level.zip"
+  query_predictions_s3_key = "query_predictions.zip"
+  score_s3_key             = "score.zip"
 }
@@ -50,6 +50,16 @@ output "classify_level_function_url" {
   value       = var.enable_function_urls ? aws_lambda_function_url.classify_level[0].function_url : null
 }
 
+output "score_function_name" {
+  description = "Name of the score Lambda function"
+  value       = aws_lambda_function.score.function_name
+}
+
+output "query_predictions_function_name" {
+  description = "Name of the query_predictions Lambda function"
+  value       = aws_lambda_function.query_predictions.function_name
+}
+
 # IAM Role Outputs
 output "lambda_execution_role_arn" {
   description = "ARN of the Lambda execution role"
@@ -100,6 +110,42 @@ output "rest_api_level_endpoint" {
   ) : null
 }
 
+output "rest_api_anomaly_batch_endpoint" {
+  description = "Endpoint for batch anomaly classification via API Gateway"
+  value = var.enable_api_gateway ? format(
+    "https://%s.execute-api.localhost.localstack.cloud:4566/%s/anomaly/batch",
+    aws_api_gateway_rest_api.mlops[0].id,
+    var.stage
+  ) : null
+}
+
+output "rest_api_level_batch_endpoint" {
+  description = "Endpoint for batch level classification via API Gateway"
+  value = var.enable_api_gateway ? format(
+    "https://%s.execute-api.localhost.localstack.cloud:4566/%s/level/batch",
+    aws_api_gateway_rest_api.mlops[0].id,
+    var.stage
+  ) : null
+}
+
+output "rest_api_score_endpoint" {
+  description = "Endpoint for scoring with several models at once via API Gateway"
+  value = var.enable_api_gateway ? format(
+    "https://%s.execute-api.localhost.localstack.cloud:4566/%s/score",
+    aws_api_gateway_rest_api.mlops[0].id,
+    var.stage
+  ) : null
+}
+
+output "rest_api_predictions_endpoint" {
+  description = "Endpoint for querying stored predictions via API Gateway"
+  value = var.enable_api_gateway ? format(
+    "https://%s.execute-api.localhost.localstack.cloud:4566/%s/predictions",
+    aws_api_gateway_rest_api.mlops[0].id,
+    var.stage
+  ) : null
+}
+
 # Project Information
 output "project_stage" {
   description = "Current deployment stage"
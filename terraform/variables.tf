@@ -67,6 +67,88 @@ variable "dynamodb_billing_mode" {
   }
 }
 
+variable "metrics_mode" {
+  description = "How Lambdas emit custom metrics (api = batched PutMetricData, emf = Embedded Metric Format logs)"
+  type        = string
+  default     = "api"
+
+  validation {
+    condition     = contains(["api", "emf"], var.metrics_mode)
+    error_message = "Metrics mode must be either api or emf"
+  }
+}
+
+variable "anomaly_prefetch_models" {
+  description = "Comma-separated model_name@version list the anomaly Lambda loads during init (empty = none)"
+  type        = string
+  default     = ""
+}
+
+variable "level_prefetch_models" {
+  description = "Comma-separated model_name@version list the level Lambda loads during init (empty = none)"
+  type        = string
+  default     = ""
+}
+
+variable "score_prefetch_models" {
+  description = "Comma-separated model_name@version list the score Lambda loads during init (empty = none)"
+  type        = string
+  default     = ""
+}
+
+variable "prefetch_clients" {
+  description = "Create the AWS SDK clients during Lambda init instead of on first use"
+  type        = bool
+  default     = false
+}
+
+variable "profile_slow_ms" {
+  description = "Requests slower than this many milliseconds get a sampled stack profile logged (empty disables the profiler)"
+  type        = string
+  default     = ""
+}
+
+variable "alias_ttl_seconds" {
+  description = "Seconds a resolved model version alias is served before it is revalidated in the background"
+  type        = number
+  default     = 60
+}
+
+variable "model_cache_ttl_seconds" {
+  description = "Seconds a loaded model is served before its artifact is revalidated with a conditional GET (0 never revalidates)"
+  type        = number
+  default     = 300
+}
+
+variable "drift_interval_seconds" {
+  description = "Seconds between drift metrics of the inputs each model version has scored, sent with the regular metrics flush"
+  type        = number
+  default     = 60
+}
+
+variable "prediction_shards" {
+  description = "Number of partition key shards each model version's predictions are spread over (only ever increase it; readers query shards 0..N-1)"
+  type        = number
+  default     = 8
+
+  validation {
+    condition     = var.prediction_shards >= 1 && var.prediction_shards <= 64
+    error_message = "Prediction shards must be between 1 and 64"
+  }
+}
+
+variable "max_aggregate_range_minutes" {
+  description = "Longest time range, in minutes, one /predictions/aggregate request may cover"
+  type        = number
+  default     = 1440
+}
+
+variable "max_aggregate_items" {
+  description = "Most predictions one /predictions/aggregate request may read before it is rejected with a 400"
+  type        = number
+  default     = 2000000
+}
+
 variable "tags" {
   description = "Additional tags to apply to all resources"
   type        = map(string)
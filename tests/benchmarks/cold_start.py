@@ -0,0 +1,192 @@
+"""Measures cold and warm latency of the Lambda handlers against in-memory AWS stand-ins.
+
+Every run starts a fresh interpreter, imports one handler (the Lambda init phase), sends
+one request (the cold invocation) and then a series of warm requests. Results are the
+median across runs.
+
+Usage:
+    python tests/benchmarks/cold_start.py [--runs 5] [--warm 50] [--prefetch]
+        [--latency-ms 0] [--no-sdk] [--json results.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parents[2]
+LAMBDAS_DIR = ROOT / "src" / "lambdas"
+RESULT_PREFIX = "COLD_START_RESULT "
+
+HANDLERS = {
+    "classify_anomaly": ("/anomaly", "anomaly_classifier"),
+    "classify_level": ("/level", "level_classifier"),
+}
+
+
+def api_event(path: str, body: dict) -> dict:
+    """Builds an API Gateway REST proxy event for a JSON POST request."""
+    return {
+        "resource": path,
+        "path": path,
+        "httpMethod": "POST",
+        "headers": {"Content-Type": "application/json"},
+        "multiValueHeaders": {},
+        "queryStringParameters": None,
+        "multiValueQueryStringParameters": None,
+        "pathParameters": None,
+        "stageVariables": None,
+        "requestContext": {"resourcePath": path, "httpMethod": "POST", "path": path},
+        "body": json.dumps(body),
+        "isBase64Encoded": False,
+    }
+
+
+def lambda_context(function_name: str) -> SimpleNamespace:
+    """Builds the attributes of a Lambda context object that the handlers read."""
+    return SimpleNamespace(
+        function_name=function_name,
+        memory_limit_in_mb=128,
+        invoked_function_arn=f"arn:aws:lambda:us-east-1:000000000000:function:{function_name}",
+        aws_request_id="benchmark",
+        function_version="$LATEST",
+        get_remaining_time_in_millis=lambda: 30_000,
+    )
+
+
+def import_handler(name: str):
+    """Imports `src/lambdas/<name>/handler.py` the way the Lambda runtime does."""
+    sys.path[:0] = [str(LAMBDAS_DIR / name), str(LAMBDAS_DIR), str(LAMBDAS_DIR.parent)]
+    spec = importlib.util.spec_from_file_location(
+        f"{name}_handler", LAMBDAS_DIR / name / "handler.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_child(args: argparse.Namespace) -> None:
+    """Runs one cold start in this (fresh) interpreter and prints its timings."""
+    sys.path.insert(0, str(Path(__file__).parent))
+    from fakes import FakeAWS
+
+    sys.path.insert(0, str(LAMBDAS_DIR))
+    from shared.clients import set_client_factory
+
+    aws = FakeAWS(latency_ms=args.latency_ms, sdk_cost=not args.no_sdk)
+    aws.seed_models()
+    set_client_factory(aws.factory)
+
+    start = time.perf_counter()
+    module = import_handler(args.child)
+    import_ms = (time.perf_counter() - start) * 1000
+
+    path, model_name = HANDLERS[args.child]
+    context = lambda_context(args.child)
+
+    def invoke(i: int) -> float:
+        event = api_event(
+            path,
+            {
+                "model_name": model_name,
+                "model_version": "v1",
+                "value": float(i % 100),
+                "timestamp": datetime.now().isoformat(),
+            },
+        )
+        start = time.perf_counter()
+        response = module.handler(event, context)
+        elapsed = (time.perf_counter() - start) * 1000
+        if response["statusCode"] >= 300:
+            raise RuntimeError(f"{args.child} returned {response}")
+        return elapsed
+
+    first_ms = invoke(0)
+    warm = [invoke(i) for i in range(1, args.warm + 1)]
+    result = {
+        "import_ms": import_ms,
+        "first_ms": first_ms,
+        "warm_p50_ms": percentile(warm, 0.50),
+        "warm_p99_ms": percentile(warm, 0.99),
+        "boto3_imported": "boto3" in sys.modules,
+    }
+    print(RESULT_PREFIX + json.dumps(result), flush=True)
+
+
+def run_parent(args: argparse.Namespace) -> dict:
+    """Runs every handler `args.runs` times in fresh interpreters and prints medians."""
+    env = {**os.environ, "AWS_DEFAULT_REGION": "us-east-1", "METRICS_MODE": "api"}
+    env.pop("PREFETCH_MODELS", None)
+    env.pop("PREFETCH_CLIENTS", None)
+
+    report = {}
+    columns = ("import ms", "first ms", "cold total", "warm p50", "warm p99")
+    print(f"{'handler':<18}" + "".join(f"{column:>12}" for column in columns))
+    for name in args.handlers:
+        child_env = dict(env)
+        if args.prefetch:
+            child_env["PREFETCH_MODELS"] = f"{HANDLERS[name][1]}@v1"
+            child_env["PREFETCH_CLIENTS"] = "true"
+
+        runs = []
+        for _ in range(args.runs):
+            command = [sys.executable, __file__, "--child", name, "--warm", str(args.warm)]
+            command += ["--latency-ms", str(args.latency_ms)]
+            if args.no_sdk:
+                command.append("--no-sdk")
+            output = subprocess.run(
+                command, env=child_env, capture_output=True, text=True, check=True
+            ).stdout
+            line = next(x for x in output.splitlines() if x.startswith(RESULT_PREFIX))
+            runs.append(json.loads(line.removeprefix(RESULT_PREFIX)))
+
+        summary = {
+            key: statistics.median(run[key] for run in runs)
+            for key in ("import_ms", "first_ms", "warm_p50_ms", "warm_p99_ms")
+        }
+        summary["cold_total_ms"] = summary["import_ms"] + summary["first_ms"]
+        report[name] = summary
+        print(
+            f"{name:<18}{summary['import_ms']:>12.1f}{summary['first_ms']:>12.1f}"
+            f"{summary['cold_total_ms']:>12.1f}{summary['warm_p50_ms']:>12.2f}"
+            f"{summary['warm_p99_ms']:>12.2f}"
+        )
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start benchmark for the Lambda handlers")
+    parser.add_argument("--handlers", nargs="+", choices=sorted(HANDLERS), default=sorted(HANDLERS))
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per handler")
+    parser.add_argument("--warm", type=int, default=50, help="Warm requests per run")
+    parser.add_argument(
+        "--prefetch", action="store_true", help="Set PREFETCH_MODELS and PREFETCH_CLIENTS"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Simulated latency per AWS call"
+    )
+    parser.add_argument(
+        "--no-sdk", action="store_true", help="Do not import boto3 or build real clients"
+    )
+    parser.add_argument("--json", help="Write the medians to this path")
+    parser.add_argument("--child", choices=sorted(HANDLERS), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        report = run_parent(args)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2))
@@ -0,0 +1,202 @@
+"""In-memory stand-ins for the S3, DynamoDB and CloudWatch calls made by the Lambdas.
+
+They implement only what the handlers use, so benchmarks measure our code rather than
+the network. An optional per-call latency approximates a round trip to AWS.
+"""
+
+import hashlib
+import io
+import json
+import time
+from types import SimpleNamespace
+
+DEFAULT_MODELS = {
+    "anomaly_classifier": {
+        "mean": 50.0,
+        "std": 15.0,
+        "threshold": 95.0,
+        "model_type": "ToyAnomalyClassifier",
+    },
+    "level_classifier": {
+        "baseline_avg": 50.0,
+        "std_dev": 15.0,
+        "model_type": "ToyLevelClassifier",
+    },
+}
+
+
+class FakeClientError(Exception):
+    """Mimics `botocore.exceptions.ClientError` closely enough for `response` checks."""
+
+    def __init__(self, code: str, operation: str):
+        super().__init__(f"An error occurred ({code}) when calling the {operation} operation")
+        self.response = {"Error": {"Code": code}}
+
+
+class _Service:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.calls = 0
+
+    def _call(self) -> None:
+        self.calls += 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+
+class _Body(io.BytesIO):
+    def iter_chunks(self, chunk_size: int = 1 << 20):
+        while chunk := self.read(chunk_size):
+            yield chunk
+
+
+class FakeS3(_Service):
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.objects: dict[tuple[str, str], bytes] = {}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes | str, **kwargs) -> dict:
+        self._call()
+        data = Body.encode() if isinstance(Body, str) else bytes(Body)
+        self.objects[(Bucket, Key)] = data
+        return {"ETag": self._etag(data)}
+
+    def upload_file(self, Filename: str, Bucket: str, Key: str, **kwargs) -> None:
+        with open(Filename, "rb") as f:
+            self.put_object(Bucket=Bucket, Key=Key, Body=f.read())
+
+    def get_object(self, Bucket: str, Key: str, IfNoneMatch: str | None = None, **kwargs) -> dict:
+        self._call()
+        if (Bucket, Key) not in self.objects:
+            raise FakeClientError("NoSuchKey", "GetObject")
+        data = self.objects[(Bucket, Key)]
+        etag = self._etag(data)
+        if IfNoneMatch == etag:
+            raise FakeClientError("304", "GetObject")
+        return {"Body": _Body(data), "ETag": etag, "ContentLength": len(data)}
+
+    @staticmethod
+    def _etag(data: bytes) -> str:
+        return f'"{hashlib.md5(data).hexdigest()}"'
+
+
+class FakeTable(_Service):
+    def __init__(self, name: str, key_names: tuple[str, ...], latency_ms: float = 0.0):
+        super().__init__(latency_ms)
+        self.name = name
+        self.key_names = key_names
+        self.items: dict[tuple, dict] = {}
+
+    def _key(self, item: dict) -> tuple:
+        return tuple(item.get(name) for name in self.key_names)
+
+    def get_item(self, Key: dict, **kwargs) -> dict:
+        self._call()
+        item = self.items.get(self._key(Key))
+        return {"Item": dict(item)} if item is not None else {}
+
+    def put_item(self, Item: dict, **kwargs) -> dict:
+        self._call()
+        self.items[self._key(Item)] = dict(Item)
+        return {}
+
+
+class FakeDynamoDB(_Service):
+    """Stands in for `boto3.resource("dynamodb")`, including `meta.client.batch_write_item`
+    and `meta.client.get_item`."""
+
+    KEY_NAMES = {
+        "model-registry": ("model_name", "version"),
+        "model-predictions": ("pk", "sk"),
+    }
+
+    def __init__(self, latency_ms: float = 0.0, retain_writes: bool = True):
+        super().__init__(latency_ms)
+        self.retain_writes = retain_writes
+        self.items_written = 0
+        self.tables: dict[str, FakeTable] = {}
+        self.meta = SimpleNamespace(
+            client=SimpleNamespace(batch_write_item=self.batch_write_item, get_item=self.get_item)
+        )
+
+    def Table(self, name: str) -> FakeTable:
+        if name not in self.tables:
+            key_names = self.KEY_NAMES.get(name, ("pk", "sk"))
+            self.tables[name] = FakeTable(name, key_names, self.latency_ms)
+        return self.tables[name]
+
+    def get_item(self, TableName: str, Key: dict, **kwargs) -> dict:
+        return self.Table(TableName).get_item(Key=Key, **kwargs)
+
+    def batch_write_item(self, RequestItems: dict, **kwargs) -> dict:
+        self._call()
+        for table_name, requests in RequestItems.items():
+            self.items_written += len(requests)
+            if not self.retain_writes:
+                continue
+            table = self.Table(table_name)
+            for request in requests:
+                item = request["PutRequest"]["Item"]
+                table.items[table._key(item)] = item
+        return {"UnprocessedItems": {}}
+
+
+class FakeCloudWatch(_Service):
+    def __init__(self, latency_ms: float = 0.0, retain_writes: bool = True):
+        super().__init__(latency_ms)
+        self.retain_writes = retain_writes
+        self.metric_data: list[dict] = []
+
+    def put_metric_data(self, Namespace: str, MetricData: list[dict], **kwargs) -> dict:
+        self._call()
+        if self.retain_writes:
+            self.metric_data.extend(MetricData)
+        return {}
+
+
+class FakeAWS:
+    """One set of fake services, handed out by `factory` in place of boto3 clients.
+
+    With `sdk_cost` the real boto3 client is also constructed (and discarded), so timings
+    still include importing the SDK and building clients while no request leaves the host.
+    Without `retain_writes`, batch writes and metric data are only counted, which keeps long
+    benchmark runs from growing without bound.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, sdk_cost: bool = False, retain_writes: bool = True):
+        self.sdk_cost = sdk_cost
+        self.s3 = FakeS3(latency_ms)
+        self.dynamodb = FakeDynamoDB(latency_ms, retain_writes)
+        self.cloudwatch = FakeCloudWatch(latency_ms, retain_writes)
+
+    def factory(self, service: str, kind: str):
+        if self.sdk_cost:
+            import boto3
+
+            build = boto3.client if kind == "client" else boto3.resource
+            build(service, region_name="us-east-1")
+        return getattr(self, service)
+
+    def seed_models(
+        self, models: dict[str, dict] | None = None, versions: tuple[str, ...] = ("v1",)
+    ) -> None:
+        """Uploads and registers a JSON artifact per model name and version.
+
+        Args:
+            models (dict[str, dict] | None): Model name to parameters; defaults to
+                `DEFAULT_MODELS`.
+            versions (tuple[str, ...]): Versions registered for every model.
+        """
+        registry = self.dynamodb.Table("model-registry")
+        for model_name, params in (models or DEFAULT_MODELS).items():
+            for version in versions:
+                bucket, key = f"{model_name}-models", f"models/{version}/{model_name}.json"
+                self.s3.objects[(bucket, key)] = json.dumps(params).encode()
+                registry.items[(model_name, version)] = {
+                    "model_name": model_name,
+                    "version": version,
+                    "s3_bucket": bucket,
+                    "s3_key": key,
+                    "model_type": model_name,
+                    "trained_at": "2026-01-01T00:00:00",
+                }
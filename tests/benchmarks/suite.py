@@ -0,0 +1,554 @@
+"""Offline benchmark suite: model code, serving components and both Lambda handlers.
+
+Everything runs in-process against the fakes in `tests/benchmarks/fakes.py`; no network or
+LocalStack is needed. Each benchmark reports p50/p95/p99 latency per call and throughput in
+operations (points, records, metrics) per second.
+
+Usage:
+    python -m tests.benchmarks.suite [--filter handler] [--seconds 1.0]
+        [--save-baseline PATH] [--compare PATH] [--tolerance 0.25] [--json PATH]
+
+With `--compare`, a benchmark whose p50 is more than `tolerance` slower than the baseline
+is reported as a regression and the run exits with status 1. `--save-baseline` replaces
+only the results of the benchmarks that ran, so `--filter` can refresh part of a baseline.
+"""
+
+import argparse
+import base64
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path[:0] = [str(ROOT), str(ROOT / "src" / "lambdas"), str(ROOT / "src")]
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+os.environ["METRICS_MODE"] = "api"
+
+from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent  # noqa: E402
+from shared.artifacts import ArtifactLoader  # noqa: E402
+from shared.clients import set_client_factory  # noqa: E402
+from shared.decoding import decode_batch  # noqa: E402
+from shared.drift import DriftMonitor  # noqa: E402
+from shared.metrics import MetricsBuffer  # noqa: E402
+from shared.model_cache import ModelCache  # noqa: E402
+from shared.models import build_model  # noqa: E402
+from shared.persistence import PredictionWriter  # noqa: E402
+
+from common.model_bundle import open_bundle, write_bundle  # noqa: E402
+from src.models.rolling_anomaly_detector import RollingAnomalyDetector  # noqa: E402
+from src.models.toy_anomaly_classifier import ToyAnomalyClassifier  # noqa: E402
+from src.models.toy_level_classifier import ToyLevelClassifier  # noqa: E402
+from src.schemas.data_point import ColumnarTimeSeries, DataPoint  # noqa: E402
+from tests.benchmarks.cold_start import api_event, import_handler, lambda_context  # noqa: E402
+from tests.benchmarks.fakes import FakeAWS  # noqa: E402
+
+DEFAULT_BASELINE = ROOT / ".benchmarks" / "baseline.json"
+# One timed sample runs the benchmark enough times to take at least this long
+MIN_SAMPLE_SECONDS = 200e-6
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Callable[[], object]]
+    ops: int = 1
+
+
+@dataclass
+class Result:
+    name: str
+    samples: int
+    p50_us: float
+    p95_us: float
+    p99_us: float
+    ops_per_s: float
+
+
+BENCHMARKS: list[Benchmark] = []
+
+
+def benchmark(name: str, ops: int = 1):
+    """Registers a setup function that returns the callable to time.
+
+    Args:
+        name (str): Dotted benchmark name, e.g. "predict.anomaly.single".
+        ops (int): Operations performed by one call, used for throughput.
+    """
+
+    def register(setup: Callable[[], Callable[[], object]]):
+        BENCHMARKS.append(Benchmark(name, setup, ops))
+        return setup
+
+    return register
+
+
+def _series(size: int) -> ColumnarTimeSeries:
+    rng = np.random.default_rng(42)
+    return ColumnarTimeSeries(
+        values=rng.normal(50, 15, size), timestamps=np.arange(size, dtype=np.int64)
+    )
+
+
+def _aws() -> FakeAWS:
+    aws = FakeAWS(retain_writes=False)
+    aws.seed_models()
+    return aws
+
+
+# --- Model code -------------------------------------------------------------------------
+
+
+@benchmark("predict.anomaly.single")
+def _predict_anomaly_single():
+    model = ToyAnomalyClassifier()
+    model.fit(_series(1_000))
+    point = DataPoint(value=120.0, timestamp="0")
+    return lambda: model.predict(point)
+
+
+@benchmark("predict.anomaly.batch_10k", ops=10_000)
+def _predict_anomaly_batch():
+    model = ToyAnomalyClassifier()
+    model.fit(_series(1_000))
+    values = _series(10_000).values
+    return lambda: model.predict_batch(values)
+
+
+@benchmark("predict.level.single")
+def _predict_level_single():
+    model = ToyLevelClassifier()
+    model.fit(_series(1_000))
+    point = DataPoint(value=120.0, timestamp="0")
+    return lambda: model.predict(point)
+
+
+@benchmark("predict.level.batch_10k", ops=10_000)
+def _predict_level_batch():
+    model = ToyLevelClassifier()
+    model.fit(_series(1_000))
+    values = _series(10_000).values
+    return lambda: model.predict_batch(values)
+
+
+@benchmark("predict.rolling.update")
+def _predict_rolling_update():
+    model = RollingAnomalyDetector()
+    model.fit(_series(1_000))
+    point = DataPoint(value=120.0, timestamp="0")
+    return lambda: model.update(point)
+
+
+@benchmark("predict.rolling.update_batch_1k", ops=1_000)
+def _predict_rolling_update_batch():
+    model = RollingAnomalyDetector()
+    model.fit(_series(1_000))
+    values = _series(1_000).values
+    return lambda: model.update_batch(values)
+
+
+@benchmark("fit.anomaly.100k", ops=100_000)
+def _fit_anomaly():
+    series = _series(100_000)
+    return lambda: ToyAnomalyClassifier().fit(series)
+
+
+@benchmark("fit.level.100k", ops=100_000)
+def _fit_level():
+    series = _series(100_000)
+    return lambda: ToyLevelClassifier().fit(series)
+
+
+# --- Serving components -----------------------------------------------------------------
+
+
+def _artifact_loader(aws: FakeAWS) -> ArtifactLoader:
+    registry = aws.dynamodb.Table("model-registry")
+    return ArtifactLoader(
+        aws.s3,
+        fetch_metadata=lambda name, version: registry.get_item(
+            Key={"model_name": name, "version": version}
+        )["Item"],
+    )
+
+
+@benchmark("model_load.json.download")
+def _model_load_download():
+    loader = _artifact_loader(_aws())
+
+    def run():
+        loader.forget("anomaly_classifier", "v1")
+        return loader.load("anomaly_classifier", "v1")
+
+    return run
+
+
+@benchmark("model_load.json.revalidate")
+def _model_load_revalidate():
+    loader = _artifact_loader(_aws())
+    loader.load("anomaly_classifier", "v1")
+    return lambda: loader.load("anomaly_classifier", "v1")
+
+
+@benchmark("model_load.cache_hit")
+def _model_load_cache_hit():
+    cache = ModelCache(capacity=8, ttl_seconds=0)
+    cache.get_or_load("anomaly_classifier", "v1", object)
+    return lambda: cache.get_or_load("anomaly_classifier", "v1", object)
+
+
+@benchmark("model_load.bundle.open_lookup_10k")
+def _model_load_bundle():
+    path = os.path.join(tempfile.mkdtemp(), "fleet.bundle")
+    models = {
+        f"sensor{i}": {"mean": 50.0, "std": 15.0, "threshold": 95.0 + i} for i in range(10_000)
+    }
+    write_bundle(path, "ToyAnomalyClassifier", models)
+    return lambda: open_bundle(path).lookup("sensor1234")
+
+
+@benchmark("persistence.flush_25", ops=25)
+def _persistence_flush():
+    aws = _aws()
+    writer = PredictionWriter(aws.dynamodb, max_items=1_000, max_age_seconds=0)
+    items = [
+        {
+            "model_name": "anomaly_classifier",
+            "version": "v1",
+            "timestamp": str(i),
+            "output": {"is_anomaly": False},
+        }
+        for i in range(25)
+    ]
+
+    def run():
+        for item in items:
+            writer.add(item)
+        return writer.flush()
+
+    return run
+
+
+def _metrics_run(metrics: MetricsBuffer) -> Callable[[], None]:
+    def run():
+        for name in ("TotalPredictions", "AnomalyDetected", "ModelCacheHit"):
+            metrics.add_count(name, 1)
+        for i in range(50):
+            metrics.add_timing("RequestLatency", 0.1 * i)
+        metrics.flush()
+
+    return run
+
+
+@benchmark("metrics.flush_api", ops=53)
+def _metrics_api():
+    aws = _aws()
+    return _metrics_run(MetricsBuffer("Bench", "BenchService", aws.cloudwatch, mode="api"))
+
+
+@benchmark("metrics.flush_emf", ops=53)
+def _metrics_emf():
+    run = _metrics_run(MetricsBuffer("Bench", "BenchService", mode="emf"))
+
+    def quiet():
+        with contextlib.redirect_stdout(io.StringIO()):
+            run()
+
+    return quiet
+
+
+@benchmark("drift.observe.single")
+def _drift_single():
+    monitor = DriftMonitor(MetricsBuffer("Bench", "BenchService"), interval_seconds=3600)
+    model = build_model("ToyAnomalyClassifier", {"mean": 50.0, "std": 15.0, "threshold": 95.0})
+    return lambda: monitor.observe("anomaly_classifier", "v1", model, 52.5)
+
+
+@benchmark("drift.observe.batch_1k", ops=1_000)
+def _drift_batch():
+    monitor = DriftMonitor(MetricsBuffer("Bench", "BenchService"), interval_seconds=3600)
+    model = build_model("ToyAnomalyClassifier", {"mean": 50.0, "std": 15.0, "threshold": 95.0})
+    values = _series(1_000).values
+    return lambda: monitor.observe("anomaly_classifier", "v1", model, values)
+
+
+# --- Request decoding -------------------------------------------------------------------
+
+_DECODE_POINTS = 1_000
+
+
+def _decode_benchmark(content_type: str, body: bytes, query: dict | None = None):
+    event = api_event("/anomaly/batch", {})
+    event.update(
+        headers={"Content-Type": content_type},
+        queryStringParameters=query,
+        body=base64.b64encode(body).decode(),
+        isBase64Encoded=True,
+    )
+    # A fresh wrapper per call, as the resolver creates one per invocation
+    return lambda: decode_batch(APIGatewayProxyEvent(event), _DECODE_POINTS)
+
+
+def _decode_document() -> dict:
+    return {
+        "model_name": "anomaly_classifier",
+        "model_version": "v1",
+        "data_points": _batch(_DECODE_POINTS),
+    }
+
+
+@benchmark("decode.json.batch_1k", ops=_DECODE_POINTS)
+def _decode_json():
+    return _decode_benchmark("application/json", json.dumps(_decode_document()).encode())
+
+
+@benchmark("decode.msgpack.batch_1k", ops=_DECODE_POINTS)
+def _decode_msgpack():
+    import msgpack
+
+    return _decode_benchmark("application/msgpack", msgpack.packb(_decode_document()))
+
+
+@benchmark("decode.packed.batch_1k", ops=_DECODE_POINTS)
+def _decode_packed():
+    values = np.arange(_DECODE_POINTS, dtype="<f8") % 120
+    query = {"model_name": "anomaly_classifier", "model_version": "v1"}
+    return _decode_benchmark("application/octet-stream", values.tobytes(), query)
+
+
+# --- Handlers ---------------------------------------------------------------------------
+
+_handlers: dict[str, object] = {}
+
+
+def _handler(name: str):
+    if name not in _handlers:
+        set_client_factory(_aws().factory)
+        _handlers[name] = import_handler(name)
+    return _handlers[name]
+
+
+def _handler_benchmark(name: str, path: str, body: dict) -> Callable[[], object]:
+    module = _handler(name)
+    event, context = api_event(path, body), lambda_context(name)
+
+    def run():
+        response = module.handler(event, context)
+        if response["statusCode"] >= 300:
+            raise RuntimeError(f"{name} {path} returned {response}")
+        return response
+
+    # The first call loads the model, which may log
+    with contextlib.redirect_stdout(io.StringIO()):
+        run()
+    return run
+
+
+def _batch(size: int) -> list[dict]:
+    return [{"value": float(i % 120), "timestamp": str(i)} for i in range(size)]
+
+
+@benchmark("handler.anomaly.single")
+def _handler_anomaly_single():
+    body = {"model_name": "anomaly_classifier", "model_version": "v1", "value": 42.0}
+    return _handler_benchmark("classify_anomaly", "/anomaly", body)
+
+
+@benchmark("handler.anomaly.batch_100", ops=100)
+def _handler_anomaly_batch():
+    body = {"model_name": "anomaly_classifier", "model_version": "v1", "data_points": _batch(100)}
+    return _handler_benchmark("classify_anomaly", "/anomaly/batch", body)
+
+
+@benchmark("handler.level.single")
+def _handler_level_single():
+    body = {"model_name": "level_classifier", "model_version": "v1", "value": 42.0}
+    return _handler_benchmark("classify_level", "/level", body)
+
+
+@benchmark("handler.level.batch_100", ops=100)
+def _handler_level_batch():
+    body = {"model_name": "level_classifier", "model_version": "v1", "data_points": _batch(100)}
+    return _handler_benchmark("classify_level", "/level/batch", body)
+
+
+_SCORE_MODELS = [
+    {"model_name": "anomaly_classifier", "model_version": "v1"},
+    {"model_name": "level_classifier", "model_version": "v1"},
+]
+
+
+@benchmark("handler.score.single")
+def _handler_score_single():
+    body = {"models": _SCORE_MODELS, "value": 42.0}
+    return _handler_benchmark("score", "/score", body)
+
+
+@benchmark("handler.score.batch_100", ops=100)
+def _handler_score_batch():
+    body = {"models": _SCORE_MODELS, "data_points": _batch(100)}
+    return _handler_benchmark("score", "/score", body)
+
+
+# --- Runner -----------------------------------------------------------------------------
+
+
+def _timer_overhead() -> float:
+    """Returns the smallest interval two back-to-back `perf_counter` calls measure."""
+    overhead = float("inf")
+    for _ in range(1000):
+        start = time.perf_counter()
+        overhead = min(overhead, time.perf_counter() - start)
+    return overhead
+
+
+def measure(bench: Benchmark, seconds: float) -> Result:
+    """Times `bench` for roughly `seconds` after a short warm-up.
+
+    Half of the budget times calls one by one, less the timer's own overhead, for the
+    latency percentiles, so a slow call shows up in p95/p99 instead of being averaged away.
+    The other half repeats fast calls within each sample so that timer overhead stays
+    negligible, for the throughput.
+
+    Args:
+        bench (Benchmark): The benchmark to run.
+        seconds (float): Time budget for the timed samples.
+
+    Returns:
+        Result: Latency percentiles over the individually timed calls, and throughput.
+    """
+    run = bench.setup()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        if time.perf_counter() - start >= MIN_SAMPLE_SECONDS:
+            break
+        number *= 2
+
+    overhead = _timer_overhead()
+    latencies = []
+    deadline = time.perf_counter() + seconds / 2
+    while time.perf_counter() < deadline or len(latencies) < 5:
+        start = time.perf_counter()
+        run()
+        latencies.append(max(0.0, time.perf_counter() - start - overhead))
+
+    elapsed, calls = 0.0, 0
+    deadline = time.perf_counter() + seconds / 2
+    while time.perf_counter() < deadline or calls < 5 * number:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        elapsed += time.perf_counter() - start
+        calls += number
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1e6, [50, 95, 99])
+    return Result(
+        name=bench.name,
+        samples=len(latencies),
+        p50_us=float(p50),
+        p95_us=float(p95),
+        p99_us=float(p99),
+        ops_per_s=bench.ops * calls / elapsed,
+    )
+
+
+def compare(results: list[Result], baseline: dict, tolerance: float) -> list[str]:
+    """Returns a description of every benchmark whose p50 regressed beyond `tolerance`."""
+    regressions = []
+    for result in results:
+        previous = baseline.get("results", {}).get(result.name)
+        if previous is None:
+            continue
+        change = result.p50_us / previous["p50_us"] - 1
+        if change > tolerance:
+            regressions.append(
+                f"{result.name}: p50 {previous['p50_us']:.2f}us -> {result.p50_us:.2f}us "
+                f"({change:+.0%}, tolerance {tolerance:.0%})"
+            )
+    return regressions
+
+
+def _merged(path: Path, report: dict) -> dict:
+    """Returns `report` with the results of the baseline at `path` it does not replace.
+
+    A run limited with `--filter` then only updates its own benchmarks in the baseline.
+    """
+    if not path.exists():
+        return report
+    results = json.loads(path.read_text()).get("results", {})
+    return {**report, "results": {**results, **report["results"]}}
+
+
+def _write_report(path: Path, report: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+
+
+def environment() -> dict:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmark suite")
+    parser.add_argument("--filter", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--seconds", type=float, default=1.0, help="Time budget per benchmark")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), metavar="PATH")
+    parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE), metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p50 slowdown")
+    parser.add_argument("--json", help="Write the results to this path")
+    args = parser.parse_args()
+
+    if args.compare and not Path(args.compare).exists():
+        print(f"No baseline at {args.compare}; record one with --save-baseline first")
+        return 2
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else {}
+    if baseline and baseline.get("environment") != environment():
+        print(f"warning: baseline was recorded on {baseline.get('environment')}")
+
+    results = []
+    print(f"{'benchmark':<36}{'p50 us':>11}{'p95 us':>11}{'p99 us':>11}{'ops/s':>14}{'vs base':>9}")
+    for bench in BENCHMARKS:
+        if args.filter and args.filter not in bench.name:
+            continue
+        result = measure(bench, args.seconds)
+        results.append(result)
+        previous = baseline.get("results", {}).get(bench.name)
+        delta = f"{result.p50_us / previous['p50_us'] - 1:+.0%}" if previous else ""
+        print(
+            f"{result.name:<36}{result.p50_us:>11.2f}{result.p95_us:>11.2f}"
+            f"{result.p99_us:>11.2f}{result.ops_per_s:>14,.0f}{delta:>9}"
+        )
+
+    report = {"environment": environment(), "results": {r.name: asdict(r) for r in results}}
+    if args.json:
+        _write_report(Path(args.json), report)
+    if args.save_baseline:
+        _write_report(Path(args.save_baseline), _merged(Path(args.save_baseline), report))
+
+    if regressions := compare(results, baseline, args.tolerance):
+        print(f"\nREGRESSION: {len(regressions)} benchmark(s) slower than the baseline")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,6 @@
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+# The handlers import `shared` and `common` as top-level packages, as on Lambda
+sys.path[:0] = [str(ROOT), str(ROOT / "src" / "lambdas"), str(ROOT / "src")]
@@ -1,8 +1,13 @@
+import os
+
 # API Gateway Configuration
 API_GATEWAY_CONFIG = {
     "endpoints": {
         "classify_anomaly": "/anomaly",
         "classify_level": "/level",
+        "classify_anomaly_batch": "/anomaly/batch",
+        "classify_level_batch": "/level/batch",
+        "score": "/score",
     },
 }
 
@@ -19,3 +24,46 @@ LAMBDA_FUNCTIONS = {
         "model_version": "v1",
     },
 }
+
+
+def parse_version_mix(spec: str) -> dict[str, float]:
+    """Parses a version mix such as "v1:0.8,v2:0.2" into version -> weight."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        version, _, weight = part.partition(":")
+        mix[version] = float(weight or 1)
+    return mix
+
+
+# Share of requests sent to each model version; more than one version exercises the
+# Lambdas' model cache
+VERSION_MIX = parse_version_mix(os.environ.get("LOAD_VERSION_MIX", "v1:1.0"))
+
+# Relative weight of each task, keyed like the endpoints above
+TASK_WEIGHTS = {
+    "classify_anomaly": int(os.environ.get("LOAD_WEIGHT_SINGLE", "4")),
+    "classify_level": int(os.environ.get("LOAD_WEIGHT_SINGLE", "4")),
+    "classify_anomaly_batch": int(os.environ.get("LOAD_WEIGHT_BATCH", "1")),
+    "classify_level_batch": int(os.environ.get("LOAD_WEIGHT_BATCH", "1")),
+    # Anomaly and level models in one request; off unless LOAD_WEIGHT_SCORE is set
+    "score": int(os.environ.get("LOAD_WEIGHT_SCORE", "0")),
+}
+
+# Data points per batch request
+BATCH_SIZE = int(os.environ.get("LOAD_BATCH_SIZE", "100"))
+
+# Wait time between requests of one user, in seconds
+WAIT_TIME = (
+    float(os.environ.get("LOAD_WAIT_MIN", "1")),
+    float(os.environ.get("LOAD_WAIT_MAX", "2")),
+)
+
+# Service level objectives per endpoint; endpoints without an entry use "default"
+SLOS = {
+    "default": {"p95_ms": 500, "p99_ms": 1000, "max_error_rate": 0.01},
+    "classify_anomaly_batch": {"p95_ms": 1000, "p99_ms": 2000, "max_error_rate": 0.01},
+    "classify_level_batch": {"p95_ms": 1000, "p99_ms": 2000, "max_error_rate": 0.01},
+}
+
+# Where the machine-readable summary is written when the test ends
+SUMMARY_PATH = os.environ.get("LOAD_TEST_SUMMARY", "load_test_summary.json")
@@ -0,0 +1,141 @@
+"""Serves the Lambda handlers over HTTP in this process, for load tests without LocalStack.
+
+Each request is turned into an API Gateway REST proxy event and passed to the handler that
+owns the path, exactly like API Gateway would. By default AWS is replaced by the in-memory
+fakes from `tests/benchmarks/fakes.py` (with models v1 and v2 registered); with
+`--aws real` the handlers use boto3, e.g. against LocalStack via AWS_ENDPOINT_URL.
+
+With `--server async` the same handlers are served by the container entry point,
+`src/lambdas/server.py`, in `--workers` processes instead of one handler call at a time.
+
+Usage:
+    python -m tests.load_tests.local_server [--port 8080] [--aws fake|real]
+        [--server threaded|async] [--workers 1]
+"""
+
+import argparse
+import base64
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from tests.benchmarks.cold_start import LAMBDAS_DIR, import_handler, lambda_context
+
+# First path segment -> Lambda directory under src/lambdas
+ROUTES = {
+    "anomaly": "classify_anomaly",
+    "level": "classify_level",
+    "score": "score",
+}
+
+
+class LambdaProxy(BaseHTTPRequestHandler):
+    """Translates HTTP requests into API Gateway events for the routed handler."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are written separately; without this, keep-alive responses stall
+    disable_nagle_algorithm = True
+    handlers: dict = {}
+    # The handlers keep per-invocation state in module globals, so invoke one at a time
+    invoke_lock = threading.Lock()
+
+    def _invoke(self) -> None:
+        url = urlsplit(self.path)
+        name = ROUTES.get(url.path.strip("/").split("/")[0])
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if name is None:
+            self._respond(404, {"Content-Type": "application/json"}, b'{"message":"Not found"}')
+            return
+
+        query = dict(parse_qsl(url.query)) or None
+        try:
+            text, is_base64 = body.decode(), False
+        except UnicodeDecodeError:
+            text, is_base64 = base64.b64encode(body).decode(), True
+        event = {
+            "resource": url.path,
+            "path": url.path,
+            "httpMethod": self.command,
+            "headers": dict(self.headers),
+            "multiValueHeaders": {},
+            "queryStringParameters": query,
+            "multiValueQueryStringParameters": None,
+            "pathParameters": None,
+            "stageVariables": None,
+            "requestContext": {"resourcePath": url.path, "httpMethod": self.command},
+            "body": text or None,
+            "isBase64Encoded": is_base64,
+        }
+        with self.invoke_lock:
+            response = self.handlers[name].handler(event, lambda_context(name))
+
+        payload = response.get("body") or ""
+        data = base64.b64decode(payload) if response.get("isBase64Encoded") else payload.encode()
+        self._respond(response["statusCode"], response.get("headers") or {}, data)
+
+    def _respond(self, status: int, headers: dict, data: bytes) -> None:
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    do_GET = _invoke
+    do_POST = _invoke
+
+    def log_message(self, format, *args):
+        pass
+
+
+def use_fakes() -> None:
+    """Replaces AWS with in-memory stand-ins that have models v1 and v2 registered."""
+    sys.path.insert(0, str(LAMBDAS_DIR))
+    from shared.clients import set_client_factory
+
+    from tests.benchmarks.fakes import FakeAWS
+
+    fakes = FakeAWS(retain_writes=False)
+    fakes.seed_models(versions=("v1", "v2"))
+    set_client_factory(fakes.factory)
+
+
+def serve(port: int = 8080, aws: str = "fake") -> None:
+    """Loads every routed handler and serves them until interrupted.
+
+    Args:
+        port (int): Port to listen on.
+        aws (str): "fake" for in-memory AWS stand-ins, "real" for boto3.
+    """
+    sys.path.insert(0, str(LAMBDAS_DIR))
+    if aws == "fake":
+        use_fakes()
+
+    LambdaProxy.handlers = {name: import_handler(name) for name in set(ROUTES.values())}
+    server = ThreadingHTTPServer(("127.0.0.1", port), LambdaProxy)
+    print(f"Serving {sorted(LambdaProxy.handlers)} on http://127.0.0.1:{port} (aws={aws})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the Lambda handlers locally")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--aws", choices=["fake", "real"], default="fake")
+    parser.add_argument("--server", choices=["threaded", "async"], default="threaded")
+    parser.add_argument("--workers", type=int, default=1, help="Processes (async only)")
+    args = parser.parse_args()
+    if args.server == "async":
+        sys.path.insert(0, str(LAMBDAS_DIR))
+        from server import run
+
+        print(f"Serving on http://127.0.0.1:{args.port} with {args.workers} async worker(s)")
+        run("127.0.0.1", args.port, args.workers, use_fakes if args.aws == "fake" else None)
+    else:
+        serve(args.port, args.aws)
@@ -4,19 +4,48 @@ import sys
 from datetime import datetime
 
 from dotenv import load_dotenv
-from locust import HttpUser, TaskSet, between, task
+from locust import HttpUser, TaskSet, between, events, task
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(__file__))
 
-from tests.load_tests.config import API_GATEWAY_CONFIG, LAMBDA_FUNCTIONS
+from tests.load_tests import shapes
+from tests.load_tests.config import (
+    API_GATEWAY_CONFIG,
+    BATCH_SIZE,
+    LAMBDA_FUNCTIONS,
+    SLOS,
+    SUMMARY_PATH,
+    TASK_WEIGHTS,
+    VERSION_MIX,
+    WAIT_TIME,
+)
+from tests.load_tests.slo import build_summary, write_summary
 
 load_dotenv()
 
+# Locust runs the shape class found in this module, if any; LOAD_SHAPE picks one
+if os.environ.get("LOAD_SHAPE"):
+    SelectedLoadShape = shapes.SHAPES[os.environ["LOAD_SHAPE"]]
+
 
 class APIGatewayTasks(TaskSet):
     """Task set for API Gateway HTTP requests."""
 
+    def _pick_version(self, lambda_config: dict) -> str:
+        """Picks a model version according to the configured version mix."""
+        if not VERSION_MIX:
+            return lambda_config["model_version"]
+        return random.choices(list(VERSION_MIX), weights=list(VERSION_MIX.values()))[0]
+
+    def _generate_value(self) -> float:
+        value_min, value_max = (0, 100)
+        anomaly_prob = 0.05
+
+        if random.random() < anomaly_prob:
+            return random.uniform(value_max * 3.5, value_max * 4.5)
+        return random.uniform(value_min, value_max)
+
     def _generate_payload(self, lambda_config: dict) -> dict:
         """
         Generate random test payload for API requests.
@@ -27,53 +56,88 @@ class APIGatewayTasks(TaskSet):
         Returns:
             dict: Payload ready for HTTP POST request
         """
-        value_min, value_max = (0, 100)
-        anomaly_prob = 0.05
-
-        if random.random() < anomaly_prob:
-            value = random.uniform(value_max * 3.5, value_max * 4.5)
-        else:
-            value = random.uniform(value_min, value_max)
         return {
             "model_name": lambda_config["model_name"],
-            "model_version": lambda_config["model_version"],
-            "value": value,
+            "model_version": self._pick_version(lambda_config),
+            "value": self._generate_value(),
             "timestamp": datetime.now().isoformat(),
         }
 
-    @task(1)
-    def invoke_classify_anomaly(self):
-        """Task: Send HTTP POST request to /anomaly endpoint."""
-        payload = self._generate_payload(LAMBDA_FUNCTIONS["classify_anomaly"])
-        endpoint = API_GATEWAY_CONFIG["endpoints"]["classify_anomaly"]
+    def _generate_batch_payload(self, lambda_config: dict) -> dict:
+        """
+        Generate a random batch payload of `BATCH_SIZE` data points.
 
-        # Make HTTP POST request to API Gateway endpoint
-        headers = {"Content-Type": "application/json"}
+        Args:
+            lambda_config: Configuration dict with model details
+
+        Returns:
+            dict: Payload ready for HTTP POST request
+        """
+        now = datetime.now().isoformat()
+        return {
+            "model_name": lambda_config["model_name"],
+            "model_version": self._pick_version(lambda_config),
+            "data_points": [
+                {"value": self._generate_value(), "timestamp": now} for _ in range(BATCH_SIZE)
+            ],
+        }
 
-        _ = self.client.post(
-            endpoint,
+    def _post(self, name: str, payload: dict, expected_key: str) -> None:
+        """POST `payload` to the endpoint `name` and fail the request on a bad response."""
+        with self.client.post(
+            API_GATEWAY_CONFIG["endpoints"][name],
             json=payload,
-            headers=headers,
-            name="classify_anomaly",  # Locust uses this for grouping results
+            headers={"Content-Type": "application/json"},
+            name=name,  # Locust uses this for grouping results
             timeout=10,
-        )
+            catch_response=True,
+        ) as response:
+            if not 200 <= response.status_code < 300:
+                response.failure(f"HTTP {response.status_code}: {response.text[:200]}")
+                return
+            try:
+                body = response.json()
+            except ValueError:
+                response.failure("Response is not JSON")
+                return
+            if expected_key not in body:
+                response.failure(f"Response has no '{expected_key}'")
+
+    @task(TASK_WEIGHTS["classify_anomaly"])
+    def invoke_classify_anomaly(self):
+        """Task: Send HTTP POST request to /anomaly endpoint."""
+        payload = self._generate_payload(LAMBDA_FUNCTIONS["classify_anomaly"])
+        self._post("classify_anomaly", payload, "is_anomaly")
 
-    @task(1)
+    @task(TASK_WEIGHTS["classify_level"])
     def invoke_classify_level(self):
         """Task: Send HTTP POST request to /level endpoint."""
         payload = self._generate_payload(LAMBDA_FUNCTIONS["classify_level"])
-        endpoint = API_GATEWAY_CONFIG["endpoints"]["classify_level"]
-
-        # Make HTTP POST request to API Gateway endpoint
-        headers = {"Content-Type": "application/json"}
-
-        _ = self.client.post(
-            endpoint,
-            json=payload,
-            headers=headers,
-            name="classify_level",  # Locust uses this for grouping results
-            timeout=10,
-        )
+        self._post("classify_level", payload, "level")
+
+    @task(TASK_WEIGHTS["classify_anomaly_batch"])
+    def invoke_classify_anomaly_batch(self):
+        """Task: Send HTTP POST request to /anomaly/batch endpoint."""
+        payload = self._generate_batch_payload(LAMBDA_FUNCTIONS["classify_anomaly"])
+        self._post("classify_anomaly_batch", payload, "predictions")
+
+    @task(TASK_WEIGHTS["classify_level_batch"])
+    def invoke_classify_level_batch(self):
+        """Task: Send HTTP POST request to /level/batch endpoint."""
+        payload = self._generate_batch_payload(LAMBDA_FUNCTIONS["classify_level"])
+        self._post("classify_level_batch", payload, "levels")
+
+    @task(TASK_WEIGHTS["score"])
+    def invoke_score(self):
+        """Task: Send HTTP POST request to /score with both models, replacing two requests."""
+        configs = (LAMBDA_FUNCTIONS["classify_anomaly"], LAMBDA_FUNCTIONS["classify_level"])
+        payload = self._generate_payload(configs[0])
+        del payload["model_name"], payload["model_version"]
+        payload["models"] = [
+            {"model_name": config["model_name"], "model_version": self._pick_version(config)}
+            for config in configs
+        ]
+        self._post("score", payload, "results")
 
 
 class APIGatewayLoadTestUser(HttpUser):
@@ -82,5 +146,18 @@ class APIGatewayLoadTestUser(HttpUser):
     # Tasks to execute
     tasks = [APIGatewayTasks]
 
-    # Wait time between requests (1-2 seconds)
-    wait_time = between(1, 2)
+    # Wait time between requests (LOAD_WAIT_MIN to LOAD_WAIT_MAX seconds)
+    wait_time = between(*WAIT_TIME)
+
+
+@events.quitting.add_listener
+def report_slos(environment, **kwargs):
+    """Writes the per-endpoint summary and fails the run if any SLO is violated."""
+    summary = build_summary(environment.stats, SLOS)
+    write_summary(summary, SUMMARY_PATH)
+    for name, endpoint in summary["endpoints"].items():
+        verdict = "PASS" if endpoint["slo_passed"] else "FAIL " + "; ".join(endpoint["violations"])
+        print(f"SLO {name}: {verdict}")
+    print(f"Load test summary written to {SUMMARY_PATH}")
+    if not summary["passed"]:
+        environment.process_exit_code = 1
@@ -1,15 +1,48 @@
 #!/bin/bash
+#
+# Usage: run_test.sh [--local] [locust options...]
+#
+#   --local   Serve the handlers in-process (tests/load_tests/local_server.py) with in-memory
+#             AWS stand-ins instead of targeting the API Gateway deployed to LocalStack.
+#
+# Any other option is passed to Locust, e.g. --headless -u 50 -r 10 -t 5m.
+# LOAD_SHAPE=step|spike|soak selects a load profile (see tests/load_tests/shapes.py).
 
 set -e
 
 TERRAFORM_DIR="terraform"
+LOCAL_PORT="${LOCAL_PORT:-8080}"
 
 export AWS_DEFAULT_REGION="us-east-1"
 
-# Get base URL from Terraform outputs
-echo "Retrieving API endpoint from Terraform..."
-BASE_URL=$(cd $TERRAFORM_DIR && tflocal output -raw rest_api_endpoint_base)
+LOCAL=false
+LOCUST_ARGS=()
+for arg in "$@"; do
+    if [ "$arg" == "--local" ]; then
+        LOCAL=true
+    else
+        LOCUST_ARGS+=("$arg")
+    fi
+done
+
+if [ "$LOCAL" == true ]; then
+    echo "Starting local server on port $LOCAL_PORT..."
+    uv run python -m tests.load_tests.local_server --port "$LOCAL_PORT" &
+    SERVER_PID=$!
+    trap 'kill $SERVER_PID 2>/dev/null' EXIT
+    for _ in $(seq 1 50); do
+        if curl -s -o /dev/null "http://127.0.0.1:$LOCAL_PORT/"; then
+            break
+        fi
+        sleep 0.2
+    done
+    BASE_URL="http://127.0.0.1:$LOCAL_PORT"
+else
+    # Get base URL from Terraform outputs
+    echo "Retrieving API endpoint from Terraform..."
+    BASE_URL=$(cd $TERRAFORM_DIR && tflocal output -raw rest_api_endpoint_base)
+fi
 echo "Base URL: $BASE_URL"
 echo ""
 
-uv run locust -f tests/load_tests/locustfile.py --host $BASE_URL
+uv run locust -f tests/load_tests/locustfile.py --host $BASE_URL "${LOCUST_ARGS[@]}"
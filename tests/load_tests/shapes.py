@@ -0,0 +1,61 @@
+import os
+
+from locust import LoadTestShape
+
+
+class StepLoadShape(LoadTestShape):
+    """Adds `STEP_USERS` users every `STEP_SECONDS` for `STEP_COUNT` steps, then stops."""
+
+    step_users = int(os.environ.get("STEP_USERS", "10"))
+    step_seconds = float(os.environ.get("STEP_SECONDS", "30"))
+    step_count = int(os.environ.get("STEP_COUNT", "5"))
+    spawn_rate = float(os.environ.get("SPAWN_RATE", "10"))
+
+    def tick(self):
+        step = int(self.get_run_time() // self.step_seconds)
+        if step >= self.step_count:
+            return None
+        return (step + 1) * self.step_users, self.spawn_rate
+
+
+class SpikeLoadShape(LoadTestShape):
+    """Holds a baseline load, jumps to a peak for a short burst, then checks recovery."""
+
+    base_users = int(os.environ.get("SPIKE_BASE_USERS", "5"))
+    peak_users = int(os.environ.get("SPIKE_PEAK_USERS", "100"))
+    warmup_seconds = float(os.environ.get("SPIKE_WARMUP_SECONDS", "60"))
+    spike_seconds = float(os.environ.get("SPIKE_SECONDS", "30"))
+    recovery_seconds = float(os.environ.get("SPIKE_RECOVERY_SECONDS", "60"))
+
+    def tick(self):
+        run_time = self.get_run_time()
+        spike_start = self.warmup_seconds
+        spike_end = spike_start + self.spike_seconds
+        if run_time < spike_start:
+            return self.base_users, self.base_users
+        if run_time < spike_end:
+            # Spawn the whole spike at once
+            return self.peak_users, self.peak_users
+        if run_time < spike_end + self.recovery_seconds:
+            return self.base_users, self.peak_users
+        return None
+
+
+class SoakLoadShape(LoadTestShape):
+    """Ramps up to `SOAK_USERS` and holds that load for `SOAK_SECONDS`."""
+
+    users = int(os.environ.get("SOAK_USERS", "20"))
+    ramp_seconds = float(os.environ.get("SOAK_RAMP_SECONDS", "60"))
+    soak_seconds = float(os.environ.get("SOAK_SECONDS", "3600"))
+
+    def tick(self):
+        if self.get_run_time() >= self.ramp_seconds + self.soak_seconds:
+            return None
+        return self.users, max(1.0, self.users / max(self.ramp_seconds, 1.0))
+
+
+SHAPES = {
+    "step": StepLoadShape,
+    "spike": SpikeLoadShape,
+    "soak": SoakLoadShape,
+}
@@ -0,0 +1,73 @@
+import json
+import time
+
+
+def endpoint_summary(entry, duration: float) -> dict:
+    """Summarizes one Locust stats entry.
+
+    Args:
+        entry (StatsEntry): Locust statistics of one endpoint.
+        duration (float): Length of the test in seconds.
+
+    Returns:
+        dict: Request counts, error rate, throughput and latency percentiles in ms.
+    """
+    requests = entry.num_requests
+    return {
+        "requests": requests,
+        "failures": entry.num_failures,
+        "error_rate": entry.num_failures / requests if requests else 0.0,
+        "rps": requests / duration if duration else 0.0,
+        "p50_ms": entry.get_response_time_percentile(0.50),
+        "p95_ms": entry.get_response_time_percentile(0.95),
+        "p99_ms": entry.get_response_time_percentile(0.99),
+        "max_ms": entry.max_response_time,
+    }
+
+
+def check_slo(summary: dict, slo: dict) -> list[str]:
+    """Returns a description of every objective the endpoint summary violates."""
+    violations = []
+    for percentile in ("p95_ms", "p99_ms"):
+        if percentile in slo and summary[percentile] > slo[percentile]:
+            violations.append(f"{percentile} {summary[percentile]:.0f} > {slo[percentile]}")
+    if summary["error_rate"] > slo.get("max_error_rate", 1.0):
+        violations.append(f"error_rate {summary['error_rate']:.2%} > {slo['max_error_rate']:.2%}")
+    return violations
+
+
+def build_summary(stats, slos: dict) -> dict:
+    """Builds the machine-readable summary of a finished load test.
+
+    Args:
+        stats (RequestStats): `environment.stats` of the Locust run.
+        slos (dict): Objectives per endpoint name, with a "default" entry.
+
+    Returns:
+        dict: Per-endpoint results with SLO verdicts, and an overall `passed` flag.
+    """
+    duration = max(stats.total.last_request_timestamp or time.time(), stats.total.start_time)
+    duration -= stats.total.start_time
+
+    endpoints = {}
+    for (name, method), entry in sorted(stats.entries.items()):
+        summary = endpoint_summary(entry, duration)
+        violations = check_slo(summary, slos.get(name, slos["default"]))
+        endpoints[name] = {
+            "method": method,
+            **summary,
+            "slo_passed": not violations,
+            "violations": violations,
+        }
+
+    return {
+        "duration_s": duration,
+        "total": endpoint_summary(stats.total, duration),
+        "endpoints": endpoints,
+        "passed": all(e["slo_passed"] for e in endpoints.values()) and bool(endpoints),
+    }
+
+
+def write_summary(summary: dict, path: str) -> None:
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
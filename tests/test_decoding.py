@@ -0,0 +1,202 @@
+import base64
+import json
+
+import numpy as np
+import pytest
+from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
+from shared.decoding import (
+    JSON,
+    PACKED_FLOAT64,
+    RequestValidationError,
+    UnsupportedMediaType,
+    decode_batch,
+    decode_point,
+    decode_points,
+    decode_score,
+    requested_models,
+)
+
+MODEL = {"model_name": "anomaly_classifier", "model_version": "v1"}
+
+
+def _event(
+    body: bytes | str | dict | None,
+    content_type: str = JSON,
+    query: dict | None = None,
+    base64_encoded: bool = False,
+) -> APIGatewayProxyEvent:
+    if isinstance(body, dict):
+        body = json.dumps(body)
+    if base64_encoded:
+        body = base64.b64encode(body if isinstance(body, bytes) else body.encode()).decode()
+    return APIGatewayProxyEvent(
+        {
+            "path": "/anomaly",
+            "httpMethod": "POST",
+            "headers": {"Content-Type": content_type},
+            "queryStringParameters": query,
+            "body": body,
+            "isBase64Encoded": base64_encoded,
+        }
+    )
+
+
+def test_decodes_a_point():
+    request = decode_point(_event({**MODEL, "value": 3, "timestamp": 17, "entity_id": "e"}))
+    assert request.value == 3.0
+    assert request.timestamp == "17"
+    assert request.entity_id == "e"
+
+
+def test_decodes_a_batch():
+    points = [{"value": 1.5, "timestamp": "a"}, {"value": 2}]
+    request = decode_batch(_event({**MODEL, "data_points": points}), max_points=10)
+    assert request.values.dtype == np.float64
+    assert request.values.tolist() == [1.5, 2.0]
+    assert request.timestamps == ["a", None]
+
+
+@pytest.mark.parametrize(
+    ("body", "message"),
+    [
+        ({**MODEL, "value": True}, "value must be a number"),
+        ({**MODEL, "value": "1"}, "value must be a number"),
+        ({**MODEL}, "value must be a number"),
+        ({**MODEL, "value": float("nan")}, "value must be finite"),
+        ({**MODEL, "value": float("inf")}, "value must be finite"),
+        # Python parses the integer exactly; converting it to float64 overflows
+        ({**MODEL, "value": 10**400}, "value must be finite"),
+        ({"model_version": "v1", "value": 1}, "model_name must be a non-empty string"),
+        ({**MODEL, "model_version": "", "value": 1}, "model_version must be a non-empty"),
+        ({**MODEL, "value": 1, "timestamp": [1]}, "timestamp must be a string or a number"),
+    ],
+)
+def test_point_field_errors(body, message):
+    with pytest.raises(RequestValidationError, match=message):
+        decode_point(_event(body))
+
+
+@pytest.mark.parametrize(
+    ("points", "message"),
+    [
+        ([], "data_points must be a list of 1 to 3 points"),
+        ([{"value": 1}] * 4, "data_points must be a list of 1 to 3 points"),
+        ({"value": 1}, "data_points must be a list"),
+        ([1, 2], "every data point must be an object with a value"),
+        ([{"timestamp": "t"}], "every data point must be an object with a value"),
+        ([{"value": True}], "every data point value must be a number"),
+        ([{"value": "2"}], "every data point value must be a number"),
+        ([{"value": 1}, {"value": 10**400}], "every data point value must be finite"),
+        ([{"value": float("nan")}], "every data point value must be finite"),
+        ([{"value": 1, "timestamp": {}}], r"data_points\[0\].timestamp must be"),
+    ],
+)
+def test_batch_field_errors(points, message):
+    with pytest.raises(RequestValidationError, match=message):
+        decode_batch(_event({**MODEL, "data_points": points}), max_points=3)
+
+
+@pytest.mark.parametrize(
+    ("event", "message"),
+    [
+        (_event(None), "Request body is empty"),
+        (_event("{not json"), "Body is not valid application/json"),
+        (_event("[1, 2]"), "Body must be an object"),
+        (_event({**MODEL, "value": 1}, base64_encoded=True), None),
+    ],
+)
+def test_body_errors(event, message):
+    if message is None:
+        assert decode_point(event).value == 1.0
+        return
+    with pytest.raises(RequestValidationError, match=message):
+        decode_point(event)
+
+
+def test_invalid_base64_body():
+    # Three characters cannot be padded base64
+    event = _event("abc")
+    event.raw_event["isBase64Encoded"] = True
+    with pytest.raises(RequestValidationError, match="Body is not valid base64"):
+        decode_point(event)
+
+
+def test_decodes_msgpack():
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.packb({**MODEL, "data_points": [{"value": 4}]})
+    request = decode_batch(_event(body, "application/msgpack", base64_encoded=True), max_points=10)
+    assert request.values.tolist() == [4.0]
+
+
+def test_decodes_packed_float64():
+    values = np.array([1.0, -2.5, 3.25], dtype="<f8")
+    event = _event(values.tobytes(), PACKED_FLOAT64, query=MODEL, base64_encoded=True)
+    request = decode_batch(event, max_points=10)
+    assert request.values.tolist() == values.tolist()
+    assert request.timestamps == [None, None, None]
+
+
+@pytest.mark.parametrize(
+    ("body", "message"),
+    [
+        (b"\0" * 12, "Packed body must be a non-empty sequence of float64 values"),
+        (np.array([1.0, np.nan]).tobytes(), "every value must be finite"),
+        (np.zeros(11).tobytes(), "at most 10 values are accepted"),
+    ],
+)
+def test_packed_float64_errors(body, message):
+    event = _event(body, PACKED_FLOAT64, query=MODEL, base64_encoded=True)
+    with pytest.raises(RequestValidationError, match=message):
+        decode_batch(event, max_points=10)
+
+
+def test_packed_float64_needs_a_model_in_the_query_string():
+    event = _event(np.zeros(2).tobytes(), PACKED_FLOAT64, base64_encoded=True)
+    with pytest.raises(RequestValidationError, match="model_name must be a non-empty string"):
+        decode_batch(event, max_points=10)
+
+
+def test_single_point_routes_reject_packed_bodies():
+    event = _event(np.zeros(1).tobytes(), PACKED_FLOAT64, query=MODEL, base64_encoded=True)
+    with pytest.raises(UnsupportedMediaType):
+        decode_point(event)
+
+
+def test_decode_points_reports_single_requests():
+    batch, single = decode_points(_event({**MODEL, "value": 2}), max_points=10)
+    assert single
+    assert batch.values.tolist() == [2.0]
+    batch, single = decode_points(_event({**MODEL, "data_points": [{"value": 2}]}), max_points=10)
+    assert not single
+
+
+def test_decode_score():
+    models = [MODEL, {"model_name": "level_classifier", "model_version": "latest"}]
+    request = decode_score(_event({"models": models, "value": 1}), max_points=10, max_models=3)
+    assert [ref.model_name for ref in request.models] == ["anomaly_classifier", "level_classifier"]
+    assert request.single
+
+
+@pytest.mark.parametrize(
+    ("models", "message"),
+    [
+        ([], "models must be a list of 1 to 2 models"),
+        ([MODEL] * 3, "models must be a list of 1 to 2 models"),
+        ([MODEL, MODEL], "each model may only be requested once"),
+        (["anomaly_classifier@v1"], r"models\[0\] must be an object"),
+        ([{"model_name": "a"}], r"models\[0\].model_version must be a non-empty string"),
+    ],
+)
+def test_score_model_errors(models, message):
+    with pytest.raises(RequestValidationError, match=message):
+        decode_score(_event({"models": models, "value": 1}), max_points=10, max_models=2)
+
+
+def test_requested_models_keeps_the_parsed_body():
+    event = _event({**MODEL, "value": 1})
+    assert [(r.model_name, r.model_version) for r in requested_models(event)] == [
+        ("anomaly_classifier", "v1")
+    ]
+    # The decoder reuses the parsed document instead of the (now unreadable) body
+    event.raw_event["body"] = "{not json"
+    assert decode_point(event).value == 1.0
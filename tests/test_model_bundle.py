@@ -0,0 +1,114 @@
+import json
+import struct
+
+import pytest
+
+from common.model_bundle import (
+    ALIGNMENT,
+    EMPTY_SLOT,
+    MAGIC,
+    fnv1a_64,
+    open_bundle,
+    write_bundle,
+)
+
+ANOMALY = "ToyAnomalyClassifier"
+
+
+def _params(i: int) -> dict:
+    return {"mean": float(i), "std": i / 10, "threshold": i + 0.5}
+
+
+def _header(path) -> dict:
+    data = path.read_bytes()
+    (length,) = struct.unpack("<I", data[8:12])
+    return json.loads(data[12 : 12 + length])
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        (b"", 0xCBF29CE484222325),
+        (b"a", 0xAF63DC4C8601EC8C),
+        (b"foobar", 0x85944171F73967E8),
+    ],
+)
+def test_fnv1a_64_matches_reference_vectors(data, expected):
+    assert fnv1a_64(data) == expected
+
+
+def test_header_and_section_alignment(tmp_path):
+    path = tmp_path / "bundle.bin"
+    size = write_bundle(str(path), ANOMALY, {f"entity-{i}": _params(i) for i in range(5)})
+
+    data = path.read_bytes()
+    header = _header(path)
+    assert data[:8] == MAGIC
+    assert size == len(data)
+    assert header["count"] == 5
+    assert header["fields"] == ["mean", "std", "threshold"]
+    assert header["id_width"] == len("entity-0")
+    assert header["records_offset"] % ALIGNMENT == 0
+    assert header["index_offset"] % ALIGNMENT == 0
+    # A power of two at least twice the number of entities keeps probe sequences short
+    assert header["slots"] >= 2 * header["count"]
+    assert header["slots"] & (header["slots"] - 1) == 0
+    assert size == header["index_offset"] + 8 * header["slots"]
+
+
+def test_lookup_round_trips_every_entity(tmp_path):
+    path = tmp_path / "bundle.bin"
+    models = {f"entity-{i}": _params(i) for i in range(1000)}
+    write_bundle(str(path), ANOMALY, models)
+
+    bundle = open_bundle(str(path))
+    assert len(bundle) == 1000
+    assert bundle.model_type == ANOMALY
+    assert sorted(bundle.entity_ids()) == sorted(models)
+    for entity_id, params in models.items():
+        assert bundle.lookup(entity_id) == params
+    assert bundle.lookup("missing") is None
+    assert "missing" not in bundle
+
+
+def test_colliding_entities_are_found_by_linear_probing(tmp_path):
+    # Two entities share a table of 4 slots; find ids that hash to the same one
+    ids = [f"id{i}" for i in range(64)]
+    first = ids[0]
+    second = next(i for i in ids[1:] if fnv1a_64(i.encode()) & 3 == fnv1a_64(first.encode()) & 3)
+    path = tmp_path / "bundle.bin"
+    write_bundle(str(path), ANOMALY, {first: _params(1), second: _params(2)})
+
+    bundle = open_bundle(str(path))
+    assert len(bundle.index) == 4
+    slot = fnv1a_64(first.encode()) & 3
+    assert bundle.index[slot] != EMPTY_SLOT
+    assert bundle.index[(slot + 1) & 3] != EMPTY_SLOT
+    assert bundle.lookup(first) == _params(1)
+    assert bundle.lookup(second) == _params(2)
+
+
+def test_empty_bundle(tmp_path):
+    path = tmp_path / "bundle.bin"
+    write_bundle(str(path), ANOMALY, {})
+
+    bundle = open_bundle(str(path))
+    assert len(bundle) == 0
+    assert bundle.lookup("anything") is None
+
+
+def test_level_bundle_stores_level_fields(tmp_path):
+    path = tmp_path / "bundle.bin"
+    params = {"baseline_avg": 1.0, "std_dev": 2.0, "high_cutoff": 3.0, "low_cutoff": -3.0}
+    write_bundle(str(path), "ToyLevelClassifier", {"e": params})
+
+    assert open_bundle(str(path)).lookup("e") == params
+
+
+def test_rejects_files_that_are_not_bundles(tmp_path):
+    path = tmp_path / "model.json"
+    path.write_text('{"mean": 1}' + " " * 16)
+    with pytest.raises(ValueError, match="Not a model bundle"):
+        open_bundle(str(path))
+    with pytest.raises(FileNotFoundError):
+        open_bundle(str(tmp_path / "missing.bin"))
@@ -0,0 +1,62 @@
+import threading
+from collections import Counter
+
+from shared.prediction_keys import (
+    PredictionKeys,
+    partition_key,
+    sort_key_range,
+)
+
+TIMESTAMP = "2026-01-01T00:00:00.000000"
+
+
+def test_partition_key_format():
+    assert partition_key("anomaly_classifier", "v3", 5) == "anomaly_classifier#v3#5"
+
+
+def test_identical_timestamps_get_distinct_sort_keys():
+    keys = PredictionKeys(shards=4)
+    sort_keys = [keys.next("m", "v1", TIMESTAMP)["sk"] for _ in range(1000)]
+    assert len(set(sort_keys)) == 1000
+    assert all(sk.startswith(f"{TIMESTAMP}#") for sk in sort_keys)
+
+
+def test_concurrent_writers_never_collide():
+    writers = [PredictionKeys(shards=4) for _ in range(8)]
+    sort_keys = []
+    lock = threading.Lock()
+
+    def write(keys: PredictionKeys) -> None:
+        generated = [keys.next("m", "v1", TIMESTAMP)["sk"] for _ in range(500)]
+        with lock:
+            sort_keys.extend(generated)
+
+    # Two threads share each writer, as handler threads share the module's writer
+    threads = [threading.Thread(target=write, args=(keys,)) for keys in writers * 2]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(sort_keys) == len(set(sort_keys)) == 8 * 2 * 500
+
+
+def test_records_spread_evenly_over_shards():
+    keys = PredictionKeys(shards=8)
+    shards = Counter(keys.next("m", "v1", TIMESTAMP)["pk"] for _ in range(800))
+    assert shards == Counter({partition_key("m", "v1", shard): 100 for shard in range(8)})
+
+
+def test_sort_keys_keep_time_order():
+    keys = PredictionKeys(shards=2)
+    timestamps = [f"2026-01-01T00:00:{second:02d}" for second in range(60)]
+    sort_keys = [keys.next("m", "v1", timestamp)["sk"] for timestamp in reversed(timestamps)]
+    assert sorted(sort_keys) == sort_keys[::-1]
+
+
+def test_sort_key_range_includes_every_key_of_the_end_timestamp():
+    keys = PredictionKeys()
+    low, high = sort_key_range("2026-01-01T00:00:00", "2026-01-01T00:00:59")
+    inside = keys.next("m", "v1", "2026-01-01T00:00:59")["sk"]
+    assert low <= keys.next("m", "v1", "2026-01-01T00:00:00")["sk"] <= high
+    assert low <= inside <= high
+    assert not low <= keys.next("m", "v1", "2026-01-01T00:01:00")["sk"] <= high
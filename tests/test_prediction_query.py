@@ -0,0 +1,213 @@
+import base64
+import json
+from types import SimpleNamespace
+
+import pytest
+from shared import prediction_query
+from shared.prediction_keys import PredictionKeys
+from shared.prediction_query import (
+    decode_token,
+    encode_token,
+    query_predictions,
+    scan_predictions,
+)
+
+SHARDS = 4
+TABLE = "model-predictions"
+
+
+class FakeDynamoDB:
+    """Just enough of the DynamoDB client for the predictions queries.
+
+    `page_items` caps every response, as DynamoDB's 1 MB page limit would, so that reads
+    need several pages even when `Limit` is larger.
+    """
+
+    def __init__(self, items: list[dict], page_items: int = 3):
+        self.items = items
+        self.page_items = page_items
+        self.meta = SimpleNamespace(client=self)
+
+    def query(self, KeyConditionExpression, ExpressionAttributeValues, **kwargs):
+        values = ExpressionAttributeValues
+        matches = sorted(
+            (
+                item
+                for item in self.items
+                if item["pk"] == values[":pk"] and values[":low"] <= item["sk"] <= values[":high"]
+            ),
+            key=lambda item: item["sk"],
+            reverse=not kwargs.get("ScanIndexForward", True),
+        )
+        if start := kwargs.get("ExclusiveStartKey"):
+            matches = matches[[item["sk"] for item in matches].index(start["sk"]) + 1 :]
+        return self._page(matches, kwargs.get("Limit"))
+
+    def scan(self, Segment, TotalSegments, **kwargs):
+        matches = sorted(
+            (item for item in self.items if int(item["pk"][-1]) % TotalSegments == Segment),
+            key=lambda item: (item["pk"], item["sk"]),
+        )
+        if start := kwargs.get("ExclusiveStartKey"):
+            keys = [(item["pk"], item["sk"]) for item in matches]
+            matches = matches[keys.index((start["pk"], start["sk"])) + 1 :]
+        return self._page(matches, kwargs.get("Limit"))
+
+    def _page(self, matches: list[dict], limit: int | None) -> dict:
+        size = min(limit or len(matches), self.page_items)
+        response = {"Items": matches[:size]}
+        if len(matches) > size:
+            last = matches[size - 1]
+            response["LastEvaluatedKey"] = {"pk": last["pk"], "sk": last["sk"]}
+        return response
+
+
+def _predictions(count: int) -> list[dict]:
+    keys = PredictionKeys(shards=SHARDS)
+    items = []
+    for i in range(count):
+        # Pairs of predictions share a timestamp, as in a batch request
+        timestamp = f"2026-01-01T00:{i // 2:02d}:00"
+        items.append({**keys.next("m", "v1", timestamp), "timestamp": timestamp, "i": i})
+    return items
+
+
+def _token(state) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def _read_all(dynamodb, limit: int, newest_first: bool = False) -> tuple[list[dict], int]:
+    items, token, pages = [], None, 0
+    while True:
+        page, token = query_predictions(
+            dynamodb,
+            TABLE,
+            "m",
+            "v1",
+            start="2026-01-01",
+            end="2026-01-02",
+            limit=limit,
+            next_token=token,
+            newest_first=newest_first,
+            shards=SHARDS,
+        )
+        assert len(page) <= limit
+        items += page
+        pages += 1
+        if token is None:
+            return items, pages
+
+
+def test_token_round_trip():
+    state = {"shards": {"0": None, "3": {"pk": "m#v1#3", "sk": "t#x"}}}
+    assert decode_token(encode_token(state)) == state
+    assert encode_token(None) is None
+    assert decode_token(None) is None
+    assert decode_token("") is None
+
+
+@pytest.mark.parametrize("token", ["@@@", base64.urlsafe_b64encode(b"not json").decode()])
+def test_undecodable_token_is_rejected(token):
+    with pytest.raises(ValueError, match="Invalid next_token"):
+        decode_token(token)
+
+
+@pytest.mark.parametrize(
+    "state",
+    [
+        [1],
+        {},
+        {"shards": []},
+        {"shards": {"x": 1}},
+        {"shards": {"0": 5}},
+        {"shards": {"-1": None}},
+        {"shards": {str(SHARDS): None}},
+        {"shards": {"0": {"pk": 1}}},
+    ],
+)
+def test_query_rejects_malformed_state(state):
+    with pytest.raises(ValueError, match="Invalid next_token"):
+        query_predictions(
+            FakeDynamoDB([]), TABLE, "m", "v1", "a", "b", next_token=_token(state), shards=SHARDS
+        )
+
+
+@pytest.mark.parametrize("newest_first", [False, True])
+@pytest.mark.parametrize("limit", [1, 7, 100])
+def test_pages_merge_shards_in_sort_key_order(limit, newest_first):
+    stored = _predictions(40)
+    items, pages = _read_all(FakeDynamoDB(stored), limit, newest_first)
+
+    sort_keys = [item["sk"] for item in items]
+    assert len(sort_keys) == len(set(sort_keys)) == len(stored)
+    assert sort_keys == sorted(sort_keys, reverse=newest_first)
+    assert pages == max(1, -(-len(stored) // limit))
+
+
+def test_time_range_is_inclusive():
+    stored = _predictions(10)
+    items, _ = query_predictions(
+        FakeDynamoDB(stored),
+        TABLE,
+        "m",
+        "v1",
+        start="2026-01-01T00:01:00",
+        end="2026-01-01T00:02:00",
+        limit=100,
+        shards=SHARDS,
+    )
+    assert sorted(item["i"] for item in items) == [2, 3, 4, 5]
+
+
+def test_token_resumes_after_the_last_returned_item():
+    dynamodb = FakeDynamoDB(_predictions(12))
+    first, token = query_predictions(
+        dynamodb, TABLE, "m", "v1", "2026", "2027", limit=5, shards=SHARDS
+    )
+    second, _ = query_predictions(
+        dynamodb, TABLE, "m", "v1", "2026", "2027", limit=5, next_token=token, shards=SHARDS
+    )
+    assert first[-1]["sk"] < second[0]["sk"]
+    # Shards whose items were all returned are dropped from the token
+    assert set(decode_token(token)["shards"]) <= {str(s) for s in range(SHARDS)}
+
+
+@pytest.mark.parametrize(
+    "state",
+    [
+        [1],
+        {},
+        {"segments": 0, "keys": {}, "done": []},
+        {"segments": 99, "keys": {}, "done": []},
+        {"segments": True, "keys": {}, "done": []},
+        {"segments": 2, "keys": [], "done": []},
+        {"segments": 2, "keys": {"5": {"pk": "a"}}, "done": []},
+        {"segments": 2, "keys": {"0": None}, "done": []},
+        {"segments": 2, "keys": {}, "done": ["0"]},
+        {"segments": 2, "keys": {}, "done": [2]},
+    ],
+)
+def test_scan_rejects_malformed_state(state):
+    with pytest.raises(ValueError, match="Invalid next_token"):
+        scan_predictions(FakeDynamoDB([]), TABLE, next_token=_token(state))
+
+
+def test_scan_pages_cover_every_item_once():
+    stored = _predictions(50)
+    dynamodb = FakeDynamoDB(stored, page_items=100)
+    seen, token = [], None
+    while True:
+        items, token = scan_predictions(dynamodb, TABLE, segments=3, page_size=4, next_token=token)
+        assert len(items) <= 3 * 4
+        seen += [item["sk"] for item in items]
+        if token is None:
+            break
+    assert sorted(seen) == sorted(item["sk"] for item in stored)
+
+
+def test_scan_page_stays_within_max_export_items(monkeypatch):
+    monkeypatch.setattr(prediction_query, "MAX_EXPORT_ITEMS", 10)
+    dynamodb = FakeDynamoDB(_predictions(200), page_items=1000)
+    items, token = scan_predictions(dynamodb, TABLE, segments=4, page_size=1000)
+    assert len(items) == 8
+    assert token is not None